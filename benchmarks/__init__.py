@@ -0,0 +1 @@
+"""بنچمارک مسیر داغ دریافت، پردازش و تحلیل روی پاسخ‌های ضبط‌شده (بدون نیاز به شبکه)"""
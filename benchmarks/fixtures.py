@@ -0,0 +1,208 @@
+"""ضبط پاسخ‌های CoinGecko و alternative.me برای بنچمارک و بارگذاری دوباره‌ی آن‌ها
+
+python -m benchmarks.fixtures --record      # ضبط از API واقعی
+python -m benchmarks.fixtures --synthetic   # تولید قطعی بدون شبکه (برای محیط‌های بسته)
+"""
+import argparse
+import gzip
+import json
+import os
+import time
+
+import numpy as np
+import requests
+
+# ==================== تنظیمات ====================
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+COIN_ID = "bitcoin"
+VS_CURRENCY = "usd"
+DAYS = (7, 30, 90, 365)
+MARKETS_TOP_N = 250
+COIN_LIST_SIZE = 15_000  # هم‌اندازه‌ی لیست واقعی /coins/list
+SYNTHETIC_END_MS = 1767225600000  # 2026-01-01؛ سرور آزمایشی زمان‌ها را به «اکنون» منتقل می‌کند
+
+
+def market_chart_name(coin_id, vs_currency, days):
+    return f"market_chart_{coin_id}_{vs_currency}_{days}.json.gz"
+
+
+def coin_name(coin_id):
+    return f"coin_{coin_id}.json.gz"
+
+
+def markets_name(vs_currency):
+    return f"markets_{vs_currency}.json.gz"
+
+
+COIN_LIST_NAME = "coins_list.json.gz"
+FEAR_GREED_NAME = "fng.json.gz"
+MANIFEST_NAME = "manifest.json"
+
+
+# ==================== خواندن و نوشتن ====================
+def save_fixture(name, payload, directory=FIXTURES_DIR):
+    os.makedirs(directory, exist_ok=True)
+    # mtime=0 تا فایل‌های یکسان بایت‌به‌بایت یکسان بمانند
+    with gzip.GzipFile(os.path.join(directory, name), "wb", mtime=0) as fh:
+        fh.write(json.dumps(payload, separators=(",", ":")).encode())
+
+
+def load_fixture(name, directory=FIXTURES_DIR):
+    """محتوای یک فیکسچر یا None اگر وجود نداشته باشد"""
+    path = os.path.join(directory, name)
+    if not os.path.exists(path):
+        return None
+    with gzip.open(path, "rb") as fh:
+        return json.loads(fh.read())
+
+
+def load_manifest(directory=FIXTURES_DIR):
+    path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def _save_manifest(source, directory):
+    manifest = {
+        "source": source,
+        "coin_id": COIN_ID,
+        "vs_currency": VS_CURRENCY,
+        "days": list(DAYS),
+        "created_at": int(time.time()),
+    }
+    with open(os.path.join(directory, MANIFEST_NAME), "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2)
+        fh.write("\n")
+
+
+# ==================== ضبط از API ====================
+def record(directory=FIXTURES_DIR, coin_id=COIN_ID, vs_currency=VS_CURRENCY, days=DAYS):
+    """دریافت پاسخ‌های واقعی و ذخیره‌ی آن‌ها به همان شکلی که API برگردانده است"""
+    session = requests.Session()
+    api_key = os.environ.get("COINGECKO_API_KEY")
+    headers = {"x-cg-demo-api-key": api_key} if api_key else {}
+    base_url = "https://api.coingecko.com/api/v3"
+
+    def get(url, params=None):
+        response = session.get(url, params=params, headers=headers, timeout=30)
+        response.raise_for_status()
+        time.sleep(2.5)  # رعایت سهمیه‌ی پلن رایگان
+        return response.json()
+
+    for d in days:
+        payload = get(f"{base_url}/coins/{coin_id}/market_chart", {"vs_currency": vs_currency, "days": d})
+        save_fixture(market_chart_name(coin_id, vs_currency, d), payload, directory)
+    save_fixture(coin_name(coin_id), get(f"{base_url}/coins/{coin_id}", {"localization": "false"}), directory)
+    save_fixture(markets_name(vs_currency), get(f"{base_url}/coins/markets", {
+        "vs_currency": vs_currency, "order": "market_cap_desc", "per_page": MARKETS_TOP_N, "page": 1,
+        "sparkline": "true", "price_change_percentage": "24h,7d",
+    }), directory)
+    save_fixture(COIN_LIST_NAME, get(f"{base_url}/coins/list"), directory)
+    save_fixture(FEAR_GREED_NAME, get("https://api.alternative.me/fng/"), directory)
+    _save_manifest("recorded", directory)
+
+
+# ==================== تولید قطعی ====================
+def _synthetic_market_chart(days, rng):
+    # همان دقت نقاطی که CoinGecko برمی‌گرداند: ساعتی تا ۹۰ روز و روزانه برای بیشتر از آن
+    step = 3600_000 if days <= 90 else 86_400_000
+    timestamps = np.arange(SYNTHETIC_END_MS - days * 86_400_000, SYNTHETIC_END_MS, step)
+    # CoinGecko آخرین نقطه را در لحظه‌ی درخواست (خارج از شبکه‌ی زمانی) اضافه می‌کند
+    timestamps = np.append(timestamps, SYNTHETIC_END_MS - 137_000)
+    prices = 60_000 * np.exp(np.cumsum(rng.normal(0, 0.01 if days <= 90 else 0.03, len(timestamps))))
+    market_caps = prices * 19_800_000
+    volumes = rng.lognormal(mean=24, sigma=0.3, size=len(timestamps))
+
+    def pairs(values):
+        return [[int(t), float(v)] for t, v in zip(timestamps, values)]
+
+    return {"prices": pairs(prices), "market_caps": pairs(market_caps), "total_volumes": pairs(volumes)}
+
+
+def _synthetic_markets(vs_currency, rng, count=MARKETS_TOP_N):
+    """پاسخ /coins/markets با sparkline ساعتی هفت‌روزه و بازده‌های همبسته با یک عامل مشترک بازار"""
+    hours = 169
+    market = rng.normal(0, 0.006, hours - 1)
+    rows = []
+    for rank in range(1, count + 1):
+        coin_id = "bitcoin" if rank == 1 else f"coin-{rank}"
+        if rank in (3, 6):
+            # استیبل‌کوین‌ها تقریباً ثابت‌اند
+            returns = rng.normal(0, 0.0002, hours - 1)
+        else:
+            returns = rng.uniform(0.5, 1.5) * market + rng.normal(0, 0.004 + 0.00004 * rank, hours - 1)
+        start = 60_000 / rank ** 1.5
+        prices = start * np.exp(np.concatenate(([0.0], np.cumsum(returns))))
+        # ارزهای تازه فهرست‌شده sparkline کوتاه‌تری دارند
+        length = hours if rank % 50 else 100
+        rows.append({
+            "id": coin_id,
+            "symbol": "btc" if rank == 1 else f"c{rank}",
+            "name": "Bitcoin" if rank == 1 else f"Coin {rank}",
+            "current_price": float(prices[-1]),
+            "market_cap": float(prices[-1] * 19_800_000 / rank),
+            "market_cap_rank": rank,
+            "total_volume": float(rng.lognormal(mean=24 - rank / 40, sigma=0.3)),
+            "price_change_percentage_24h_in_currency": float((prices[-1] / prices[-25] - 1) * 100),
+            "price_change_percentage_7d_in_currency": float((prices[-1] / prices[hours - length] - 1) * 100),
+            "sparkline_in_7d": {"price": [float(p) for p in prices[hours - length:]]},
+        })
+    return rows
+
+
+def _synthetic_coin_list(markets, count=COIN_LIST_SIZE):
+    """پاسخ /coins/list: ارزهای بازار، چند توکن هم‌نماد و نام‌های مشابه، و ورودی‌های پرکننده"""
+    rows = [{"id": row["id"], "symbol": row["symbol"], "name": row["name"]} for row in markets]
+    rows += [
+        {"id": "ethereum", "symbol": "eth", "name": "Ethereum"},
+        {"id": "solana", "symbol": "sol", "name": "Solana"},
+        {"id": "wrapped-bitcoin", "symbol": "wbtc", "name": "Wrapped Bitcoin"},
+        {"id": "bitcoin-cash", "symbol": "bch", "name": "Bitcoin Cash"},
+        {"id": "batcat", "symbol": "btc", "name": "batcat"},
+        {"id": "bitcoin-on-base", "symbol": "btc", "name": "Bitcoin on Base"},
+    ]
+    rows += [{"id": f"token-{i}", "symbol": f"t{i}", "name": f"Token {i}"} for i in range(count - len(rows))]
+    return sorted(rows, key=lambda row: row["id"])
+
+
+def synthesize(directory=FIXTURES_DIR, coin_id=COIN_ID, vs_currency=VS_CURRENCY, days=DAYS, seed=1989):
+    """تولید فیکسچرهای هم‌شکل با پاسخ API از یک seed ثابت"""
+    rng = np.random.default_rng(seed)
+    for d in days:
+        save_fixture(market_chart_name(coin_id, vs_currency, d), _synthetic_market_chart(d, rng), directory)
+    save_fixture(coin_name(coin_id), {
+        "id": coin_id,
+        "symbol": "btc",
+        "name": "Bitcoin",
+        "market_cap_rank": 1,
+        "market_data": {"market_cap": {vs_currency: 1_190_000_000_000}},
+    }, directory)
+    markets = _synthetic_markets(vs_currency, rng)
+    save_fixture(markets_name(vs_currency), markets, directory)
+    save_fixture(COIN_LIST_NAME, _synthetic_coin_list(markets), directory)
+    save_fixture(FEAR_GREED_NAME, {
+        "name": "Fear and Greed Index",
+        "data": [{"value": "44", "value_classification": "Fear", "timestamp": str(SYNTHETIC_END_MS // 1000)}],
+    }, directory)
+    _save_manifest("synthetic", directory)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ضبط یا تولید فیکسچرهای بنچمارک")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--record", action="store_true", help="ضبط از API واقعی (نیاز به شبکه)")
+    group.add_argument("--synthetic", action="store_true", help="تولید قطعی بدون شبکه")
+    parser.add_argument("--directory", default=FIXTURES_DIR)
+    args = parser.parse_args(argv)
+
+    if args.record:
+        record(args.directory)
+    else:
+        synthesize(args.directory)
+    print(f"فیکسچرها در {args.directory} ذخیره شدند.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""آزمون بار: اجرای هم‌زمان N جلسه‌ی شبیه‌سازی‌شده‌ی داشبورد (ورود + تحلیل تک‌ارز) روی سرور آزمایشی محلی
+
+python -m benchmarks.load --sessions 100 --concurrency 20
+python -m benchmarks.load --latency 0.3 --upstream-rate 30 --throttle-ratio 0.05 --json load.json
+
+همه‌ی جلسه‌ها در یک پروسه اجرا می‌شوند و مانند یک نمونه‌ی مستقر، کش پاسخ‌ها، ذخیره‌ی تاریخچه،
+مخزن نتایج و محدودکننده‌ی نرخ را به اشتراک می‌گذارند. AppTest استریملیت یک Runtime سراسری دارد و
+اجرای هم‌زمان آن در نخ‌ها ممکن نیست، پس مسیر داشبورد مستقیماً از crypto_core اجرا می‌شود
+(همان get_auth_service، get_coin_index و load_or_run که crypto_analyst.py صدا می‌زند).
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import numpy as np
+
+from crypto_core import auth, cache, coin_index, history, precompute
+from crypto_core.auth import DEFAULT_PASSWORD, get_auth_service
+from crypto_core.coin_index import get_coin_index
+from crypto_core.fetcher import DataFetcher
+from crypto_core.metrics import get_metrics
+from crypto_core.precompute import load_or_run
+from crypto_core.transport import DEFAULT_CALLS_PER_MINUTE, set_rate_limit
+
+from . import fixtures
+from .stub_server import StubServer
+
+# ==================== تنظیمات ====================
+DEFAULT_SESSIONS = 50
+DEFAULT_CONCURRENCY = 10
+DEFAULT_COINS = "bitcoin,ethereum,solana,coin-2,coin-3"
+DEFAULT_LATENCY = 0.08  # تأخیر تقریبی CoinGecko از سرورهای اروپا
+DEFAULT_JITTER = 0.04
+COINGECKO_CALLS_PER_MINUTE = DEFAULT_CALLS_PER_MINUTE["api.coingecko.com"]
+PERCENTILES = (50, 95, 99)
+PHASES = ("login", "analysis", "session")
+
+
+# ==================== جلسه‌ی شبیه‌سازی‌شده ====================
+def run_session(session_id, coins, vs_currency, days, analyses, think_time=0.0, start_delay=0.0, hot_keys=()):
+    """ورود با رمز، سپس analyses بار تحلیل تک‌ارز مانند main_dashboard؛ خروجی خلاصه‌ی جلسه"""
+    time.sleep(start_delay)
+    metrics = get_metrics()
+    service = get_auth_service()
+    outcome = {"session": session_id, "ok": True, "error": "", "login": None, "analysis": [],
+               "cached": 0, "calls": 0, "statuses": Counter(), "retries": 0}
+    started = time.perf_counter()
+    with metrics.run("load.session", session=session_id) as run:
+        # ورود: بررسی قفل، bcrypt در Pool سرویس و صدور توکن
+        login_started = time.perf_counter()
+        if service.lockout.locked_for(service.username) or \
+                not service.verify_password_async(service.username, DEFAULT_PASSWORD).result():
+            outcome.update(ok=False, error="ورود ناموفق")
+        else:
+            service.lockout.reset(service.username)
+            token = service.issue_token(service.username)
+        outcome["login"] = time.perf_counter() - login_started
+
+        for k in range(analyses if outcome["ok"] else 0):
+            if k and think_time:
+                time.sleep(think_time)
+            coin_id = coins[(session_id + k) % len(coins)]
+            analysis_started = time.perf_counter()
+            # هر rerun داشبورد توکن را بررسی و شناسه را با نمایه‌ی محلی اعتبارسنجی می‌کند
+            service.verify_token(token)
+            coin_index = get_coin_index()
+            if coin_index is not None and coin_id not in coin_index:
+                outcome.update(ok=False, error=f"شناسه‌ی ناشناخته: {coin_id}")
+                break
+            fetcher = DataFetcher()
+            pipeline, cached_age = load_or_run(fetcher, coin_id, vs_currency, days, hot_keys=hot_keys)
+            outcome["analysis"].append(time.perf_counter() - analysis_started)
+            outcome["cached"] += cached_age is not None
+            if pipeline["df"] is None or pipeline["df"].empty:
+                errors = [message for level, message in fetcher.messages if level in ("error", "warning")]
+                outcome.update(ok=False, error=errors[-1] if errors else "داده‌ای دریافت نشد")
+                break
+
+    outcome["session_time"] = time.perf_counter() - started
+    # فقط درخواست‌هایی که واقعاً به سرور رفته‌اند ثبت می‌شوند (نه پاسخ‌های کش)
+    for call in run["calls"]:
+        outcome["calls"] += 1
+        outcome["statuses"][str(call["status"])] += 1
+        outcome["retries"] += call["retries"]
+    return outcome
+
+
+# ==================== اجرای آزمون ====================
+@contextlib.contextmanager
+def _isolated_workspace(root, stub):
+    """ذخیره‌ها در پوشه‌ی موقت تا آزمون از حالت سرد شروع شود و داده‌ی واقعی را تغییر ندهد
+
+    نمونه‌های مشترک (get_*) مسیرها را فقط بار اول از محیط می‌خوانند، پس نمونه‌های تازه با مسیرهای
+    موقت مستقیماً جایگزین می‌شوند. محیط و نمونه‌های قبلی فراخواننده پس از پایان بازگردانده می‌شوند.
+    """
+    environment = {
+        "COINGECKO_BASE_URL": stub.coingecko_url,
+        "FEAR_GREED_URL": stub.fear_greed_url,
+        "PRICE_HISTORY_DB": os.path.join(root, "history.sqlite3"),
+        "PRECOMPUTE_DB": os.path.join(root, "precomputed.sqlite3"),
+        "AUTH_DB_PATH": os.path.join(root, "auth.sqlite3"),
+        "COIN_INDEX_PATH": os.path.join(root, "coin_list.json.gz"),
+        "PRECOMPUTE_IN_PROCESS": "0",
+    }
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(mock.patch.dict(os.environ, environment))
+        # جلسه‌ها با رمز پیش‌فرض وارد می‌شوند
+        os.environ.pop("APP_USERNAME", None)
+        os.environ.pop("APP_PASSWORD_HASH", None)
+        shared = [
+            # هش رمز پیش‌فرض همین‌جا و پیش از شروع زمان‌سنجی ساخته می‌شود
+            (auth, "_shared_service", auth.AuthService(lockout=auth.LockoutStore(environment["AUTH_DB_PATH"]))),
+            (cache, "_shared_cache", cache.ResponseCache()),
+            (coin_index, "_shared_directory", coin_index.CoinDirectory(environment["COIN_INDEX_PATH"])),
+            (history, "_default_store", history.HistoryStore(environment["PRICE_HISTORY_DB"])),
+            (precompute, "_shared_store", precompute.ResultStore(environment["PRECOMPUTE_DB"])),
+        ]
+        for module, name, instance in shared:
+            stack.enter_context(mock.patch.object(module, name, instance))
+        yield
+
+
+def _percentiles(values):
+    if not values:
+        return {f"p{p}_ms": None for p in PERCENTILES} | {"max_ms": None}
+    ms = np.asarray(values) * 1000
+    summary = {f"p{p}_ms": round(float(np.percentile(ms, p)), 1) for p in PERCENTILES}
+    summary["max_ms"] = round(float(ms.max()), 1)
+    return summary
+
+
+def summarize(outcomes, wall, cpu, stub):
+    sessions = len(outcomes)
+    ok = [outcome for outcome in outcomes if outcome["ok"]]
+    analyses = sum(len(outcome["analysis"]) for outcome in outcomes)
+    statuses = sum((outcome["statuses"] for outcome in outcomes), Counter())
+    return {
+        "sessions": sessions,
+        "ok": len(ok),
+        "failed": sessions - len(ok),
+        "errors": dict(Counter(outcome["error"] for outcome in outcomes if not outcome["ok"])),
+        "wall_s": round(wall, 2),
+        "cpu_s": round(cpu, 2),
+        "cpu_utilization": round(cpu / wall, 2) if wall else None,
+        "throughput": {
+            "sessions_per_s": round(len(ok) / wall, 2) if wall else None,
+            "analyses_per_s": round(analyses / wall, 2) if wall else None,
+        },
+        "latency": {
+            "login": _percentiles([outcome["login"] for outcome in outcomes if outcome["login"] is not None]),
+            "analysis": _percentiles([value for outcome in outcomes for value in outcome["analysis"]]),
+            "session": _percentiles([outcome["session_time"] for outcome in ok]),
+        },
+        "result_store_hits": sum(outcome["cached"] for outcome in outcomes),
+        "upstream": {
+            "requests": stub.requests,
+            "per_session": round(stub.requests / sessions, 2) if sessions else None,
+            "throttled_429": stub.throttled,
+            "client_retries": sum(outcome["retries"] for outcome in outcomes),
+            "client_statuses": dict(statuses),
+            "endpoints": dict(stub.endpoints),
+        },
+    }
+
+
+def run_load(sessions=DEFAULT_SESSIONS, concurrency=DEFAULT_CONCURRENCY, coins=DEFAULT_COINS.split(","),
+             vs_currency=fixtures.VS_CURRENCY, days=30, analyses=1, think_time=0.0, ramp=0.0,
+             latency=DEFAULT_LATENCY, jitter=DEFAULT_JITTER, upstream_rate=COINGECKO_CALLS_PER_MINUTE,
+             throttle_ratio=0.0, client_rate=COINGECKO_CALLS_PER_MINUTE, use_result_store=True,
+             directory=fixtures.FIXTURES_DIR):
+    """اجرای کامل آزمون بار؛ upstream_rate و client_rate بر حسب درخواست در دقیقه (۰ یعنی نامحدود)"""
+    stub = StubServer(directory, latency=latency, jitter=jitter, rate_limit=upstream_rate or None,
+                      throttle_ratio=throttle_ratio, serve_any_coin=True)
+    with stub, tempfile.TemporaryDirectory() as root, _isolated_workspace(root, stub):
+        # محدودکننده‌ی سمت برنامه همان سهمیه‌ای است که در استقرار برای CoinGecko اعمال می‌شود
+        if client_rate:
+            set_rate_limit(stub.netloc, client_rate)
+        else:
+            set_rate_limit(stub.netloc, 10 ** 9, burst=10 ** 6)
+        # با مخزن نتایج، ارزهای آزمون مانند HOT_COINS زمان‌بندشده رفتار می‌کنند
+        hot_keys = {(coin_id, vs_currency, days) for coin_id in coins} if use_result_store else set()
+        wall_started, cpu_started = time.perf_counter(), time.process_time()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = [
+                pool.submit(run_session, i, coins, vs_currency, days, analyses, think_time,
+                            ramp * i / sessions if ramp else 0.0, hot_keys)
+                for i in range(sessions)
+            ]
+            outcomes = []
+            for future in futures:
+                outcomes.append(future.result())
+                print(f"\r  {len(outcomes)}/{sessions} جلسه", end="", file=sys.stderr)
+            print(file=sys.stderr)
+        wall = time.perf_counter() - wall_started
+        cpu = time.process_time() - cpu_started
+
+        report = summarize(outcomes, wall, cpu, stub)
+    report["config"] = {
+        "sessions": sessions, "concurrency": concurrency, "coins": list(coins), "vs_currency": vs_currency,
+        "days": days, "analyses": analyses, "think_time": think_time, "ramp": ramp, "latency": latency,
+        "jitter": jitter, "upstream_rate": upstream_rate, "throttle_ratio": throttle_ratio,
+        "client_rate": client_rate, "result_store": use_result_store,
+    }
+    return report
+
+
+def format_report(report):
+    upstream = report["upstream"]
+    lines = [
+        f"جلسه‌ها: {report['sessions']} (موفق {report['ok']}، ناموفق {report['failed']}) "
+        f"در {report['wall_s']} ثانیه",
+        f"توان عملیاتی: {report['throughput']['sessions_per_s']} جلسه/ثانیه، "
+        f"{report['throughput']['analyses_per_s']} تحلیل/ثانیه",
+        f"CPU: {report['cpu_s']} ثانیه ({report['cpu_utilization']} هسته به طور میانگین)",
+        "",
+        f"{'مرحله':<10} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10} {'max (ms)':>10}",
+    ]
+    for phase in PHASES:
+        row = report["latency"][phase]
+        cells = " ".join(f"{'-' if row[key] is None else row[key]:>10}" for key in ("p50_ms", "p95_ms", "p99_ms", "max_ms"))
+        lines.append(f"{phase:<10} {cells}")
+    lines += [
+        "",
+        f"درخواست‌های بیرونی: {upstream['requests']} ({upstream['per_session']} در هر جلسه)، "
+        f"429: {upstream['throttled_429']}، تلاش مجدد: {upstream['client_retries']}",
+        f"نتایج از مخزن مشترک: {report['result_store_hits']}",
+    ]
+    for endpoint, count in sorted(upstream["endpoints"].items(), key=lambda item: -item[1]):
+        lines.append(f"  {endpoint:<34} {count:>6}")
+    for error, count in report["errors"].items():
+        lines.append(f"  خطا در {count} جلسه: {error}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="آزمون بار جلسه‌های هم‌زمان داشبورد روی سرور آزمایشی محلی")
+    parser.add_argument("--sessions", type=int, default=DEFAULT_SESSIONS)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="جلسه‌های هم‌زمان")
+    parser.add_argument("--coins", default=DEFAULT_COINS, help="شناسه‌های ارز که بین جلسه‌ها چرخانده می‌شوند")
+    parser.add_argument("--vs-currency", default=fixtures.VS_CURRENCY)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--analyses", type=int, default=1, help="تعداد تحلیل در هر جلسه")
+    parser.add_argument("--think-time", type=float, default=0.0, help="مکث بین تحلیل‌های یک جلسه (ثانیه)")
+    parser.add_argument("--ramp", type=float, default=0.0, help="پخش شروع جلسه‌ها در این بازه (ثانیه)")
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY, help="تأخیر پایه‌ی هر پاسخ (ثانیه)")
+    parser.add_argument("--jitter", type=float, default=DEFAULT_JITTER, help="تأخیر تصادفی اضافه (ثانیه)")
+    parser.add_argument("--upstream-rate", type=int, default=COINGECKO_CALLS_PER_MINUTE,
+                        help="سهمیه‌ی سرور آزمایشی در دقیقه؛ بیش از آن 429 (۰ یعنی نامحدود)")
+    parser.add_argument("--throttle-ratio", type=float, default=0.0, help="احتمال 429 تصادفی هر درخواست")
+    parser.add_argument("--client-rate", type=int, default=COINGECKO_CALLS_PER_MINUTE,
+                        help="محدودکننده‌ی نرخ سمت برنامه در دقیقه (۰ یعنی نامحدود)")
+    parser.add_argument("--no-result-store", action="store_true",
+                        help="بدون استفاده از نتایج ذخیره‌شده‌ی جلسه‌های دیگر")
+    parser.add_argument("--fixtures", default=fixtures.FIXTURES_DIR)
+    parser.add_argument("--json", help="مسیر فایل JSON گزارش")
+    args = parser.parse_args(argv)
+
+    coins = [coin.strip().lower() for coin in args.coins.split(",") if coin.strip()]
+    report = run_load(args.sessions, args.concurrency, coins, args.vs_currency, args.days, args.analyses,
+                      args.think_time, args.ramp, args.latency, args.jitter, args.upstream_rate,
+                      args.throttle_ratio, args.client_rate, not args.no_result_store, args.fixtures)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, ensure_ascii=False, indent=2)
+    print(format_report(report))
+    return 0 if not report["failed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
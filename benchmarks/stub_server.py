@@ -0,0 +1,239 @@
+"""سرور HTTP محلی که پاسخ‌های ضبط‌شده را به جای CoinGecko و alternative.me برمی‌گرداند"""
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from crypto_core.metrics import endpoint_label
+from crypto_core.transport import TokenBucket
+
+from . import fixtures
+
+MARKET_CHART_RE = re.compile(r"^/api/v3/coins/([^/]+)/market_chart$")
+MARKET_CHART_RANGE_RE = re.compile(r"^/api/v3/coins/([^/]+)/market_chart/range$")
+MARKETS_RE = re.compile(r"^/api/v3/coins/markets$")
+COIN_LIST_RE = re.compile(r"^/api/v3/coins/list$")
+COIN_RE = re.compile(r"^/api/v3/coins/([^/]+)$")
+FEAR_GREED_RE = re.compile(r"^/fng/?$")
+
+
+def _rebase(payload, end_ms):
+    """انتقال همه‌ی زمان‌ها طوری که آخرین نقطه end_ms باشد"""
+    last = max((points[-1][0] for points in payload.values() if points), default=end_ms)
+    offset = end_ms - last
+    return {key: [[ts + offset, value] for ts, value in points] for key, points in payload.items()}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "crypto-stub/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        stub = self.server.stub
+        parts = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        retry_after = stub.admit(parts.path)
+        stub.delay()
+        if retry_after is not None:
+            status, body = 429, b'{"status":{"error_code":429,"error_message":"rate limit exceeded"}}'
+        else:
+            status, body = stub.route(parts.path, query)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if retry_after is not None:
+            self.send_header("Retry-After", str(retry_after))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubServer:
+    """پخش فیکسچرها روی 127.0.0.1 در یک نخ پس‌زمینه
+
+    سری‌های قیمت هنگام شروع به «اکنون» منتقل می‌شوند تا ذخیره‌ی محلی آن‌ها را تازه ببیند.
+
+    برای آزمون بار:
+    - latency و jitter (ثانیه) تأخیر هر پاسخ را شبیه‌سازی می‌کنند.
+    - rate_limit (درخواست در دقیقه، مانند سهمیه‌ی CoinGecko) و throttle_ratio (احتمال 429 تصادفی)
+      پاسخ 429 همراه با Retry-After برمی‌گردانند.
+    - با serve_any_coin سری فیکسچر برای هر شناسه‌ای برگردانده می‌شود تا کلیدهای کش متفاوت باشند.
+    """
+
+    def __init__(self, directory=fixtures.FIXTURES_DIR, host="127.0.0.1", port=0, latency=0.0, jitter=0.0,
+                 rate_limit=None, throttle_ratio=0.0, retry_after=1, serve_any_coin=False, seed=1989):
+        self.directory = directory
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_ratio = throttle_ratio
+        self.retry_after = retry_after
+        self.serve_any_coin = serve_any_coin
+        self.requests = 0
+        self.throttled = 0
+        self.endpoints = Counter()  # الگوی مسیر -> تعداد درخواست
+        self.lock = threading.Lock()
+        self._bucket = TokenBucket(rate_limit) if rate_limit else None
+        self._random = random.Random(seed)
+        self._coin_id = fixtures.COIN_ID
+        self._charts = {}  # (coin_id, vs_currency, days) -> payload
+        self._markets = {}  # vs_currency -> list
+        self._encoded = {}  # همان پاسخ‌ها به صورت بایت‌های آماده
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def coingecko_url(self):
+        return f"{self.base_url}/api/v3"
+
+    @property
+    def fear_greed_url(self):
+        return f"{self.base_url}/fng/"
+
+    @property
+    def netloc(self):
+        return f"{self.host}:{self.port}"
+
+    def _load(self):
+        manifest = fixtures.load_manifest(self.directory)
+        coin_id = self._coin_id = manifest.get("coin_id", fixtures.COIN_ID)
+        vs_currency = manifest.get("vs_currency", fixtures.VS_CURRENCY)
+        now_ms = int(time.time() * 1000)
+        for days in manifest.get("days", fixtures.DAYS):
+            payload = fixtures.load_fixture(fixtures.market_chart_name(coin_id, vs_currency, days), self.directory)
+            if payload is not None:
+                self._charts[(coin_id, vs_currency, str(days))] = _rebase(payload, now_ms)
+        if not self._charts:
+            raise FileNotFoundError(f"هیچ فیکسچری در {self.directory} یافت نشد؛ ابتدا python -m benchmarks.fixtures را اجرا کنید.")
+
+        for key, payload in self._charts.items():
+            self._encoded[("chart",) + key] = json.dumps(payload).encode()
+        coin = fixtures.load_fixture(fixtures.coin_name(coin_id), self.directory)
+        if coin is not None:
+            self._encoded[("coin", coin_id)] = json.dumps(coin).encode()
+        markets = fixtures.load_fixture(fixtures.markets_name(vs_currency), self.directory)
+        if markets is not None:
+            self._markets[vs_currency] = markets
+        coin_list = fixtures.load_fixture(fixtures.COIN_LIST_NAME, self.directory)
+        if coin_list is not None:
+            self._encoded[("coin_list",)] = json.dumps(coin_list).encode()
+        fear_greed = fixtures.load_fixture(fixtures.FEAR_GREED_NAME, self.directory)
+        if fear_greed is not None:
+            self._encoded[("fng",)] = json.dumps(fear_greed).encode()
+
+    def admit(self, path):
+        """شمارش درخواست و تصمیم سهمیه؛ خروجی None یا ثانیه‌های Retry-After برای پاسخ 429"""
+        with self.lock:
+            self.requests += 1
+            self.endpoints[endpoint_label(path)[1]] += 1
+            retry_after = None
+            if self._bucket is not None:
+                wait = self._bucket.try_acquire()
+                if wait > 0:
+                    retry_after = max(1, math.ceil(wait))
+            if retry_after is None and self.throttle_ratio and self._random.random() < self.throttle_ratio:
+                retry_after = self.retry_after
+            if retry_after is not None:
+                self.throttled += 1
+            return retry_after
+
+    def delay(self):
+        """تأخیر شبیه‌سازی‌شده‌ی شبکه و پردازش سرور"""
+        if self.latency or self.jitter:
+            with self.lock:
+                seconds = self.latency + self._random.uniform(0, self.jitter)
+            time.sleep(seconds)
+
+    def _coin(self, coin_id):
+        """شناسه‌ی فیکسچر برای شناسه‌های ناشناخته وقتی serve_any_coin فعال است"""
+        return self._coin_id if self.serve_any_coin else coin_id
+
+    def route(self, path, query):
+        """(کد وضعیت، بدنه) برای یک درخواست"""
+        match = MARKET_CHART_RE.match(path)
+        if match:
+            key = ("chart", self._coin(match.group(1)), query.get("vs_currency", "usd"), query.get("days"))
+            return self._respond(self._encoded.get(key))
+
+        match = MARKET_CHART_RANGE_RE.match(path)
+        if match:
+            return self._respond(self._range(self._coin(match.group(1)), query))
+
+        if MARKETS_RE.match(path):
+            return self._respond(self._markets_page(query))
+
+        if COIN_LIST_RE.match(path):
+            return self._respond(self._encoded.get(("coin_list",)))
+
+        match = COIN_RE.match(path)
+        if match:
+            return self._respond(self._encoded.get(("coin", self._coin(match.group(1)))))
+
+        if FEAR_GREED_RE.match(path):
+            return self._respond(self._encoded.get(("fng",)))
+        return self._respond(None)
+
+    def _range(self, coin_id, query):
+        """برش بازه‌ی from/to از ریزدانه‌ترین سری‌ای که آن را پوشش می‌دهد"""
+        vs_currency = query.get("vs_currency", "usd")
+        start_ms = int(float(query.get("from", 0)) * 1000)
+        end_ms = int(float(query.get("to", time.time())) * 1000)
+        candidates = sorted(
+            (int(days), payload) for (coin, vs, days), payload in self._charts.items()
+            if coin == coin_id and vs == vs_currency
+        )
+        for _, payload in candidates:
+            if payload["prices"] and payload["prices"][0][0] <= start_ms:
+                return json.dumps({
+                    key: [point for point in points if start_ms <= point[0] <= end_ms]
+                    for key, points in payload.items()
+                }).encode()
+        return None
+
+    def _markets_page(self, query):
+        """یک صفحه از لیست /coins/markets (per_page و page مانند API)"""
+        markets = self._markets.get(query.get("vs_currency", "usd"))
+        if markets is None:
+            return None
+        per_page = int(query.get("per_page", 100))
+        page = int(query.get("page", 1))
+        return json.dumps(markets[(page - 1) * per_page:page * per_page]).encode()
+
+    @staticmethod
+    def _respond(body):
+        if body is None:
+            return 404, b'{"error":"coin not found"}'
+        return 200, body
+
+    def start(self):
+        self._load()
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.stub = self
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="stub-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
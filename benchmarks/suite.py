@@ -0,0 +1,273 @@
+"""اجرای بنچمارک‌ها، گزارش زمان و اوج حافظه و مقایسه با خط پایه‌ی ذخیره‌شده
+
+python -m benchmarks                    # اجرا و مقایسه با benchmarks/baseline.json
+python -m benchmarks --save-baseline    # ذخیره‌ی نتایج فعلی به عنوان خط پایه
+"""
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from crypto_core.alerts import AlertEngine
+from crypto_core.analysis import TechnicalAnalyzer
+from crypto_core.cache import ResponseCache
+from crypto_core.coin_index import CoinIndex
+from crypto_core.columnar import parse_market_chart, to_frame
+from crypto_core.fetcher import DataFetcher
+from crypto_core.history import HistoryStore
+from crypto_core.pipeline import AnalysisPipeline
+from crypto_core.screener import MarketScreener
+from crypto_core.timeframes import MultiTimeframeAnalyzer
+from crypto_core.transport import set_rate_limit
+
+from . import fixtures
+from .stub_server import StubServer
+
+# ==================== تنظیمات ====================
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_REPEAT = 7
+DEFAULT_TIME_TOLERANCE = 0.25  # کندتر شدن بیش از ۲۵٪ پسرفت حساب می‌شود
+DEFAULT_MEMORY_TOLERANCE = 0.10
+MIN_TIME_DELTA_MS = 1.0  # اختلاف‌های کوچک‌تر از این نویز اندازه‌گیری‌اند
+
+
+ALERT_RULES = [
+    {"type": "signal", "signal": signal} for signal in ("strong_buy", "buy", "neutral", "sell", "strong_sell")
+] + [
+    {"type": "rsi_cross", "level": 30}, {"type": "rsi_cross", "level": 70, "direction": "up"},
+    {"type": "rsi_cross", "level": 50, "direction": "down"},
+    {"type": "golden_cross"}, {"type": "golden_cross", "direction": "down"},
+]
+
+
+# ==================== اندازه‌گیری ====================
+def measure(run, setup=None, repeat=DEFAULT_REPEAT):
+    """زمان (میانه و کمینه) و اوج حافظه‌ی run؛ setup در هر تکرار خارج از زمان‌سنجی اجرا می‌شود"""
+    def prepared():
+        return setup() if setup else None
+
+    run(prepared())  # گرم کردن
+    timings = []
+    for _ in range(repeat):
+        state = prepared()
+        started = time.perf_counter()
+        run(state)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    # tracemalloc اجرا را کند می‌کند، پس حافظه در یک اجرای جداگانه سنجیده می‌شود
+    state = prepared()
+    tracemalloc.start()
+    try:
+        run(state)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "time_ms": round(statistics.median(timings), 3),
+        "min_ms": round(min(timings), 3),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+class _Workspace:
+    """ذخیره‌ی محلی و کش تازه برای هر تکرار تا همه‌ی اجراها سرد باشند"""
+
+    def __init__(self, root, stub):
+        self.root = root
+        self.stub = stub
+        self.counter = 0
+
+    def fetcher(self):
+        self.counter += 1
+        fetcher = DataFetcher()
+        fetcher.base_url = self.stub.coingecko_url
+        fetcher.fear_greed_url = self.stub.fear_greed_url
+        fetcher.history = HistoryStore(os.path.join(self.root, f"history-{self.counter}.sqlite3"))
+        fetcher.cache = ResponseCache()
+        return fetcher
+
+
+def build_suite(workspace, coin_id, vs_currency, days_list):
+    """لیست (نام، run، setup) همه‌ی بنچمارک‌ها"""
+    benchmarks = []
+    for days in days_list:
+        raw = json.dumps(fixtures.load_fixture(fixtures.market_chart_name(coin_id, vs_currency, days),
+                                               workspace.stub.directory)).encode()
+        benchmarks.append((
+            f"parse_{days}d",
+            lambda raw: to_frame(parse_market_chart(raw)),
+            lambda raw=raw: raw,
+        ))
+
+        benchmarks.append((
+            f"fetch_parse_{days}d",
+            lambda fetcher, days=days: fetcher.get_coin_data(coin_id, vs_currency, days),
+            workspace.fetcher,
+        ))
+
+        frame = workspace.fetcher().get_coin_data(coin_id, vs_currency, days)
+        if frame is None:
+            raise RuntimeError(f"دریافت سری {days} روزه از سرور آزمایشی ممکن نشد.")
+        benchmarks.append((
+            f"analyze_{days}d",
+            TechnicalAnalyzer.analyze,
+            lambda frame=frame: frame[["price", "volume"]].copy(),
+        ))
+
+        benchmarks.append((
+            f"timeframes_{days}d",
+            MultiTimeframeAnalyzer.analyze,
+            lambda frame=frame: frame[["price", "volume"]].copy(),
+        ))
+
+        def bootstrapped_engine(frame=frame, days=days):
+            """موتوری که همه‌ی سری به جز نقطه‌ی آخر را دیده است؛ run فقط نقطه‌ی جدید را ارزیابی می‌کند"""
+            key = (coin_id, vs_currency, days)
+            engine = AlertEngine([{**rule, "coin_id": coin_id, "vs_currency": vs_currency, "days": days}
+                                  for rule in ALERT_RULES], sinks=[])
+            engine.feed(key, frame.iloc[:-1])
+            return engine, key, frame
+
+        benchmarks.append((
+            f"alerts_tick_{days}d",
+            lambda state: state[0].feed(state[1], state[2]),
+            bootstrapped_engine,
+        ))
+
+        benchmarks.append((
+            f"end_to_end_{days}d",
+            lambda fetcher, days=days: AnalysisPipeline.run(fetcher, coin_id, vs_currency, days),
+            workspace.fetcher,
+        ))
+
+    markets = fixtures.load_fixture(fixtures.markets_name(vs_currency), workspace.stub.directory)
+    if markets is not None:
+        benchmarks.append((
+            f"screen_{len(markets)}",
+            MarketScreener.compute,
+            lambda: markets,
+        ))
+        benchmarks.append((
+            f"fetch_screen_{len(markets)}",
+            lambda fetcher: MarketScreener.compute(MarketScreener.fetch(fetcher, vs_currency, len(markets))),
+            workspace.fetcher,
+        ))
+
+    coin_list = fixtures.load_fixture(fixtures.COIN_LIST_NAME, workspace.stub.directory)
+    if coin_list is not None:
+        benchmarks.append(("coin_index_build", CoinIndex, lambda: coin_list))
+        index = CoinIndex(coin_list)
+        queries = ["btc", "bitcoin", "bitc", "bitcon", "etherium", "xyzzy"]
+        benchmarks.append((
+            "coin_index_search",
+            lambda queries: [index.search(query) for query in queries],
+            lambda: queries,
+        ))
+    return benchmarks
+
+
+def run_suite(repeat=DEFAULT_REPEAT, pattern="*", directory=fixtures.FIXTURES_DIR):
+    """اجرای همه‌ی بنچمارک‌های منطبق با pattern روی سرور آزمایشی محلی"""
+    manifest = fixtures.load_manifest(directory)
+    coin_id = manifest.get("coin_id", fixtures.COIN_ID)
+    vs_currency = manifest.get("vs_currency", fixtures.VS_CURRENCY)
+    days_list = manifest.get("days", fixtures.DAYS)
+
+    results = {}
+    with StubServer(directory) as stub, tempfile.TemporaryDirectory() as root:
+        # سرور محلی نباید با سهمیه‌ی API واقعی محدود شود
+        set_rate_limit(stub.netloc, 10 ** 9, burst=10 ** 6)
+        workspace = _Workspace(root, stub)
+        for name, run, setup in build_suite(workspace, coin_id, vs_currency, days_list):
+            if fnmatch.fnmatch(name, pattern):
+                results[name] = measure(run, setup, repeat)
+                print(f"  {name:<22} {results[name]['time_ms']:>10.2f} ms {results[name]['peak_kib']:>10.1f} KiB",
+                      file=sys.stderr)
+    return {
+        "fixtures": manifest.get("source", "unknown"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+# ==================== مقایسه با خط پایه ====================
+def compare(current, baseline, time_tolerance=DEFAULT_TIME_TOLERANCE,
+            memory_tolerance=DEFAULT_MEMORY_TOLERANCE, min_delta_ms=MIN_TIME_DELTA_MS):
+    """ردیف‌های مقایسه؛ status یکی از ok، faster، regression یا new است"""
+    rows = []
+    for name, result in current["results"].items():
+        reference = baseline.get("results", {}).get(name)
+        if reference is None:
+            rows.append({"name": name, **result, "time_ratio": None, "memory_ratio": None, "status": "new"})
+            continue
+        time_ratio = result["time_ms"] / reference["time_ms"] if reference["time_ms"] else 1.0
+        memory_ratio = result["peak_kib"] / reference["peak_kib"] if reference["peak_kib"] else 1.0
+        slower = (time_ratio > 1 + time_tolerance
+                  and result["time_ms"] - reference["time_ms"] > min_delta_ms)
+        if slower or memory_ratio > 1 + memory_tolerance:
+            status = "regression"
+        elif time_ratio < 1 - time_tolerance:
+            status = "faster"
+        else:
+            status = "ok"
+        rows.append({"name": name, **result, "time_ratio": round(time_ratio, 3),
+                     "memory_ratio": round(memory_ratio, 3), "status": status})
+    return rows
+
+
+def format_report(rows):
+    lines = [f"{'بنچمارک':<22} {'زمان (ms)':>10} {'نسبت':>7} {'حافظه (KiB)':>12} {'نسبت':>7}  وضعیت"]
+    for row in rows:
+        time_ratio = f"{row['time_ratio']:.2f}x" if row["time_ratio"] is not None else "-"
+        memory_ratio = f"{row['memory_ratio']:.2f}x" if row["memory_ratio"] is not None else "-"
+        lines.append(f"{row['name']:<22} {row['time_ms']:>10.2f} {time_ratio:>7} "
+                     f"{row['peak_kib']:>12.1f} {memory_ratio:>7}  {row['status']}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="بنچمارک مسیر دریافت، پردازش و تحلیل")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--only", default="*", help="الگوی نام بنچمارک‌ها (مثلاً 'analyze_*')")
+    parser.add_argument("--fixtures", default=fixtures.FIXTURES_DIR)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="ذخیره‌ی نتایج به عنوان خط پایه")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TIME_TOLERANCE)
+    parser.add_argument("--memory-tolerance", type=float, default=DEFAULT_MEMORY_TOLERANCE)
+    parser.add_argument("--json", help="مسیر فایل JSON نتایج")
+    args = parser.parse_args(argv)
+
+    current = run_suite(args.repeat, args.only, args.fixtures)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(current, fh, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as fh:
+            json.dump(current, fh, indent=2)
+            fh.write("\n")
+        print(f"خط پایه در {args.baseline} ذخیره شد.")
+        return 0
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+    if baseline.get("fixtures") not in (None, current["fixtures"]):
+        print("⚠️ خط پایه با فیکسچرهای دیگری ساخته شده است؛ مقایسه معتبر نیست.", file=sys.stderr)
+
+    rows = compare(current, baseline, args.tolerance, args.memory_tolerance)
+    print(format_report(rows))
+    regressions = [row["name"] for row in rows if row["status"] == "regression"]
+    if regressions:
+        print(f"❌ پسرفت در: {', '.join(regressions)}")
+        return 1
+    return 0
@@ -1,42 +1,69 @@
 # app.py
 import streamlit as st
-import pandas as pd
-import plotly.graph_objs as go
-import requests
 import time
-import os
-import bcrypt
 from datetime import datetime, timedelta
-import ta
+
+# plotly و bcrypt فقط هنگام نیاز بارگذاری می‌شوند؛ هسته‌ی تحلیل در crypto_core بدون رابط کاربری اجرا می‌شود
+from crypto_core.alerts import DIRECTIONS, RULE_TYPES, describe_rule, get_alert_engine
+from crypto_core.auth import get_auth_service
+from crypto_core.backtest import simulate
+from crypto_core.coin_index import get_coin_index, unknown_coin_message
+from crypto_core.downsample import DEFAULT_TARGET_POINTS, WEBGL_MIN_POINTS, bucket_aggregate, downsample_frame
+from crypto_core.fetcher import DataFetcher
+from crypto_core.live import get_live_poller
+from crypto_core.metrics import get_metrics, timed
+from crypto_core.pipeline import PIPELINE_STAGES, WatchlistScanner
+from crypto_core.precompute import get_precompute_scheduler, load_or_run
+from crypto_core.screener import DEFAULT_BENCHMARK, DEFAULT_TOP_N, MarketScreener
+from crypto_core.signals import DEFAULT_SIGNAL_RULES, SIGNAL_LABELS
+from crypto_core.timeframes import MultiTimeframeAnalyzer
 
 # ==================== پیکربندی اولیه ====================
-st.set_page_config(page_title="سیستم تحلیل حرفه‌ای کریپتو", layout="wide", initial_sidebar_state="collapsed")
+# st.fragment در نسخه‌های قدیمی‌تر Streamlit با نام experimental_fragment وجود دارد
+_fragment = getattr(st, "fragment", None) or st.experimental_fragment
+MAX_CANDLES_SHOWN = 500  # نمودار کندلی با تعداد زیاد کندل خوانا نیست
 
 # ==================== ماژول احراز هویت ====================
+LEGACY_SESSION_QUERY_PARAM = "session"  # توکن دیگر در آدرس نگه داشته نمی‌شود؛ فقط پاک می‌شود
+
 class Authenticator:
-    """مدیریت امن ورود کاربر"""
+    """مدیریت امن ورود کاربر
+
+    هش رمز یک بار در پروسه آماده می‌شود و bcrypt فقط هنگام ارسال فرم (در نخ جداگانه) اجرا می‌شود؛
+    پس از ورود، هر rerun فقط توکن امضاشده با HMAC در state جلسه را بررسی می‌کند (چند میکروثانیه).
+    
+    بارگذاری دوباره‌ی صفحه یا اتصال مجددی که جلسه‌ی تازه‌ای می‌سازد عمداً دوباره ورود می‌خواهد:
+    توکن بیرون از سرور (آدرس یا کوکی) نگه داشته نمی‌شود تا از تاریخچه، لینک‌ها یا لاگ‌ها نشت نکند.
+    """
     
     @staticmethod
     def initialize():
-        """بارگذاری یا تنظیم اولیه کاربر از متغیرهای محیطی"""
-        # خواندن از متغیرهای محیطی Render (ایمن‌ترین روش)
-        username = os.environ.get("APP_USERNAME", "admin")
-        password_hash = os.environ.get("APP_PASSWORD_HASH", "")
+        """بارگذاری سرویس احراز هویت و بررسی توکن جلسه‌ی فعلی"""
+        # خواندن از متغیرهای محیطی Render (ایمن‌ترین روش)؛ فقط بار اول در پروسه هزینه دارد
+        service = get_auth_service()
         
-        # اگر هش در محیط تعریف نشده، از رمز پیش‌فرض استفاده کن (فقط برای توسعه)
-        if not password_hash:
-            default_password = "admin123"
-            password_hash = bcrypt.hashpw(default_password.encode(), bcrypt.gensalt()).decode()
+        if service.uses_default_password:
             st.warning("⚠️ از رمز عبور پیش‌فرض استفاده می‌شود. لطفاً در Render متغیرهای APP_USERNAME و APP_PASSWORD_HASH را تنظیم کنید.")
         
         # ذخیره در state جلسه Streamlit
         if "auth" not in st.session_state:
             st.session_state.auth = {
-                "username": username,
-                "password_hash": password_hash,
+                "username": service.username,
                 "is_authenticated": False,
-                "login_attempts": 0
+                "token": None,
             }
+            # توکن فقط در state جلسه می‌ماند؛ توکن در آدرس از تاریخچه، لینک‌ها و لاگ پراکسی نشت می‌کند
+            if LEGACY_SESSION_QUERY_PARAM in st.query_params:
+                del st.query_params[LEGACY_SESSION_QUERY_PARAM]
+        
+        # انقضای توکن در هر rerun بررسی می‌شود (چند میکروثانیه)
+        auth_state = st.session_state.auth
+        if auth_state["is_authenticated"] and not service.verify_token(auth_state["token"]):
+            Authenticator.logout()
+    
+    @staticmethod
+    def logout():
+        st.session_state.auth.update(is_authenticated=False, token=None)
     
     @staticmethod
     def login_form():
@@ -51,250 +78,454 @@ class Authenticator:
                 submit = st.form_submit_button("ورود به سیستم", use_container_width=True)
             
             if submit:
+                service = get_auth_service()
                 auth_state = st.session_state.auth
                 
-                # بررسی تعداد دفعات تلاش ناموفق
-                if auth_state["login_attempts"] >= 3:
-                    st.error("❌ حساب به دلیل تلاش‌های ناموفق زیاد موقتاً قفل شده است. 5 دقیقه دیگر تلاش کنید.")
-                    time.sleep(0.5)
-                    st.rerun()
-                
-                # بررسی اعتبار
-                correct_username = (username == auth_state["username"])
-                correct_password = bcrypt.checkpw(password.encode(), auth_state["password_hash"].encode())
+                # بررسی قفل مشترک بین جلسه‌ها (در SQLite ذخیره می‌شود)
+                locked_for = service.lockout.locked_for(username)
+                if locked_for:
+                    st.error(f"❌ حساب به دلیل تلاش‌های ناموفق زیاد موقتاً قفل شده است. {int(locked_for // 60) + 1} دقیقه دیگر تلاش کنید.")
+                    return False
                 
-                if correct_username and correct_password:
-                    auth_state["is_authenticated"] = True
-                    auth_state["login_attempts"] = 0
+                # بررسی اعتبار خارج از نخ اسکریپت
+                if service.verify_password_async(username, password).result():
+                    service.lockout.reset(username)
+                    token = service.issue_token(username)
+                    auth_state.update(is_authenticated=True, token=token)
                     st.success("✅ ورود موفقیت‌آمیز! در حال انتقال...")
                     time.sleep(0.8)
                     st.rerun()
                 else:
-                    auth_state["login_attempts"] += 1
-                    remaining_attempts = 3 - auth_state["login_attempts"]
+                    remaining_attempts = service.lockout.register_failure(username)
                     st.error(f"❌ اطلاعات ورود نادرست است. {remaining_attempts} تلاش باقی مانده.")
                     time.sleep(1)
                     return False
         return False
 
-# ==================== ماژول دریافت داده ====================
-class DataFetcher:
-    """دریافت امن و مدیریت خطا برای داده‌های کوین‌گکو"""
-    
-    def __init__(self):
-        self.api_key = os.environ.get("COINGECKO_API_KEY", "CG-YOUR-DEMO-KEY")
-        self.base_url = "https://api.coingecko.com/api/v3"
-        self.headers = {"x-cg-demo-api-key": self.api_key} if self.api_key != "CG-YOUR-DEMO-KEY" else {}
-    
-    def _make_request(self, url, params=None, max_retries=3):
-        """تابع اصلی درخواست با قابلیت تلاش مجدد"""
-        for attempt in range(max_retries):
-            try:
-                response = requests.get(url, headers=self.headers, params=params, timeout=20)
-                
-                # بررسی خطای محدودیت نرخ (429)
-                if response.status_code == 429:
-                    wait_time = (attempt + 1) * 10  # افزایش تاخیر در هر تلاش
-                    st.warning(f"⏳ درخواست شما محدود شده است. {wait_time} ثانیه صبر کنید... (تلاش {attempt+1}/{max_retries})")
-                    time.sleep(wait_time)
-                    continue
-                
-                response.raise_for_status()  # بررسی سایر خطاهای HTTP
-                return response.json()
-                
-            except requests.exceptions.Timeout:
-                st.warning(f"⏱️ درخواست timeout شد. تلاش مجدد... ({attempt+1}/{max_retries})")
-            except requests.exceptions.ConnectionError:
-                st.warning(f"🔌 خطای اتصال. تلاش مجدد... ({attempt+1}/{max_retries})")
-                time.sleep(5)
-            except requests.exceptions.RequestException as e:
-                st.error(f"🚫 خطای شبکه: {str(e)[:100]}")
-                break
-        
-        st.error("❌ پس از چندین تلاش، دریافت داده ممکن نشد.")
-        return None
-    
-    def get_coin_data(self, coin_id, vs_currency="usd", days=30):
-        """دریافت داده‌های تاریخی قیمت و حجم"""
-        if not coin_id or not coin_id.strip():
-            st.error("لطفاً نام ارز را وارد کنید.")
-            return None
-            
-        coin_id = coin_id.strip().lower()
-        url = f"{self.base_url}/coins/{coin_id}/market_chart"
-        params = {"vs_currency": vs_currency, "days": days}
-        
-        data = self._make_request(url, params)
-        if not data:
-            return None
-        
-        try:
-            # پردازش داده‌های قیمت
-            prices = data.get("prices", [])
-            if not prices:
-                st.error("داده‌ای برای این ارز یافت نشد.")
-                return None
-                
-            df = pd.DataFrame(prices, columns=["timestamp", "price"])
-            df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
-            df.set_index("timestamp", inplace=True)
-            
-            # پردازش داده‌های حجم
-            volumes = data.get("total_volumes", [])
-            if volumes:
-                df["volume"] = [v[1] for v in volumes]
-            
-            # دریافت اطلاعات تکمیلی ارز
-            info_url = f"{self.base_url}/coins/{coin_id}"
-            info = self._make_request(info_url, params={"localization": "false"})
-            if info:
-                st.session_state["coin_info"] = {
-                    "name": info.get("name", coin_id),
-                    "symbol": info.get("symbol", "").upper(),
-                    "market_cap": info.get("market_data", {}).get("market_cap", {}).get(vs_currency, 0),
-                    "rank": info.get("market_cap_rank", "N/A")
-                }
-            
-            return df
-            
-        except Exception as e:
-            st.error(f"❌ خطا در پردازش داده‌ها: {str(e)[:200]}")
-            return None
+# ==================== نمایش پیام‌ها ====================
+def show_messages(messages):
+    """نمایش پیام‌های جمع‌آوری‌شده‌ی DataFetcher (خطا یا هشدار) در رابط کاربری"""
+    for level, message in messages:
+        if level == "error":
+            st.error(message)
+        else:
+            st.warning(message)
+
+def resolve_coin_ids(coin_index, coin_ids):
+    """شناسه‌های معتبر (نماد و نام هم پذیرفته می‌شوند)؛ ورودی‌های ناشناخته بدون درخواست API گزارش می‌شوند"""
+    if coin_index is None:
+        return coin_ids
+    known, unknown = coin_index.partition(coin_ids)
+    for text, suggestions in unknown.items():
+        st.warning(unknown_coin_message(text, suggestions))
+    return known
+
+def _format_age(seconds):
+    """سن نتیجه به صورت «۳ دقیقه و ۱۲ ثانیه»"""
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes} دقیقه و {seconds} ثانیه" if minutes else f"{seconds} ثانیه"
+
+# ==================== ماژول اسکن واچ‌لیست ====================
+def watchlist_dashboard(coin_ids, vs_currency, analysis_days):
+    """نمایش جدول اسکن واچ‌لیست که با تکمیل هر ارز به‌روزرسانی می‌شود"""
+    st.subheader(f"📋 اسکن واچ‌لیست ({len(coin_ids)} ارز)")
+    progress_bar = st.progress(0)
+    table_placeholder = st.empty()
     
-    def get_fear_greed_index(self):
-        """دریافت شاخص ترس و طمع"""
-        try:
-            url = "https://api.alternative.me/fng/"
-            data = self._make_request(url)
-            if data and "data" in data and len(data["data"]) > 0:
-                return int(data["data"][0]["value"])
-        except:
-            pass
-        return None
+    rows = []
+    for row in WatchlistScanner.scan(coin_ids, vs_currency, analysis_days):
+        rows.append(row)
+        progress_bar.progress(len(rows) / len(coin_ids), text=f"{len(rows)}/{len(coin_ids)} ارز تحلیل شد")
+        table_placeholder.dataframe(WatchlistScanner.to_table(rows), use_container_width=True, hide_index=True)
+    
+    st.success("✅ اسکن واچ‌لیست کامل شد!")
+
+# ==================== ماژول غربال بازار ====================
+SCREENER_HEATMAP_COINS = 30  # نقشه‌ی حرارتی بزرگ‌تر از این خوانا نیست
 
-# ==================== ماژول تحلیل تکنیکال ====================
-class TechnicalAnalyzer:
-    """تحلیل تکنیکال با اندیکاتورهای پیشرفته"""
+@timed("render.screener")
+def screener_dashboard(fetcher, vs_currency, top_n, benchmark):
+    """غربال ارزهای برتر از /coins/markets: جدول بازده، نوسان، RSI و همبستگی‌ها"""
+    import plotly.graph_objs as go
+    st.subheader(f"🧮 غربال {top_n} ارز برتر بازار")
+    with st.spinner("🔍 در حال دریافت لیست بازار..."):
+        markets = MarketScreener.fetch(fetcher, vs_currency, top_n)
+    show_messages(fetcher.pop_messages())
+    if not markets:
+        st.error("❌ دریافت لیست بازار ممکن نشد. کمی بعد دوباره تلاش کنید.")
+        return
     
-    @staticmethod
-    def analyze(df):
-        if df is None or len(df) < 20:
-            return {"سیگنال": "داده ناکافی", "اطمینان": 0, "جزئیات": {}}
-        
+    screen = MarketScreener.compute(markets, benchmark)
+    table = screen["table"]
+    summary = MarketScreener.summary(table)
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("تعداد ارز", summary["تعداد ارز"])
+    with col2:
+        st.metric("میانه بازده ۲۴ ساعته", f"{summary['میانه بازده ۲۴ ساعته']:.2%}")
+    with col3:
+        st.metric("اشباع خرید / فروش (RSI)", f"{summary['اشباع خرید']} / {summary['اشباع فروش']}")
+    with col4:
+        st.metric(f"میانه همبستگی با {screen['benchmark']}", f"{summary['میانه همبستگی']:.2f}")
+    
+    percent = ["بازده ۲۴ ساعته", "بازده ۷ روزه", "نوسان سالانه", "بیشترین افت"]
+    st.dataframe(table.assign(**{name: table[name] * 100 for name in percent}),
+                 use_container_width=True, hide_index=True,
+                 column_config={name: st.column_config.NumberColumn(format="%.2f%%") for name in percent})
+    st.caption(f"همبستگی‌ها بر اساس بازده ساعتی sparkline هفت‌روزه و نسبت به {screen['benchmark']} محاسبه شده‌اند.")
+    
+    # نقشه‌ی حرارتی همبستگی ارزهای برتر
+    ids = list(screen["correlation"].index[:SCREENER_HEATMAP_COINS])
+    corr = screen["correlation"].loc[ids, ids]
+    fig = go.Figure(go.Heatmap(z=corr.to_numpy(), x=ids, y=ids, zmin=-1, zmax=1, colorscale="RdBu"))
+    fig.update_layout(title="همبستگی بازده‌ها (۷ روز)", height=600, template="plotly_dark")
+    st.plotly_chart(fig, use_container_width=True)
+    
+    # همبستگی غلتان چند ارز برتر با ارز مرجع
+    fig2 = go.Figure()
+    for coin in [coin for coin in ids if coin != screen["benchmark"]][:5]:
+        fig2.add_trace(go.Scatter(x=screen["rolling"].index, y=screen["rolling"][coin], mode="lines", name=coin))
+    fig2.update_layout(title=f"همبستگی غلتان ۲۴ ساعته با {screen['benchmark']}", height=350,
+                       yaxis_range=[-1, 1], template="plotly_dark")
+    st.plotly_chart(fig2, use_container_width=True)
+
+# ==================== ماژول پایش زنده ====================
+LIVE_CHART_POINTS = 500  # نمودار زنده حداکثر همین تعداد نقطه (پس از LTTB) ارسال می‌کند
+LIVE_CHART_MIN_INTERVAL = 60  # نمودار کمتر از کارت سیگنال بازسازی می‌شود
+
+def _live_snapshot(coin_id, vs_currency, days, interval):
+    """تمدید اشتراک در پایشگر و خواندن آخرین وضعیت سری"""
+    poller = get_live_poller()
+    key = poller.subscribe(coin_id, vs_currency, days, interval)
+    return poller.snapshot(key) or poller.refresh_now(key)
+
+def live_signal_card(coin_id, vs_currency, days, interval):
+    """کارت قیمت و سیگنال یک ارز (بخش مستقل که فقط خودش بازسازی می‌شود)"""
+    snapshot = _live_snapshot(coin_id, vs_currency, days, interval)
+    st.markdown(f"#### {coin_id}")
+    if snapshot is None:
+        st.warning("⚠️ داده‌ای برای این ارز دریافت نشد.")
+        return
+    
+    result = snapshot["result"]
+    df = snapshot["df"]
+    col1, col2 = st.columns(2)
+    with col1:
+        change = (df["price"].iloc[-1] / df["price"].iloc[0] - 1) * 100
+        st.metric(f"قیمت ({vs_currency.upper()})", f"{df['price'].iloc[-1]:,.4f}", delta=f"{change:.2f}%")
+    with col2:
+        st.metric("شاخص RSI", result.get("RSI") if result.get("RSI") is not None else "N/A")
+    
+    signal = result["سیگنال"]
+    color = "#00cc66" if "خرید" in signal else "#cc0000" if "فروش" in signal else "#666666"
+    st.markdown(f"""
+    <div style="background: {color}; border-radius: 10px; padding: 10px; text-align: center; color: white;">
+        <b>{signal}</b> — اطمینان {result['اطمینان']}%
+    </div>
+    """, unsafe_allow_html=True)
+    
+    age = int(time.time() - snapshot["updated_at"])
+    status = " ⚠️ خطا در آخرین دریافت" if snapshot["error"] else ""
+    st.caption(f"آخرین داده‌ی جدید: {age} ثانیه پیش{status}")
+
+def live_price_chart(coin_id, vs_currency, days, interval):
+    """نمودار قیمت اخیر یک ارز (بخش مستقل با فاصله‌ی بازسازی طولانی‌تر)"""
+    snapshot = _live_snapshot(coin_id, vs_currency, days, interval)
+    if snapshot is None:
+        return
+    import plotly.graph_objs as go
+    df = downsample_frame(snapshot["df"], "price", target_points=LIVE_CHART_POINTS)
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=df.index, y=df['price'], mode='lines',
+                             name='قیمت', line=dict(color='#00ff88', width=1.5)))
+    fig.update_layout(height=220, margin=dict(l=10, r=10, t=10, b=10),
+                      template='plotly_dark', showlegend=False)
+    st.plotly_chart(fig, use_container_width=True)
+
+def live_dashboard(coin_ids, vs_currency, analysis_days, interval):
+    """پایش زنده‌ی چند ارز؛ داده‌ها را پایشگر پس‌زمینه می‌گیرد و فقط بخش‌ها بازسازی می‌شوند"""
+    st.subheader(f"📡 پایش زنده ({len(coin_ids)} ارز، هر {interval} ثانیه)")
+    
+    signal_card = _fragment(run_every=interval)(live_signal_card)
+    price_chart = _fragment(run_every=max(interval, LIVE_CHART_MIN_INTERVAL))(live_price_chart)
+    
+    columns = st.columns(min(3, len(coin_ids)))
+    for i, coin_id in enumerate(coin_ids):
+        with columns[i % len(columns)]:
+            with st.container(border=True):
+                signal_card(coin_id, vs_currency, analysis_days, interval)
+                price_chart(coin_id, vs_currency, analysis_days, interval)
+
+# ==================== ماژول هشدارها ====================
+CROSS_DIRECTIONS = {"up": "رو به بالا", "down": "رو به پایین", "any": "هر دو جهت"}
+
+@timed("render.alerts")
+def alerts_dashboard(coin_index, vs_currency, analysis_days):
+    """تعریف قواعد هشدار هر ارز و نمایش آخرین هشدارها؛ ارزیابی در موتور پس‌زمینه انجام می‌شود"""
+    engine = get_alert_engine()
+    st.subheader("🔔 هشدارها")
+    st.caption("موتور هشدار در پس‌زمینه فعال است." if engine.running else
+               "ارزیابی پس از افزودن اولین قاعده شروع می‌شود (یا توسط کارگر جداگانه انجام می‌شود).")
+    for error in engine.errors:
+        st.warning(f"⚠️ {error}")
+    
+    rule_type = st.selectbox("نوع قاعده", list(RULE_TYPES), format_func=RULE_TYPES.get)
+    spec = {"type": rule_type, "vs_currency": vs_currency, "days": analysis_days}
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        if rule_type != "fear_greed_below":
+            spec["coin_id"] = st.text_input("ارز (شناسه، نماد یا نام)", value="bitcoin", key="alert_coin")
+    with col2:
+        if rule_type == "signal":
+            spec["signal"] = st.selectbox("سیگنال", list(SIGNAL_LABELS), format_func=SIGNAL_LABELS.get)
+        elif rule_type == "rsi_cross":
+            spec["level"] = st.number_input("سطح RSI", 0, 100, 30, step=5)
+            spec["direction"] = st.selectbox("جهت عبور", DIRECTIONS, index=2, format_func=CROSS_DIRECTIONS.get)
+        elif rule_type == "golden_cross":
+            spec["direction"] = st.radio("نوع", ["up", "down"], horizontal=True,
+                                         format_func={"up": "کراس طلایی ⭐", "down": "کراس مرگ ☠️"}.get)
+        else:
+            spec["threshold"] = st.number_input("آستانه‌ی شاخص", 0, 100, 25)
+    with col3:
+        spec["cooldown"] = 60 * st.number_input("کمترین فاصله‌ی دو هشدار (دقیقه)", 1, 24 * 60, 60)
+    
+    if st.button("➕ افزودن قاعده"):
         try:
-            # محاسبه اندیکاتورها
-            df["rsi"] = ta.momentum.RSIIndicator(df["price"], window=14).rsi()
-            df["sma_20"] = ta.trend.SMAIndicator(df["price"], window=20).sma_indicator()
-            df["sma_50"] = ta.trend.SMAIndicator(df["price"], window=50).sma_indicator()
-            df["ema_12"] = ta.trend.EMAIndicator(df["price"], window=12).ema_indicator()
-            
-            # محاسبه مکدی
-            macd = ta.trend.MACD(df["price"])
-            df["macd"] = macd.macd()
-            df["macd_signal"] = macd.macd_signal()
-            
-            # محاسبه باندهای بولینگر
-            bollinger = ta.volatility.BollingerBands(df["price"], window=20)
-            df["bb_high"] = bollinger.bollinger_hband()
-            df["bb_low"] = bollinger.bollinger_lband()
-            
-            latest = df.iloc[-1]
-            
-            # تحلیل چند فاکتوره
-            signal_score = 0
-            reasons = []
-            
-            # تحلیل RSI
-            if pd.notna(latest["rsi"]):
-                if latest["rsi"] < 30:
-                    signal_score += 25
-                    reasons.append("RSI در منطقه اشباع فروش 📉")
-                elif latest["rsi"] > 70:
-                    signal_score -= 20
-                    reasons.append("RSI در منطقه اشباع خرید 📈")
-            
-            # تحلیل میانگین‌های متحرک
-            if pd.notna(latest["sma_20"]) and pd.notna(latest["price"]):
-                if latest["price"] > latest["sma_20"]:
-                    signal_score += 15
-                    reasons.append("قیمت بالای میانگین ۲۰ روزه 🟢")
-                else:
-                    signal_score -= 10
-                    reasons.append("قیمت زیر میانگین ۲۰ روزه 🔴")
-                
-                # کراس صعودی
-                if len(df) > 50 and pd.notna(latest["sma_50"]):
-                    if df["sma_20"].iloc[-2] < df["sma_50"].iloc[-2] and latest["sma_20"] > latest["sma_50"]:
-                        signal_score += 20
-                        reasons.append("کراس طلایی صعودی ⭐")
-            
-            # تحلیل مکدی
-            if pd.notna(latest["macd"]) and pd.notna(latest["macd_signal"]):
-                if latest["macd"] > latest["macd_signal"]:
-                    signal_score += 10
-                    reasons.append("MACD مثبت ↗️")
-            
-            # تحلیل باندهای بولینگر
-            if pd.notna(latest["bb_low"]) and pd.notna(latest["price"]):
-                if latest["price"] < latest["bb_low"]:
-                    signal_score += 15
-                    reasons.append("قیمت در کف باند بولینگر 📊")
-            
-            # تعیین سیگنال نهایی
-            if signal_score >= 40:
-                final_signal = "خرید قوی 🟢"
-                confidence = min(90, 60 + signal_score)
-            elif signal_score >= 20:
-                final_signal = "خرید متوسط 🟡"
-                confidence = 50 + signal_score
-            elif signal_score <= -20:
-                final_signal = "فروش قوی 🔴"
-                confidence = min(90, 60 - signal_score)
-            elif signal_score <= 0:
-                final_signal = "فروش متوسط 🟠"
-                confidence = 50 - signal_score
-            else:
-                final_signal = "خنثی ⚪"
-                confidence = 50
-            
-            return {
-                "سیگنال": final_signal,
-                "اطمینان": min(95, max(5, confidence)),
-                "RSI": round(latest["rsi"], 2) if pd.notna(latest["rsi"]) else None,
-                "قیمت": round(latest["price"], 4),
-                "SMA_20": round(latest["sma_20"], 4) if pd.notna(latest["sma_20"]) else None,
-                "MACD": round(latest["macd"], 4) if pd.notna(latest["macd"]) else None,
-                "دلایل": reasons[:3]  # فقط ۳ دلیل اول
-            }
-            
-        except Exception as e:
-            st.error(f"خطا در تحلیل تکنیکال: {str(e)[:100]}")
-            return {"سیگنال": "خطای تحلیل", "اطمینان": 0, "جزئیات": {}}
+            if spec.get("coin_id") and coin_index is not None:
+                resolved = coin_index.resolve(spec["coin_id"])
+                if resolved is None:
+                    raise ValueError(unknown_coin_message(spec["coin_id"], coin_index.search(spec["coin_id"], limit=3)))
+                spec["coin_id"] = resolved
+            rule = engine.add_rule(spec)
+        except ValueError as e:
+            st.error(str(e))
+        else:
+            get_alert_engine()  # شروع ارزیابی پس‌زمینه با اولین قاعده
+            st.success(f"✅ قاعده‌ی «{describe_rule(rule)}» برای {rule['coin_id'] or 'بازار'} اضافه شد.")
+    
+    rules = engine.rules()
+    if rules:
+        st.dataframe([{"شناسه": rule["id"], "ارز": rule["coin_id"] or "—", "قاعده": describe_rule(rule),
+                       "بازه (روز)": rule.get("days", "—"), "فاصله (دقیقه)": round(rule["cooldown"] / 60)}
+                      for rule in rules], use_container_width=True, hide_index=True)
+        col1, col2 = st.columns(2)
+        with col1:
+            labels = {rule["id"]: f"{rule['coin_id'] or 'بازار'} — {describe_rule(rule)}" for rule in rules}
+            to_remove = st.multiselect("حذف قاعده", list(labels), format_func=labels.get)
+            if st.button("🗑️ حذف") and to_remove:
+                for rule_id in to_remove:
+                    engine.remove_rule(rule_id)
+                st.rerun()
+        with col2:
+            if st.button("🔄 بررسی اکنون"):
+                with st.spinner("در حال بررسی قواعد..."):
+                    fired = engine.run_once()
+                st.info(f"{fired} هشدار جدید.")
+    else:
+        st.info("هنوز قاعده‌ای تعریف نشده است.")
+    
+    st.markdown("**آخرین هشدارها**")
+    recent = engine.recent()
+    if recent:
+        st.dataframe([{"زمان": f"{datetime.fromtimestamp(alert['fired_at']):%Y-%m-%d %H:%M}",
+                       "ارز": alert["coin_id"] or "—", "پیام": alert["message"]}
+                      for alert in recent], use_container_width=True, hide_index=True)
+    else:
+        st.caption("هنوز هشداری در این پروسه ثبت نشده است.")
+
+# ==================== ماژول نمودارها ====================
+def _line_trace(x, y, raw_points, **kwargs):
+    """Scattergl برای سری‌های بزرگ و Scatter برای سری‌های کوچک"""
+    import plotly.graph_objs as go
+    trace = go.Scattergl if raw_points >= WEBGL_MIN_POINTS else go.Scatter
+    return trace(x=x, y=y, mode='lines', **kwargs)
+
+@_fragment
+@timed("render.charts")
+def price_volume_charts(df, vs_currency):
+    """نمودار قیمت و حجم با کاهش نقاط در سمت سرور متناسب با بازه‌ی بزرگ‌نمایی"""
+    import plotly.graph_objs as go
+    start, end = df.index[0].to_pydatetime(), df.index[-1].to_pydatetime()
+    if len(df) > DEFAULT_TARGET_POINTS:
+        # تغییر بازه فقط همین بخش را اجرا می‌کند و جزئیات بازه‌ی انتخابی از داده‌ی خام ساخته می‌شود
+        start, end = st.slider("بازه‌ی نمایش", min_value=start, max_value=end, value=(start, end),
+                               format="YYYY-MM-DD HH:mm")
+    window = df.loc[start:end]
+    if window.empty:
+        window = df
+    
+    # نمودار قیمت
+    price = downsample_frame(window, "price")
+    fig1 = go.Figure()
+    fig1.add_trace(_line_trace(price.index, price['price'], len(window),
+                               name='قیمت', line=dict(color='#00ff88', width=2)))
+    fig1.update_layout(title='نمودار قیمت', height=400, 
+                      xaxis_title='تاریخ', yaxis_title=f'قیمت ({vs_currency.upper()})',
+                      template='plotly_dark')
+    st.plotly_chart(fig1, use_container_width=True)
+    if len(price) < len(window):
+        st.caption(f"{len(price):,} نقطه از {len(window):,} نقطه نمایش داده شده است.")
+    
+    # نمودار حجم
+    if 'volume' in window.columns:
+        x, volume = bucket_aggregate(window.index.to_numpy(), window['volume'].to_numpy(), how="max")
+        fig2 = go.Figure()
+        fig2.add_trace(go.Bar(x=x, y=volume, name='حجم معاملات',
+                             marker_color='#ffaa00'))
+        fig2.update_layout(title='حجم معاملات', height=300,
+                          xaxis_title='تاریخ', yaxis_title='حجم',
+                          template='plotly_dark')
+        st.plotly_chart(fig2, use_container_width=True)
+
+@timed("render.signal_history")
+def signal_history_section(df):
+    """نمودار تاریخچه امتیاز سیگنال و بک‌تست قواعد فعلی روی همین بازه"""
+    import plotly.graph_objs as go
+    scores = downsample_frame(df, "signal_score")
+    fig3 = go.Figure()
+    fig3.add_trace(_line_trace(scores.index, scores['signal_score'], len(df),
+                               name='امتیاز سیگنال', line=dict(color='#66ccff', width=1.5),
+                               customdata=scores['signal'], hovertemplate='%{y} — %{customdata}<extra></extra>'))
+    for threshold in ("strong_buy_threshold", "buy_threshold", "sell_threshold", "strong_sell_threshold"):
+        fig3.add_hline(y=DEFAULT_SIGNAL_RULES[threshold], line_dash='dot', line_color='#666666')
+    fig3.update_layout(title='تاریخچه امتیاز سیگنال', height=300,
+                      xaxis_title='تاریخ', yaxis_title='امتیاز',
+                      template='plotly_dark')
+    st.plotly_chart(fig3, use_container_width=True)
+    
+    # بک‌تست قواعد فعلی روی همین بازه
+    result = simulate(df["price"].to_numpy(), df["signal_score"].to_numpy())
+    st.markdown("**بک‌تست قواعد فعلی روی این بازه:**")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("بازده استراتژی", f"{result['return']:.1%}",
+                  delta=f"{result['return'] - result['buy_hold']:.1%} نسبت به نگهداری")
+    with col2:
+        st.metric("بیشترین افت", f"{result['max_drawdown']:.1%}")
+    with col3:
+        st.metric("نرخ موفقیت", f"{result['hit_rate']:.0%}" if result["hit_rate"] is not None else "N/A")
+    with col4:
+        st.metric("تعداد معاملات", result["trades"])
+
+@_fragment
+@timed("render.timeframes")
+def timeframes_section(timeframes, vs_currency):
+    """نمای هم‌جهتی بازه‌ها و نمودار کندلی بازه‌ی انتخابی (همه از همان یک بار دریافت داده)"""
+    import plotly.graph_objs as go
+    if not timeframes:
+        st.info("برای ساخت کندل‌های چند بازه‌ای داده‌ی کافی وجود ندارد.")
+        return
+    
+    confluence = MultiTimeframeAnalyzer.confluence(timeframes)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("هم‌جهتی بازه‌ها", confluence["هم‌جهتی"])
+    with col2:
+        st.metric("صعودی / نزولی / خنثی", f"{confluence['صعودی']} / {confluence['نزولی']} / {confluence['خنثی']}")
+    with col3:
+        st.metric("میانگین امتیاز", confluence["میانگین امتیاز"] if confluence["میانگین امتیاز"] is not None else "N/A")
+    st.dataframe(MultiTimeframeAnalyzer.to_table(timeframes), use_container_width=True, hide_index=True)
+    
+    name = st.radio("بازه‌ی نمودار", list(timeframes), format_func=lambda key: timeframes[key]["label"], horizontal=True)
+    candles = timeframes[name]["candles"].iloc[-MAX_CANDLES_SHOWN:]
+    fig = go.Figure()
+    fig.add_trace(go.Candlestick(x=candles.index, open=candles["open"], high=candles["high"],
+                                 low=candles["low"], close=candles["price"], name="قیمت"))
+    if "sma_20" in candles.columns:
+        fig.add_trace(go.Scatter(x=candles.index, y=candles["sma_20"], mode="lines", name="SMA 20",
+                                 line=dict(color="#ffcc00", width=1)))
+    fig.update_layout(title=f"کندل‌های {timeframes[name]['label']}", height=450, xaxis_rangeslider_visible=False,
+                      xaxis_title='تاریخ', yaxis_title=f'قیمت ({vs_currency.upper()})', template='plotly_dark')
+    st.plotly_chart(fig, use_container_width=True)
+    if len(candles) < len(timeframes[name]["candles"]):
+        st.caption(f"{len(candles):,} کندل آخر از {len(timeframes[name]['candles']):,} کندل نمایش داده شده است.")
+
+# ==================== پنل عملکرد ====================
+def metrics_panel():
+    """نمایش span مراحل و درخواست‌های API اجراهای اخیر و دانلود معیارها"""
+    metrics = get_metrics()
+    st.markdown("---")
+    st.subheader("📈 پنل عملکرد")
+    
+    runs = [run for run in metrics.runs() if run["duration"] is not None]
+    if runs:
+        labels = [f"{datetime.fromtimestamp(run['started_at']):%H:%M:%S} — {run['duration'] * 1000:,.0f} ms "
+                  f"({len(run['calls'])} درخواست)" for run in runs]
+        run = runs[st.selectbox("اجرا", range(len(runs)), format_func=labels.__getitem__)]
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("**مراحل**")
+            st.dataframe([{"مرحله": span["stage"], "ms": round(span["duration"] * 1000, 1), "خطا": span.get("error", "")}
+                          for span in run["spans"]], use_container_width=True, hide_index=True)
+        with col2:
+            st.markdown("**درخواست‌های API**")
+            st.dataframe([{"endpoint": call["endpoint"], "وضعیت": call["status"],
+                           "ms": round(call["latency"] * 1000, 1), "تلاش مجدد": call["retries"],
+                           "انتظار (s)": round(call["sleep"], 2), "KB": round(call["bytes"] / 1024, 1)}
+                          for call in run["calls"]], use_container_width=True, hide_index=True)
+    
+    st.markdown("**خلاصه‌ی همه‌ی اجراها (p50/p95)**")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.dataframe(metrics.stage_summary(), use_container_width=True, hide_index=True)
+    with col2:
+        st.dataframe(metrics.call_summary(), use_container_width=True, hide_index=True)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("⬇️ Prometheus", metrics.prometheus_text(), file_name="metrics.prom", mime="text/plain")
+    with col2:
+        st.download_button("⬇️ JSON-lines", metrics.to_jsonl(), file_name="metrics.jsonl",
+                           mime="application/x-ndjson")
 
 # ==================== رابط کاربری اصلی ====================
 def main_dashboard():
     """داشبورد اصلی پس از ورود موفق"""
     
+    # نمایه‌ی محلی شناسه‌ها (None اگر لیست ارزها در دسترس نباشد؛ در این صورت بررسی محلی انجام نمی‌شود)
+    coin_index = get_coin_index()
+    
     # نوار کناری تنظیمات
     with st.sidebar:
         st.image("https://cryptologos.cc/logos/bitcoin-btc-logo.png", width=80)
         st.markdown("### ⚙️ تنظیمات تحلیل")
         
-        coin_id = st.text_input(
-            "شناسه ارز (CoinGecko ID)",
-            value="bitcoin",
-            help="مثال: bitcoin, ethereum, solana, cardano"
-        )
+        mode = st.radio("حالت تحلیل", ["تک ارز", "واچ‌لیست", "زنده", "غربال بازار", "هشدارها"], horizontal=True)
+        
+        if mode == "غربال بازار":
+            top_n = st.slider("تعداد ارزهای برتر", 50, 500, DEFAULT_TOP_N, step=50)
+            benchmark = st.text_input("ارز مرجع همبستگی", value=DEFAULT_BENCHMARK)
+        elif mode in ("واچ‌لیست", "زنده"):
+            watchlist_text = st.text_area(
+                "شناسه ارزها (با کاما یا خط جدید جدا کنید)",
+                value="bitcoin, ethereum, solana, cardano, ripple",
+                height=120
+            )
+        elif mode == "تک ارز":
+            coin_query = st.text_input(
+                "جست‌وجوی ارز (نام، نماد یا CoinGecko ID)",
+                value="bitcoin",
+                help="مثال: bitcoin, btc, ethereum, solana, cardano"
+            )
+            coin_id = coin_query.strip().lower()
+            if coin_index is not None and coin_id:
+                # پیشنهادها از نمایه‌ی درون‌حافظه‌ای؛ بدون درخواست شبکه در هر rerun
+                options = coin_index.search(coin_query) or [coin_id]
+                coin_id = st.selectbox("ارز", options, format_func=coin_index.label)
         
         vs_currency = st.selectbox("واحد پول", ["usd", "eur", "gbp", "jpy"])
         analysis_days = st.slider("بازه زمانی (روز)", 7, 365, 30)
         
+        if mode == "زنده":
+            live_interval = st.slider("فاصله به‌روزرسانی (ثانیه)", 10, 300, 30, step=5)
+            live_enabled = st.toggle("▶️ پایش زنده فعال", value=False)
+        
         col1, col2 = st.columns(2)
         with col1:
             fetch_btn = st.button("🔍 تحلیل کن", type="primary", use_container_width=True)
         with col2:
             if st.button("🚪 خروج", use_container_width=True):
-                st.session_state.auth["is_authenticated"] = False
+                Authenticator.logout()
                 st.rerun()
         
         st.markdown("---")
@@ -304,26 +535,73 @@ def main_dashboard():
             st.warning("از کلید API پیش‌فرض استفاده می‌شود.")
         else:
             st.success("کلید API شخصی فعال است.")
+        st.checkbox("📈 پنل عملکرد", key="show_metrics_panel",
+                    help="زمان هر مرحله و درخواست‌های API در اجراهای اخیر")
     
     # بخش اصلی داشبورد
     st.title("🚀 سیستم تحلیل و سیگنال‌دهی ارزهای دیجیتال")
     
+    if mode == "زنده":
+        coin_ids = resolve_coin_ids(coin_index, WatchlistScanner.parse_coin_ids(watchlist_text))
+        if not live_enabled or not coin_ids:
+            st.info("⏳ ارزها را وارد کرده و «پایش زنده فعال» را روشن کنید.")
+            return
+        live_dashboard(coin_ids, vs_currency, analysis_days, live_interval)
+        return
+    
+    if mode == "هشدارها":
+        alerts_dashboard(coin_index, vs_currency, analysis_days)
+        return
+    
     if not fetch_btn:
         st.info("⏳ لطفاً شناسه ارز را وارد کرده و روی دکمه «تحلیل کن» کلیک کنید.")
         return
     
+    if mode == "غربال بازار":
+        benchmark = benchmark.strip().lower()
+        if coin_index is not None:
+            benchmark = coin_index.resolve(benchmark) or benchmark
+        screener_dashboard(fetcher, vs_currency, top_n, benchmark)
+        return
+    
+    if mode == "واچ‌لیست":
+        coin_ids = resolve_coin_ids(coin_index, WatchlistScanner.parse_coin_ids(watchlist_text))
+        if not coin_ids:
+            st.error("لطفاً حداقل یک شناسه ارز معتبر وارد کنید.")
+            return
+        watchlist_dashboard(coin_ids, vs_currency, analysis_days)
+        return
+    
+    coin_id = coin_id.strip().lower()
+    if not coin_id:
+        st.error("لطفاً نام ارز را وارد کنید.")
+        return
+    if coin_index is not None and coin_id not in coin_index:
+        # شناسه‌ی نامعتبر پیش از صرف سهمیه‌ی API رد می‌شود
+        st.error(unknown_coin_message(coin_id, coin_index.search(coin_id, limit=3)))
+        return
+    
     with st.spinner("🔍 در حال دریافت و تحلیل داده‌ها..."):
-        # ایجاد نمونه‌ها
-        fetcher = DataFetcher()
-        analyzer = TechnicalAnalyzer()
-        
-        # دریافت داده‌ها
+        # درخواست‌های مستقل هم‌زمان اجرا می‌شوند؛ پیام‌های نخ‌ها پس از پایان نمایش داده می‌شوند
         progress_bar = st.progress(0)
+        completed = []
         
-        # مرحله ۱: دریافت داده‌های قیمت
-        st.write("**مرحله ۱:** دریافت داده‌های تاریخی...")
-        df = fetcher.get_coin_data(coin_id, vs_currency, analysis_days)
-        progress_bar.progress(30)
+        def on_stage(stage):
+            completed.append(stage)
+            st.write(f"✅ **مرحله {len(completed)}:** {PIPELINE_STAGES[stage]}")
+            progress_bar.progress(int(90 * len(completed) / len(PIPELINE_STAGES)))
+        
+        # نتیجه‌ی تازه‌ی زمان‌بند پیش‌محاسبه (یا جلسه‌ی دیگر) بدون دریافت و تحلیل دوباره نمایش داده می‌شود
+        pipeline, cached_age = load_or_run(fetcher, coin_id, vs_currency, analysis_days, on_stage)
+        if cached_age is not None:
+            progress_bar.progress(90)
+            st.info(f"⚡ نتیجه‌ی از پیش محاسبه‌شده — {_format_age(cached_age)} پیش به‌روز شده است.")
+        show_messages(fetcher.pop_messages())
+        df = pipeline["df"]
+        tech_result = pipeline["tech_result"]
+        if tech_result and tech_result.get("خطا"):
+            st.error(tech_result["خطا"])
+        fear_greed = pipeline["fear_greed"]
         
         if df is None or df.empty:
             st.error(f"""
@@ -340,22 +618,12 @@ def main_dashboard():
             """)
             return
         
-        # مرحله ۲: تحلیل تکنیکال
-        st.write("**مرحله ۲:** تحلیل تکنیکال...")
-        tech_result = analyzer.analyze(df)
-        progress_bar.progress(60)
-        
-        # مرحله ۳: دریافت شاخص ترس و طمع
-        st.write("**مرحله ۳:** تحلیل احساسات بازار...")
-        fear_greed = fetcher.get_fear_greed_index()
-        progress_bar.progress(90)
-        
-        # مرحله ۴: تولید نتیجه نهایی
-        st.write("**مرحله ۴:** تولید گزارش نهایی...")
+        # مرحله آخر: تولید نتیجه نهایی
+        st.write("**تولید گزارش نهایی...**")
         
         # نمایش اطلاعات ارز
-        if "coin_info" in st.session_state:
-            info = st.session_state["coin_info"]
+        if pipeline["coin_info"]:
+            info = st.session_state["coin_info"] = pipeline["coin_info"]
             col1, col2, col3, col4 = st.columns(4)
             with col1:
                 st.metric("نام ارز", info["name"])
@@ -368,27 +636,10 @@ def main_dashboard():
                 st.metric("ارزش بازار", f"${formatted_mcap}")
         
         # تب‌های نتایج
-        tab1, tab2, tab3 = st.tabs(["📈 نمودارها", "📊 تحلیل فنی", "🎯 سیگنال نهایی"])
+        tab1, tab2, tab3, tab4 = st.tabs(["📈 نمودارها", "📊 تحلیل فنی", "🕒 چند بازه‌ای", "🎯 سیگنال نهایی"])
         
         with tab1:
-            # نمودار قیمت
-            fig1 = go.Figure()
-            fig1.add_trace(go.Scatter(x=df.index, y=df['price'], mode='lines', 
-                                     name='قیمت', line=dict(color='#00ff88', width=2)))
-            fig1.update_layout(title='نمودار قیمت', height=400, 
-                              xaxis_title='تاریخ', yaxis_title=f'قیمت ({vs_currency.upper()})',
-                              template='plotly_dark')
-            st.plotly_chart(fig1, use_container_width=True)
-            
-            # نمودار حجم
-            if 'volume' in df.columns:
-                fig2 = go.Figure()
-                fig2.add_trace(go.Bar(x=df.index, y=df['volume'], name='حجم معاملات',
-                                     marker_color='#ffaa00'))
-                fig2.update_layout(title='حجم معاملات', height=300,
-                                  xaxis_title='تاریخ', yaxis_title='حجم',
-                                  template='plotly_dark')
-                st.plotly_chart(fig2, use_container_width=True)
+            price_volume_charts(df, vs_currency)
         
         with tab2:
             # نتایج تحلیل تکنیکال
@@ -414,6 +665,10 @@ def main_dashboard():
                 for reason in tech_result["دلایل"]:
                     st.markdown(f"- {reason}")
             
+            # تاریخچه امتیاز سیگنال
+            if "signal_score" in df.columns:
+                signal_history_section(df)
+            
             # نمایش شاخص ترس و طمع
             if fear_greed:
                 st.markdown("---")
@@ -432,6 +687,10 @@ def main_dashboard():
                         st.success("احساسات متعادل")
         
         with tab3:
+            st.subheader("🕒 تحلیل چند بازه‌ای")
+            timeframes_section(pipeline["timeframes"], vs_currency)
+        
+        with tab4:
             # سیگنال نهایی با طراحی ویژه
             st.subheader("🎯 سیگنال نهایی و توصیه اقدام")
             
@@ -505,6 +764,7 @@ def main_dashboard():
 # ==================== برنامه اصلی ====================
 def main():
     """تابع اصلی اجرای برنامه"""
+    st.set_page_config(page_title="سیستم تحلیل حرفه‌ای کریپتو", layout="wide", initial_sidebar_state="collapsed")
     
     # مقداردهی اولیه احراز هویت
     Authenticator.initialize()
@@ -524,8 +784,16 @@ def main():
         """)
         
     else:
-        # نمایش داشبورد اصلی
-        main_dashboard()
+        # زمان‌بند پیش‌محاسبه‌ی ارزهای پرتکرار (HOT_COINS) یک بار در پروسه شروع می‌شود
+        get_precompute_scheduler()
+        # موتور هشدار در صورت وجود قاعده در پس‌زمینه اجرا می‌شود
+        get_alert_engine()
+        
+        # نمایش داشبورد اصلی؛ زمان کل اجرا و مراحل آن برای پنل عملکرد ثبت می‌شود
+        with get_metrics().run("dashboard"):
+            main_dashboard()
+        if st.session_state.get("show_metrics_panel"):
+            metrics_panel()
 
 # ==================== اجرای برنامه ====================
 if __name__ == "__main__":
@@ -0,0 +1,90 @@
+"""هسته‌ی مشترک سیستم تحلیل کریپتو (بدون وابستگی به رابط کاربری)"""
+from .alerts import AlertEngine, AlertRuleStore, get_alert_engine, normalize_rule, sinks_from_env
+from .analysis import TechnicalAnalyzer
+from .auth import AuthService, LockoutStore, get_auth_service
+from .backtest import backtest, run_sweep, simulate
+from .cache import ResponseCache, get_response_cache
+from .cli import analyze_coin, analyze_coins
+from .coin_index import CoinDirectory, CoinIndex, get_coin_directory, get_coin_index
+from .columnar import MarketChart, parse_market_chart, to_frame
+from .downsample import bucket_aggregate, downsample_frame, lttb_indices
+from .fetcher import DataFetcher
+from .history import HistoryStore, get_history_store, granularity_for_days
+from .incremental import IncrementalAnalyzer, IncrementalIndicators, get_incremental_analyzer
+from .live import LivePoller, get_live_poller
+from .metrics import MetricsRecorder, get_metrics, timed
+from .pipeline import PIPELINE_STAGES, AnalysisPipeline, WatchlistScanner
+from .precompute import PrecomputeScheduler, ResultStore, get_precompute_scheduler, get_result_store, load_or_run
+from .screener import MarketScreener, correlation_matrix, rsi_matrix
+from .signals import (
+    DEFAULT_INDICATOR_WINDOWS,
+    DEFAULT_SIGNAL_RULES,
+    compute_indicators,
+    signal_series,
+)
+from .timeframes import TIMEFRAMES, MultiTimeframeAnalyzer, build_candles
+from .transport import TokenBucket, backoff_delay, get_rate_limiter, get_session, set_rate_limit
+
+__all__ = [
+    "AlertEngine",
+    "AlertRuleStore",
+    "get_alert_engine",
+    "normalize_rule",
+    "sinks_from_env",
+    "TechnicalAnalyzer",
+    "AuthService",
+    "LockoutStore",
+    "get_auth_service",
+    "backtest",
+    "run_sweep",
+    "simulate",
+    "ResponseCache",
+    "get_response_cache",
+    "analyze_coin",
+    "analyze_coins",
+    "CoinDirectory",
+    "CoinIndex",
+    "get_coin_directory",
+    "get_coin_index",
+    "MarketChart",
+    "parse_market_chart",
+    "to_frame",
+    "bucket_aggregate",
+    "downsample_frame",
+    "lttb_indices",
+    "DataFetcher",
+    "HistoryStore",
+    "get_history_store",
+    "granularity_for_days",
+    "IncrementalAnalyzer",
+    "IncrementalIndicators",
+    "get_incremental_analyzer",
+    "LivePoller",
+    "get_live_poller",
+    "MetricsRecorder",
+    "get_metrics",
+    "timed",
+    "PIPELINE_STAGES",
+    "AnalysisPipeline",
+    "WatchlistScanner",
+    "PrecomputeScheduler",
+    "ResultStore",
+    "get_precompute_scheduler",
+    "get_result_store",
+    "load_or_run",
+    "MarketScreener",
+    "correlation_matrix",
+    "rsi_matrix",
+    "DEFAULT_INDICATOR_WINDOWS",
+    "DEFAULT_SIGNAL_RULES",
+    "compute_indicators",
+    "signal_series",
+    "TIMEFRAMES",
+    "MultiTimeframeAnalyzer",
+    "build_candles",
+    "TokenBucket",
+    "backoff_delay",
+    "get_rate_limiter",
+    "get_session",
+    "set_rate_limit",
+]
@@ -0,0 +1,596 @@
+"""موتور هشدار: قواعد هر ارز، ارزیابی افزایشی روی نقاط جدید، حذف تکرار، محدودیت نرخ و مقصدهای قابل تعویض"""
+import contextvars
+import json
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import pandas as pd
+
+from .fetcher import DataFetcher
+from .incremental import IncrementalIndicators
+from .live import fetch_series
+from .metrics import get_metrics
+from .pipeline import WATCHLIST_MAX_WORKERS
+from .signals import SIGNAL_LABELS
+from .transport import TokenBucket, get_session
+
+logger = logging.getLogger(__name__)
+
+# ==================== تنظیمات ====================
+DEFAULT_RULES_PATH = os.path.join(".cache", "alert_rules.json")
+DEFAULT_INTERVAL_SECONDS = 300
+DEFAULT_DAYS = 30  # سری ساعتی
+DEFAULT_COOLDOWN_SECONDS = 60 * 60  # کمترین فاصله‌ی دو هشدار یک قاعده
+DEFAULT_ALERTS_PER_MINUTE = 30  # سقف ارسال به مقصدها؛ بقیه در صف می‌مانند
+MAX_PENDING_ALERTS = 1000
+RECENT_ALERTS = 200
+WEBHOOK_TIMEOUT_SECONDS = 10
+
+RULE_TYPES = {
+    "signal": "تغییر سیگنال",
+    "rsi_cross": "عبور RSI از سطح",
+    "golden_cross": "کراس طلایی / مرگ",
+    "fear_greed_below": "ترس و طمع زیر آستانه",
+}
+DIRECTIONS = ("up", "down", "any")
+_SIGNAL_KEYS = {label: key for key, label in SIGNAL_LABELS.items()}
+
+
+# ==================== تعریف قواعد ====================
+def _signal_key(target):
+    """کلید سیگنال (strong_buy و ...) از کلید یا برچسب فارسی با یا بدون ایموجی"""
+    target = str(target or "").strip()
+    if target in SIGNAL_LABELS:
+        return target
+    for key, label in SIGNAL_LABELS.items():
+        if target and label.startswith(target):
+            return key
+    raise ValueError(f"سیگنال ناشناخته: {target}")
+
+
+def normalize_rule(spec):
+    """اعتبارسنجی و تکمیل یک قاعده با مقادیر پیش‌فرض؛ در صورت نامعتبر بودن ValueError
+
+    {"type": "signal", "coin_id": "bitcoin", "signal": "خرید قوی"}
+    {"type": "rsi_cross", "coin_id": "bitcoin", "level": 70, "direction": "up"}
+    {"type": "golden_cross", "coin_id": "bitcoin"}
+    {"type": "fear_greed_below", "threshold": 25}
+    """
+    rule_type = spec.get("type")
+    if rule_type not in RULE_TYPES:
+        raise ValueError(f"نوع قاعده‌ی ناشناخته: {rule_type}")
+    rule = {
+        "id": str(spec.get("id") or uuid.uuid4().hex[:8]),
+        "type": rule_type,
+        "cooldown": float(spec.get("cooldown", DEFAULT_COOLDOWN_SECONDS)),
+    }
+    if rule_type == "fear_greed_below":
+        rule.update(coin_id=None, threshold=float(spec.get("threshold", 25)))
+        return rule
+
+    coin_id = str(spec.get("coin_id") or "").strip().lower()
+    if not coin_id:
+        raise ValueError("شناسه‌ی ارز برای این قاعده لازم است.")
+    rule.update(coin_id=coin_id, vs_currency=spec.get("vs_currency", "usd"), days=int(spec.get("days", DEFAULT_DAYS)))
+    if rule_type == "signal":
+        rule["signal"] = _signal_key(spec.get("signal", "strong_buy"))
+    elif rule_type == "rsi_cross":
+        rule["level"] = float(spec.get("level", 30))
+        rule["direction"] = spec.get("direction", "any")
+    else:
+        rule["direction"] = spec.get("direction", "up")
+    if rule.get("direction", "any") not in DIRECTIONS:
+        raise ValueError(f"جهت نامعتبر: {rule['direction']}")
+    return rule
+
+
+def series_key(rule):
+    return (rule["coin_id"], rule["vs_currency"], rule["days"])
+
+
+def describe_rule(rule):
+    """شرح کوتاه فارسی یک قاعده برای جدول‌ها"""
+    if rule["type"] == "signal":
+        return f"سیگنال ← {SIGNAL_LABELS[rule['signal']]}"
+    if rule["type"] == "rsi_cross":
+        arrow = {"up": "↑", "down": "↓", "any": "↕"}[rule["direction"]]
+        return f"RSI {arrow} {rule['level']:g}"
+    if rule["type"] == "golden_cross":
+        return "کراس طلایی ⭐" if rule["direction"] != "down" else "کراس مرگ ☠️"
+    return f"ترس و طمع < {rule['threshold']:g}"
+
+
+class AlertRuleStore:
+    """قواعد ذخیره‌شده در یک فایل JSON تا بین ری‌استارت‌ها و کارگر جداگانه مشترک باشند
+
+    فایل ممکن است دستی ویرایش شود؛ ورودی نامعتبر کنار گذاشته و در errors گزارش می‌شود و
+    هرگز بارگذاری موتور (و داشبورد) را متوقف نمی‌کند.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get("ALERT_RULES_PATH", DEFAULT_RULES_PATH)
+        self.errors = []
+        self._invalid = []  # ورودی‌های نامعتبر که در ذخیره‌ی بعدی دست‌نخورده نگه داشته می‌شوند
+        self._unreadable = False
+
+    def _error(self, message):
+        logger.warning("%s (%s)", message, self.path)
+        self.errors.append(message)
+
+    def load(self):
+        """قواعد معتبر فایل؛ فایل خراب یا ورودی نامعتبر فقط در errors ثبت می‌شود"""
+        self.errors, self._invalid, self._unreadable = [], [], False
+        if not os.path.exists(self.path):
+            return []
+        try:
+            with open(self.path, encoding="utf-8") as fh:
+                specs = json.load(fh)
+            if not isinstance(specs, list):
+                raise ValueError("ریشه‌ی فایل باید یک لیست باشد")
+        except (OSError, ValueError) as e:
+            self._unreadable = True
+            self._error(f"فایل قواعد هشدار خوانا نیست: {e}")
+            return []
+        rules = []
+        for position, spec in enumerate(specs, 1):
+            try:
+                if not isinstance(spec, dict):
+                    raise ValueError("هر قاعده باید یک شیء JSON باشد")
+                rules.append(normalize_rule(spec))
+            except (ValueError, TypeError) as e:
+                self._invalid.append(spec)
+                self._error(f"قاعده‌ی شماره‌ی {position} نادیده گرفته شد: {e}")
+        return rules
+
+    def save(self, rules):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if self._unreadable and os.path.exists(self.path):
+            # فایل خراب پیش از بازنویسی کنار گذاشته می‌شود تا بتوان آن را دستی بازیابی کرد
+            os.replace(self.path, f"{self.path}.bak")
+            self._unreadable = False
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as fh:
+            json.dump(list(rules) + self._invalid, fh, ensure_ascii=False, indent=2)
+        os.replace(temporary, self.path)
+
+
+# ==================== مقصدهای ارسال ====================
+class LogSink:
+    """ثبت هشدار در logging"""
+
+    def send(self, alert):
+        logger.warning("🔔 %s", alert["message"])
+
+
+class FileSink:
+    """افزودن هر هشدار به صورت یک خط JSON به انتهای فایل"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, alert):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock, open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(alert, ensure_ascii=False) + "\n")
+
+
+class WebhookSink:
+    """ارسال POST با بدنه‌ی JSON (مثلاً Slack، Discord یا سرویس داخلی)"""
+
+    def __init__(self, url, timeout=WEBHOOK_TIMEOUT_SECONDS):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, alert):
+        session = get_session(urlsplit(self.url).netloc)
+        response = session.post(self.url, json={"text": alert["message"], "alert": alert}, timeout=self.timeout)
+        response.raise_for_status()
+
+
+def sinks_from_env(spec=None):
+    """مقصدها از ALERT_SINKS: «log»، «file:مسیر» و «webhook:آدرس» جداشده با کاما (پیش‌فرض log)"""
+    sinks = []
+    for item in (spec if spec is not None else os.environ.get("ALERT_SINKS", "log")).split(","):
+        kind, _, target = item.strip().partition(":")
+        if kind == "log":
+            sinks.append(LogSink())
+        elif kind == "file" and target:
+            sinks.append(FileSink(target))
+        elif kind == "webhook" and target:
+            sinks.append(WebhookSink(target))
+        elif kind:
+            raise ValueError(f"مقصد هشدار نامعتبر: {item}")
+    return sinks
+
+
+# ==================== ارزیابی افزایشی ====================
+def _finite(*values):
+    return all(value is not None and not math.isnan(value) for value in values)
+
+
+def _crossed(previous, current, level, direction):
+    if not _finite(previous, current):
+        return False
+    up = previous < level <= current
+    down = previous > level >= current
+    return up if direction == "up" else down if direction == "down" else up or down
+
+
+def _snapshot(ts, values, result):
+    """وضعیت یک کندل برای مقایسه با کندل قبلی"""
+    return {
+        "ts": ts,
+        "price": values["price"],
+        "rsi": values["rsi"],
+        "sma_20": values["sma_20"],
+        "sma_50": values["sma_50"],
+        "signal": _SIGNAL_KEYS.get(result["سیگنال"]),
+        "score": result.get("امتیاز"),
+    }
+
+
+class _SeriesState:
+    __slots__ = ("engine", "last_ts", "snapshot")
+
+    def __init__(self):
+        self.engine = IncrementalIndicators()
+        self.last_ts = None  # زمان آخرین کندل ثبت‌شده در engine
+        self.snapshot = None  # آخرین وضعیت دیده‌شده (ممکن است کندل لحظه‌ای باشد)
+
+
+class AlertEngine:
+    """ارزیابی همه‌ی قواعد روی سری‌های مشترک و ارسال هشدارها
+
+    هر سری (ارز، واحد پول، بازه) فقط یک بار در هر دور دریافت و فقط نقاط جدیدش با
+    IncrementalIndicators پردازش می‌شوند؛ هزینه‌ی هر قاعده مقایسه‌ی دو وضعیت است.
+    اولین دریافت هر سری فقط حالت را می‌سازد تا تاریخچه هشدار قدیمی تولید نکند.
+    """
+
+    def __init__(self, rules=None, sinks=None, store=None, fetch=None, fear_greed=None,
+                 interval=DEFAULT_INTERVAL_SECONDS, alerts_per_minute=DEFAULT_ALERTS_PER_MINUTE,
+                 max_workers=WATCHLIST_MAX_WORKERS):
+        self.store = store
+        self.sinks = list(sinks) if sinks is not None else [LogSink()]
+        self.fetch = fetch or fetch_series
+        self.fear_greed = fear_greed or (lambda: DataFetcher().get_fear_greed_index())
+        self.interval = interval
+        self.max_workers = max_workers
+        self.last_run_at = None
+        self.dropped = 0
+        self._rules = {}
+        self._by_series = {}
+        self._rule_state = {}  # rule id -> {"last_fired", "last_candle"}
+        self._series = {}
+        self._fear_greed_value = None
+        self._limiter = TokenBucket(alerts_per_minute, burst=max(1, alerts_per_minute // 3))
+        self._pending = deque()
+        self._retry_in = None  # ثانیه تا توکن بعدی وقتی صف به سقف نرخ خورده است
+        self._recent = deque(maxlen=RECENT_ALERTS)
+        self._lock = threading.RLock()
+        self._deliver_lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        for rule in (rules if rules is not None else (store.load() if store else [])):
+            self._add(normalize_rule(rule))
+        self.errors = list(store.errors) if store is not None and rules is None else []
+
+    # ---------- مدیریت قواعد ----------
+    def _add(self, rule):
+        self._rules[rule["id"]] = rule
+        if rule["coin_id"] is not None:
+            self._by_series.setdefault(series_key(rule), []).append(rule)
+
+    def rules(self):
+        with self._lock:
+            return list(self._rules.values())
+
+    def add_rule(self, spec):
+        """افزودن قاعده (و ذخیره در store)؛ خروجی قاعده‌ی کامل‌شده"""
+        rule = normalize_rule(spec)
+        with self._lock:
+            if rule["id"] in self._rules:
+                self._remove(rule["id"])
+            self._add(rule)
+            self._save()
+        return rule
+
+    def _remove(self, rule_id):
+        rule = self._rules.pop(rule_id, None)
+        self._rule_state.pop(rule_id, None)
+        if rule is not None and rule["coin_id"] is not None:
+            key = series_key(rule)
+            remaining = [other for other in self._by_series.get(key, []) if other["id"] != rule_id]
+            if remaining:
+                self._by_series[key] = remaining
+            else:
+                # سری بدون قاعده دیگر دریافت و نگهداری نمی‌شود
+                self._by_series.pop(key, None)
+                self._series.pop(key, None)
+        return rule
+
+    def remove_rule(self, rule_id):
+        with self._lock:
+            rule = self._remove(rule_id)
+            self._save()
+        return rule is not None
+
+    def _save(self):
+        if self.store is not None:
+            self.store.save(self._rules.values())
+
+    # ---------- ارزیابی ----------
+    def _advance(self, key, df):
+        """پردازش فقط نقاط جدید df؛ خروجی لیست (وضعیت قبلی، وضعیت جدید)"""
+        state = self._series.get(key)
+        index = df.index
+        prices = df["price"].to_numpy(dtype="float64")
+        start = None
+        if state is not None and state.last_ts is not None:
+            position = index.searchsorted(state.last_ts)
+            if position < len(index) and index[position] == state.last_ts:
+                start = position + 1
+
+        if start is None:
+            # اولین دریافت یا سری ناسازگار: ساخت حالت بدون هشدار
+            state = self._series[key] = _SeriesState()
+            for price in prices[:-1]:
+                state.engine.update(price)
+            state.last_ts = index[-2] if len(index) > 1 else None
+            state.snapshot = _snapshot(index[-1], state.engine.peek(prices[-1]), state.engine.evaluate(prices[-1]))
+            return []
+
+        transitions = []
+        previous = state.snapshot
+        engine = state.engine
+        # همه‌ی نقاط به جز آخرین ثبت می‌شوند؛ آخرین نقطه قیمت لحظه‌ای است و فقط با peek ارزیابی می‌شود
+        for position in range(start, len(prices) - 1):
+            values = engine.update(prices[position])
+            current = _snapshot(index[position], values, engine.evaluate())
+            transitions.append((previous, current))
+            previous = current
+        if start < len(prices):
+            current = _snapshot(index[-1], engine.peek(prices[-1]), engine.evaluate(prices[-1]))
+            if previous is None or current["ts"] != previous["ts"] or current["price"] != previous["price"]:
+                transitions.append((previous, current))
+                previous = current
+        if start < len(prices) - 1:
+            state.last_ts = index[-2]
+        state.snapshot = previous
+        return transitions
+
+    @staticmethod
+    def _matches(rule, previous, current):
+        if previous is None:
+            return False
+        if rule["type"] == "signal":
+            return current["signal"] == rule["signal"] and previous["signal"] != rule["signal"]
+        if rule["type"] == "rsi_cross":
+            return _crossed(previous["rsi"], current["rsi"], rule["level"], rule["direction"])
+        if rule["type"] == "golden_cross":
+            if not _finite(previous["sma_20"], previous["sma_50"], current["sma_20"], current["sma_50"]):
+                return False
+            golden = previous["sma_20"] <= previous["sma_50"] and current["sma_20"] > current["sma_50"]
+            death = previous["sma_20"] >= previous["sma_50"] and current["sma_20"] < current["sma_50"]
+            return golden if rule["direction"] == "up" else death if rule["direction"] == "down" else golden or death
+        return False
+
+    @staticmethod
+    def _message(rule, current):
+        coin = rule["coin_id"]
+        if rule["type"] == "signal":
+            return f"{coin}: سیگنال به {SIGNAL_LABELS[rule['signal']]} تغییر کرد (امتیاز {current['score']})"
+        if rule["type"] == "rsi_cross":
+            direction = "بالا" if current["rsi"] >= rule["level"] else "پایین"
+            return f"{coin}: RSI سطح {rule['level']:g} را به سمت {direction} رد کرد ({current['rsi']:.1f})"
+        if rule["type"] == "golden_cross":
+            name = "کراس طلایی ⭐" if current["sma_20"] > current["sma_50"] else "کراس مرگ ☠️"
+            return f"{coin}: {name} SMA20/SMA50 در قیمت {current['price']:,.4g}"
+        return f"شاخص ترس و طمع به {current['value']} رسید (زیر {rule['threshold']:g}) 😨"
+
+    def _fire(self, rule, current, now):
+        """ساخت هشدار با حذف تکرار (یک بار برای هر کندل) و رعایت cooldown قاعده"""
+        state = self._rule_state.setdefault(rule["id"], {"last_fired": None, "last_candle": None})
+        candle = str(current.get("ts"))
+        if state["last_candle"] == candle:
+            return None
+        if state["last_fired"] is not None and now - state["last_fired"] < rule["cooldown"]:
+            return None
+        state.update(last_fired=now, last_candle=candle)
+        value = current.get("value", current.get("rsi") if rule["type"] == "rsi_cross" else current.get("price"))
+        return {
+            "rule_id": rule["id"],
+            "type": rule["type"],
+            "coin_id": rule["coin_id"],
+            "message": self._message(rule, current),
+            "value": None if value is None or (isinstance(value, float) and math.isnan(value)) else float(value),
+            "candle": current["ts"].isoformat() if isinstance(current.get("ts"), pd.Timestamp) else candle,
+            "fired_at": now,
+        }
+
+    def feed(self, key, df, now=None):
+        """ارزیابی قواعد سری key روی نقاط جدید df؛ خروجی هشدارهای تولیدشده (پیش از ارسال)"""
+        if df is None or df.empty:
+            return []
+        now = now or time.time()
+        alerts = []
+        with self._lock:
+            rules = self._by_series.get(key)
+            if not rules:
+                return []
+            for previous, current in self._advance(key, df):
+                for rule in rules:
+                    if self._matches(rule, previous, current):
+                        alert = self._fire(rule, current, now)
+                        if alert:
+                            alerts.append(alert)
+        return alerts
+
+    def feed_fear_greed(self, value, now=None):
+        """ارزیابی قواعد ترس و طمع با مقدار جدید شاخص"""
+        if value is None:
+            return []
+        now = now or time.time()
+        alerts = []
+        with self._lock:
+            previous, self._fear_greed_value = self._fear_greed_value, value
+            if previous is None or previous == value:
+                return []
+            current = {"ts": f"fng-{value}-{int(now)}", "value": value}
+            for rule in self._rules.values():
+                if rule["type"] == "fear_greed_below" and previous >= rule["threshold"] > value:
+                    alert = self._fire(rule, current, now)
+                    if alert:
+                        alerts.append(alert)
+        return alerts
+
+    # ---------- ارسال ----------
+    def dispatch(self, alerts):
+        """صف کردن هشدارها و ارسال تا سقف نرخ؛ بقیه با پر شدن سهمیه ارسال می‌شوند (run_forever)"""
+        with self._lock:
+            for alert in alerts:
+                self._recent.append(alert)
+                if len(self._pending) >= MAX_PENDING_ALERTS:
+                    self._pending.popleft()
+                    self.dropped += 1
+                self._pending.append(alert)
+        return self.flush()
+
+    def flush(self):
+        """ارسال هشدارهای صف به همه‌ی مقصدها؛ خروجی تعداد ارسال‌شده"""
+        sent = 0
+        with self._deliver_lock:
+            while True:
+                with self._lock:
+                    self._retry_in = None
+                    if not self._pending:
+                        break
+                    wait = self._limiter.try_acquire()
+                    if wait > 0:
+                        self._retry_in = wait
+                        break
+                    alert = self._pending.popleft()
+                for sink in self.sinks:
+                    try:
+                        sink.send(alert)
+                    except Exception:
+                        # خرابی یک مقصد نباید ارسال به بقیه یا ارزیابی را متوقف کند
+                        logger.exception("ارسال هشدار به %s ناموفق بود", type(sink).__name__)
+                sent += 1
+        return sent
+
+    def recent(self, limit=50):
+        """آخرین هشدارها (جدیدترین اول)"""
+        with self._lock:
+            return list(self._recent)[::-1][:limit]
+
+    # ---------- اجرای دوره‌ای ----------
+    def _fetch(self, key):
+        try:
+            return self.fetch(*key, self.interval)
+        except Exception:
+            logger.exception("دریافت سری %s برای هشدارها ناموفق بود", key)
+            return None
+
+    def run_once(self):
+        """یک دور: دریافت هم‌زمان سری‌های دارای قاعده، ارزیابی افزایشی و ارسال؛ خروجی تعداد هشدارها"""
+        with self._lock:
+            keys = list(self._by_series)
+            needs_fear_greed = any(rule["type"] == "fear_greed_below" for rule in self._rules.values())
+        alerts = []
+        with get_metrics().run("alerts", series=len(keys)):
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                # درخواست‌های نخ‌های کارگر به همین اجرا در metrics نسبت داده می‌شوند
+                futures = [pool.submit(contextvars.copy_context().run, self._fetch, key) for key in keys]
+                frames = [future.result() for future in futures]
+            with get_metrics().span("alerts.evaluate"):
+                for key, df in zip(keys, frames):
+                    alerts += self.feed(key, df)
+                if needs_fear_greed:
+                    alerts += self.feed_fear_greed(self.fear_greed())
+            self.dispatch(alerts)
+        self.last_run_at = time.time()
+        return len(alerts)
+
+    def _drain_until(self, deadline):
+        """انتظار تا deadline (time.monotonic)؛ در این فاصله صف هم‌گام با پر شدن سهمیه ارسال می‌شود
+
+        بدون این کار هشدارهای بیش از burst تا دور بعد (interval ثانیه) در صف می‌ماندند.
+        """
+        while not self._stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            with self._lock:
+                retry_in = self._retry_in
+            if self._stop.wait(remaining if retry_in is None else min(remaining, retry_in)):
+                return
+            if retry_in is not None:
+                self.flush()
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("ارزیابی هشدارها ناموفق بود")
+            self._drain_until(time.monotonic() + self.interval)
+
+    def start(self):
+        """اجرای موتور در یک نخ پس‌زمینه (اگر از قبل در حال اجرا نباشد)"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self.run_forever, name="alerts", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+
+_shared_engine = None
+_shared_engine_lock = threading.Lock()
+
+
+def get_alert_engine():
+    """موتور مشترک هشدار با قواعد ALERT_RULES_PATH و مقصدهای ALERT_SINKS
+
+    اگر قاعده‌ای وجود داشته باشد و ALERT_IN_PROCESS=0 نباشد در پس‌زمینه اجرا می‌شود؛ با
+    ALERT_IN_PROCESS=0 ارزیابی به کارگر جداگانه (python -m crypto_core --alerts) سپرده می‌شود.
+    """
+    global _shared_engine
+    with _shared_engine_lock:
+        if _shared_engine is None:
+            # پیکربندی نادرست هشدارها نباید کل داشبورد را از کار بیندازد؛ خطا در رابط هشدارها نمایش داده می‌شود
+            try:
+                sinks, sink_error = sinks_from_env(), None
+            except ValueError as e:
+                sinks, sink_error = [LogSink()], f"{e}؛ فقط در لاگ ثبت می‌شود."
+                logger.warning("ALERT_SINKS نامعتبر است: %s", e)
+            _shared_engine = AlertEngine(
+                store=AlertRuleStore(),
+                sinks=sinks,
+                interval=int(os.environ.get("ALERT_INTERVAL", DEFAULT_INTERVAL_SECONDS)),
+            )
+            if sink_error:
+                _shared_engine.errors.append(sink_error)
+        engine = _shared_engine
+    if engine.rules() and os.environ.get("ALERT_IN_PROCESS", "1") != "0":
+        engine.start()
+    return engine
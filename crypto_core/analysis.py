@@ -0,0 +1,40 @@
+"""تحلیل تکنیکال کامل یک سری قیمت (بدون وابستگی به رابط کاربری)"""
+from .metrics import get_metrics
+from .signals import compute_indicators, signal_series, summarize_latest
+
+
+# ==================== ماژول تحلیل تکنیکال ====================
+class TechnicalAnalyzer:
+    """تحلیل تکنیکال با اندیکاتورهای پیشرفته"""
+
+    @staticmethod
+    def analyze(df):
+        """محاسبه‌ی اندیکاتورها و سیگنال روی df (ستون‌ها به df اضافه می‌شوند)
+
+        در صورت خطا به جای نمایش پیام، کلید «خطا» در خروجی قرار می‌گیرد.
+        """
+        if df is None or len(df) < 20:
+            return {"سیگنال": "داده ناکافی", "اطمینان": 0, "جزئیات": {}}
+
+        metrics = get_metrics()
+        try:
+            # محاسبه اندیکاتورها
+            with metrics.span("indicators"):
+                indicators = compute_indicators(df["price"])
+                for name in indicators.columns:
+                    df[name] = indicators[name]
+
+            # امتیازدهی برداری همه‌ی کندل‌ها در یک گذر؛ سیگنال فعلی آخرین مقدار سری است
+            with metrics.span("signals"):
+                series, conditions = signal_series(df)
+                df["signal_score"] = series["score"]
+                df["signal"] = series["signal"]
+                df["signal_confidence"] = series["confidence"]
+
+            latest = df.iloc[-1]
+            return summarize_latest(latest["price"], latest["rsi"], latest["sma_20"], latest["macd"],
+                                    latest["signal_score"], conditions)
+
+        except Exception as e:
+            return {"سیگنال": "خطای تحلیل", "اطمینان": 0, "جزئیات": {},
+                    "خطا": f"خطا در تحلیل تکنیکال: {str(e)[:100]}"}
@@ -0,0 +1,156 @@
+"""احراز هویت ارزان برای هر rerun: هش یک‌باره، bcrypt خارج از نخ اسکریپت، توکن HMAC و قفل پایدار"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+# ==================== تنظیمات ====================
+DEFAULT_USERNAME = "admin"
+DEFAULT_PASSWORD = "admin123"  # فقط برای توسعه، وقتی APP_PASSWORD_HASH تعریف نشده باشد
+DEFAULT_TOKEN_TTL_SECONDS = 12 * 60 * 60
+MAX_FAILED_ATTEMPTS = 3
+LOCKOUT_SECONDS = 5 * 60
+DEFAULT_AUTH_DB_PATH = os.path.join(".cache", "auth.sqlite3")
+BCRYPT_WORKERS = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS login_attempts (
+    username TEXT PRIMARY KEY,
+    failures INTEGER NOT NULL,
+    locked_until REAL NOT NULL
+)
+"""
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+# ==================== قفل پس از تلاش‌های ناموفق ====================
+class LockoutStore:
+    """شمارنده‌ی تلاش‌های ناموفق در SQLite تا بین جلسه‌ها، نخ‌ها و ری‌استارت‌ها مشترک بماند"""
+
+    def __init__(self, path=None, max_attempts=MAX_FAILED_ATTEMPTS, lockout_seconds=LOCKOUT_SECONDS):
+        self.path = path or os.environ.get("AUTH_DB_PATH", DEFAULT_AUTH_DB_PATH)
+        self.max_attempts = max_attempts
+        self.lockout_seconds = lockout_seconds
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(_SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def locked_for(self, username):
+        """ثانیه‌های باقی‌مانده از قفل (۰ اگر قفل نباشد)"""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT locked_until FROM login_attempts WHERE username=?", (username,)).fetchone()
+        return max(0.0, row[0] - time.time()) if row else 0.0
+
+    def register_failure(self, username):
+        """ثبت یک تلاش ناموفق؛ خروجی تعداد تلاش باقی‌مانده پیش از قفل"""
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT failures, locked_until FROM login_attempts WHERE username=?",
+                               (username,)).fetchone()
+            # شمارش پس از پایان قفل قبلی از نو شروع می‌شود
+            failures = 1 if row is None or 0 < row[1] <= now else row[0] + 1
+            locked_until = now + self.lockout_seconds if failures >= self.max_attempts else 0.0
+            conn.execute("INSERT OR REPLACE INTO login_attempts VALUES (?, ?, ?)", (username, failures, locked_until))
+        return max(0, self.max_attempts - failures)
+
+    def reset(self, username):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM login_attempts WHERE username=?", (username,))
+
+
+# ==================== سرویس احراز هویت ====================
+class AuthService:
+    """بررسی رمز با bcrypt در Pool جداگانه و صدور/بررسی توکن جلسه‌ی امضاشده با HMAC-SHA256
+
+    توکن شامل نام کاربری، زمان انقضا و اثر انگشت هش رمز است؛ تغییر رمز همه‌ی توکن‌ها را باطل می‌کند.
+    """
+
+    def __init__(self, username=None, password_hash=None, secret=None, token_ttl=None, lockout=None):
+        self.username = username or os.environ.get("APP_USERNAME", DEFAULT_USERNAME)
+        password_hash = password_hash or os.environ.get("APP_PASSWORD_HASH", "")
+        self.uses_default_password = not password_hash
+        if self.uses_default_password:
+            import bcrypt
+            # فقط یک بار در عمر پروسه؛ نه در هر rerun
+            password_hash = bcrypt.hashpw(DEFAULT_PASSWORD.encode(), bcrypt.gensalt()).decode()
+        self.password_hash = password_hash.encode()
+        self.token_ttl = token_ttl or int(os.environ.get("APP_SESSION_TTL_SECONDS", DEFAULT_TOKEN_TTL_SECONDS))
+        secret = secret or os.environ.get("APP_SESSION_SECRET")
+        # بدون APP_SESSION_SECRET کلید تصادفی است و جلسه‌ها با ری‌استارت باطل می‌شوند؛ کلید هرگز از هش
+        # رمز مشتق نمی‌شود، چون هش معمولاً در پیکربندی آشکار است و با آن می‌شد توکن جعل کرد
+        self._key = (hashlib.sha256(b"session-key:" + secret.encode()).digest() if secret
+                     else secrets.token_bytes(32))
+        self._fingerprint = hashlib.sha256(self.password_hash).hexdigest()[:16]
+        self.lockout = lockout or LockoutStore()
+        self._pool = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+
+    def _check(self, username, password):
+        import bcrypt
+        # bcrypt همیشه اجرا می‌شود تا زمان پاسخ نام کاربری درست را لو ندهد
+        password_ok = bcrypt.checkpw(password.encode(), self.password_hash)
+        return hmac.compare_digest(username.encode(), self.username.encode()) and password_ok
+
+    def verify_password_async(self, username, password):
+        """بررسی رمز در نخ جداگانه (bcrypt در حین محاسبه GIL را آزاد می‌کند)؛ خروجی Future[bool]"""
+        return self._pool.submit(self._check, username or "", password or "")
+
+    def _sign(self, body):
+        return _b64encode(hmac.new(self._key, body.encode(), hashlib.sha256).digest())
+
+    def issue_token(self, username, now=None):
+        """توکن «payload.signature» با انقضای token_ttl ثانیه"""
+        payload = {"u": username, "exp": int((now or time.time()) + self.token_ttl), "h": self._fingerprint,
+                   "n": secrets.token_hex(4)}
+        body = _b64encode(json.dumps(payload, separators=(",", ":")).encode())
+        return f"{body}.{self._sign(body)}"
+
+    def verify_token(self, token, now=None):
+        """نام کاربری توکن معتبر و منقضی‌نشده یا None"""
+        # توکن از ورودی کاربر می‌آید؛ نویسه‌های غیر ASCII هرگز در توکن معتبر نیستند
+        if not isinstance(token, str) or not token.isascii() or token.count(".") != 1:
+            return None
+        body, signature = token.split(".")
+        if not hmac.compare_digest(signature.encode(), self._sign(body).encode()):
+            return None
+        try:
+            payload = json.loads(_b64decode(body))
+        except ValueError:
+            return None
+        if not isinstance(payload, dict):
+            return None
+        if payload.get("h") != self._fingerprint or payload.get("exp", 0) < (now or time.time()):
+            return None
+        return payload.get("u")
+
+
+_shared_service = None
+_shared_service_lock = threading.Lock()
+
+
+def get_auth_service():
+    """نمونه‌ی مشترک AuthService در سطح پروسه (هش رمز فقط یک بار محاسبه یا خوانده می‌شود)"""
+    global _shared_service
+    with _shared_service_lock:
+        if _shared_service is None:
+            _shared_service = AuthService()
+        return _shared_service
@@ -0,0 +1,232 @@
+"""بک‌تست برداری قواعد امتیازدهی سیگنال و جست‌وجوی موازی پارامترها"""
+import argparse
+import itertools
+import json
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from .signals import (
+    DEFAULT_INDICATOR_WINDOWS,
+    DEFAULT_SIGNAL_RULES,
+    compute_indicators,
+    score_conditions,
+    score_from_conditions,
+)
+
+# ==================== تنظیمات ====================
+DEFAULT_FEE = 0.001  # کارمزد هر بار تغییر پوزیشن (۰.۱٪)
+INDICATOR_CACHE_SIZE = 256  # سقف اندیکاتورهای کش‌شده در هر پروسه‌ی کارگر
+CHUNK_SIZE = 32
+
+
+# ==================== شبیه‌سازی ====================
+def _forward_fill(values):
+    """پر کردن NaNها با آخرین مقدار معتبر قبلی (NaNهای ابتدایی صفر می‌شوند)"""
+    valid = ~np.isnan(values)
+    index = np.where(valid, np.arange(len(values)), 0)
+    np.maximum.accumulate(index, out=index)
+    filled = values[index]
+    filled[np.isnan(filled)] = 0.0
+    return filled
+
+
+def simulate(price, score, rules=None, fee=DEFAULT_FEE):
+    """شبیه‌سازی پوزیشن خرید از روی باندهای خرید/فروش امتیاز
+
+    ورود وقتی امتیاز به buy_threshold برسد و خروج وقتی به sell_threshold برسد؛
+    پوزیشن هر کندل روی بازده کندل بعدی اعمال می‌شود تا نگاه به آینده نداشته باشیم.
+    """
+    rules = rules or DEFAULT_SIGNAL_RULES
+    price = np.asarray(price, dtype="float64")
+    n = len(price)
+    if n < 2:
+        return {"return": 0.0, "max_drawdown": 0.0, "hit_rate": None, "trades": 0,
+                "exposure": 0.0, "buy_hold": 0.0}
+
+    state = np.where(score >= rules["buy_threshold"], 1.0,
+                     np.where(score <= rules["sell_threshold"], 0.0, np.nan))
+    position = _forward_fill(state)
+
+    returns = price[1:] / price[:-1] - 1
+    turnover = np.abs(np.diff(position, prepend=0.0))[:-1]
+    strategy = position[:-1] * returns - fee * turnover
+    log_equity = np.concatenate(([0.0], np.cumsum(np.log1p(strategy))))
+    equity = np.exp(log_equity)
+    drawdown = equity / np.maximum.accumulate(equity) - 1
+
+    # بازده هر معامله از اختلاف لگاریتم سرمایه در ورود و خروج
+    changes = np.diff(position, prepend=0.0)
+    entries = np.flatnonzero(changes > 0)
+    exits = np.flatnonzero(changes < 0)
+    exits = np.concatenate((exits, [n - 1]))[:len(entries)]
+    trade_returns = np.exp(log_equity[np.minimum(exits + 1, n - 1)] - log_equity[entries]) - 1
+
+    return {
+        "return": float(equity[-1] - 1),
+        "max_drawdown": float(drawdown.min()),
+        "hit_rate": float((trade_returns > 0).mean()) if len(trade_returns) else None,
+        "trades": int(len(entries)),
+        "exposure": float(position.mean()),
+        "buy_hold": float(price[-1] / price[0] - 1),
+    }
+
+
+def indicator_arrays(price, windows=None):
+    """آرایه‌های ورودی امتیازدهی برای یک سری قیمت و پنجره‌های مشخص"""
+    indicators = compute_indicators(pd.Series(price), windows)
+    return tuple(indicators[name].to_numpy(dtype="float64")
+                 for name in ("rsi", "sma_20", "sma_50", "macd", "macd_signal", "bb_low"))
+
+
+def backtest(price, rules=None, windows=None, fee=DEFAULT_FEE, indicators=None):
+    """بک‌تست کامل یک سری قیمت با قواعد و پنجره‌های دلخواه"""
+    rules = {**DEFAULT_SIGNAL_RULES, **(rules or {})}
+    price = np.asarray(price, dtype="float64")
+    rsi, sma_fast, sma_slow, macd, macd_signal, bb_low = indicators or indicator_arrays(price, windows)
+    conditions = score_conditions(price, rsi, sma_fast, sma_slow, macd, macd_signal, bb_low, rules)
+    return simulate(price, score_from_conditions(conditions, rules), rules, fee)
+
+
+# ==================== جست‌وجوی موازی پارامترها ====================
+# وضعیت هر پروسه‌ی کارگر؛ فقط یک بار در initializer ساخته می‌شود
+_worker_prices = {}
+_worker_shm = None
+_worker_cache = OrderedDict()
+
+
+def _init_worker(shm_name, layout):
+    """اتصال کارگر به حافظه‌ی مشترک و ساخت viewهای فقط‌خواندنی بدون کپی"""
+    global _worker_shm
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    buffer = np.ndarray((layout[-1][2],), dtype="float64", buffer=_worker_shm.buf)
+    buffer.flags.writeable = False
+    _worker_prices.clear()
+    _worker_prices.update({coin_id: buffer[start:end] for coin_id, start, end in layout})
+    _worker_cache.clear()
+
+
+def _cached_indicators(coin_id, windows):
+    key = (coin_id, tuple(sorted(windows.items())))
+    arrays = _worker_cache.get(key)
+    if arrays is None:
+        arrays = indicator_arrays(_worker_prices[coin_id], windows)
+        _worker_cache[key] = arrays
+        if len(_worker_cache) > INDICATOR_CACHE_SIZE:
+            _worker_cache.popitem(last=False)
+    else:
+        _worker_cache.move_to_end(key)
+    return arrays
+
+
+def _split_params(params):
+    windows = {k: v for k, v in params.items() if k in DEFAULT_INDICATOR_WINDOWS}
+    rules = {k: v for k, v in params.items() if k in DEFAULT_SIGNAL_RULES}
+    return windows, rules
+
+
+def _evaluate_chunk(chunk, fee):
+    """ارزیابی یک دسته از ترکیب‌ها روی همه‌ی ارزها و خلاصه‌سازی نتایج"""
+    results = []
+    for params in chunk:
+        windows, rules = _split_params(params)
+        per_coin = [
+            backtest(price, rules, fee=fee, indicators=_cached_indicators(coin_id, windows))
+            for coin_id, price in _worker_prices.items()
+        ]
+        hit_rates = [r["hit_rate"] for r in per_coin if r["hit_rate"] is not None]
+        results.append({
+            **params,
+            "return": float(np.mean([r["return"] for r in per_coin])),
+            "max_drawdown": float(np.mean([r["max_drawdown"] for r in per_coin])),
+            "worst_drawdown": float(np.min([r["max_drawdown"] for r in per_coin])),
+            "hit_rate": float(np.mean(hit_rates)) if hit_rates else None,
+            "trades": int(sum(r["trades"] for r in per_coin)),
+        })
+    return results
+
+
+def expand_grid(grid):
+    """تبدیل دیکشنری {پارامتر: لیست مقادیر} به لیست ترکیب‌ها
+
+    ترکیب‌ها بر اساس پنجره‌ها مرتب می‌شوند تا کش اندیکاتور هر کارگر بیشتر استفاده شود.
+    """
+    unknown = set(grid) - set(DEFAULT_INDICATOR_WINDOWS) - set(DEFAULT_SIGNAL_RULES)
+    if unknown:
+        raise ValueError(f"پارامتر ناشناخته: {', '.join(sorted(unknown))}")
+    names = sorted(grid, key=lambda name: (name not in DEFAULT_INDICATOR_WINDOWS, name))
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def run_sweep(price_arrays, grid, max_workers=None, fee=DEFAULT_FEE, chunk_size=CHUNK_SIZE):
+    """جست‌وجوی شبکه‌ای پارامترها روی چند ارز با Pool پروسه‌ها
+
+    price_arrays دیکشنری {coin_id: آرایه‌ی قیمت} است. قیمت‌ها یک بار در حافظه‌ی
+    مشترک کپی می‌شوند و هر کارگر فقط نام بلوک را دریافت می‌کند.
+    """
+    combos = expand_grid(grid)
+    layout, offset = [], 0
+    for coin_id, price in price_arrays.items():
+        layout.append((coin_id, offset, offset + len(price)))
+        offset += len(price)
+    if not layout or offset == 0:
+        raise ValueError("هیچ سری قیمتی برای بک‌تست وجود ندارد.")
+
+    shm = shared_memory.SharedMemory(create=True, size=offset * 8)
+    try:
+        buffer = np.ndarray((offset,), dtype="float64", buffer=shm.buf)
+        for (coin_id, start, end) in layout:
+            buffer[start:end] = np.asarray(price_arrays[coin_id], dtype="float64")
+
+        chunks = [combos[i:i + chunk_size] for i in range(0, len(combos), chunk_size)]
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(shm.name, layout)) as pool:
+            results = [row for rows in pool.map(_evaluate_chunk, chunks, itertools.repeat(fee)) for row in rows]
+        del buffer
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return pd.DataFrame(results).sort_values("return", ascending=False).reset_index(drop=True)
+
+
+# ==================== اجرای خط فرمان ====================
+def main(argv=None):
+    """اجرای جست‌وجو روی سری‌های ذخیره‌شده در HistoryStore"""
+    from .history import HistoryStore
+
+    parser = argparse.ArgumentParser(description="بک‌تست و جست‌وجوی پارامترهای سیگنال")
+    parser.add_argument("--coins", required=True, help="شناسه ارزها با کاما")
+    parser.add_argument("--vs-currency", default="usd")
+    parser.add_argument("--granularity", default="hourly", choices=["5m", "hourly", "daily"])
+    parser.add_argument("--grid", required=True, help="فایل JSON به شکل {پارامتر: [مقادیر]}")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--fee", type=float, default=DEFAULT_FEE)
+    parser.add_argument("--output", help="مسیر فایل CSV خروجی")
+    args = parser.parse_args(argv)
+
+    store = HistoryStore()
+    price_arrays = {}
+    for coin_id in filter(None, (c.strip().lower() for c in args.coins.split(","))):
+        df = store.load(coin_id, args.vs_currency, args.granularity, 0)
+        if df is not None:
+            price_arrays[coin_id] = df["price"].to_numpy()
+
+    with open(args.grid, encoding="utf-8") as fh:
+        grid = json.load(fh)
+
+    started = time.perf_counter()
+    results = run_sweep(price_arrays, grid, max_workers=args.workers, fee=args.fee)
+    print(f"{len(results)} ترکیب روی {len(price_arrays)} ارز در {time.perf_counter() - started:.1f} ثانیه")
+    if args.output:
+        results.to_csv(args.output, index=False)
+    print(results.head(20).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""کش مشترک پاسخ‌های API در سطح پروسه با TTL، حذف LRU و ادغام درخواست‌های هم‌زمان"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# ==================== تنظیمات ====================
+# TTL هر endpoint بر حسب ثانیه؛ اولین الگوی منطبق استفاده می‌شود
+DEFAULT_TTL_RULES = [
+    (r"/market_chart/range$", 60),
+    (r"/market_chart$", 120),
+    (r"/coins/markets$", 120),
+    (r"/coins/list$", 3600),
+    (r"/coins/[^/]+$", 600),
+    (r"api\.alternative\.me/fng", 3600),
+]
+DEFAULT_TTL = 60
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class _Flight:
+    """درخواست در حال اجرا که بقیه‌ی فراخوان‌ها منتظر نتیجه‌ی آن می‌مانند"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.diagnostics = []  # پیام‌های (level, message) رهبر برای بازپخش به منتظرها
+
+
+# ==================== ماژول کش پاسخ ====================
+class ResponseCache:
+    """کش LRU با محدودیت حافظه که هر کلید را فقط یک بار از منبع می‌گیرد"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, ttl_rules=None, default_ttl=DEFAULT_TTL):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.ttl_rules = [(re.compile(pattern), ttl) for pattern, ttl in (ttl_rules or DEFAULT_TTL_RULES)]
+        self._entries = OrderedDict()  # key -> (expires_at, nbytes, value)
+        self._inflight = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def make_key(url, params=None):
+        return url, tuple(sorted((params or {}).items()))
+
+    def ttl_for(self, url):
+        for pattern, ttl in self.ttl_rules:
+            if pattern.search(url):
+                return ttl
+        return self.default_ttl
+
+    def get_or_fetch(self, url, params, fetch, replay=None):
+        """بازگرداندن پاسخ کش‌شده یا اجرای fetch فقط یک بار
+
+        fetch(report) خروجی (value, nbytes) دارد و پیام‌هایش را با report(level, message) هم ثبت می‌کند؛
+        فراخوان‌های ادغام‌شده همان پیام‌ها را با replay(level, message) دریافت می‌کنند تا مثلاً علت
+        شکست درخواست مشترک برای همه نمایش داده شود.
+        """
+        key = self.make_key(url, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[2]
+                self._drop(key)
+
+            flight = self._inflight.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                flight = self._inflight[key] = _Flight()
+                self.misses += 1
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if replay is not None:
+                for level, message in flight.diagnostics:
+                    replay(level, message)
+            return flight.value
+
+        value = None
+        try:
+            value, nbytes = fetch(lambda level, message: flight.diagnostics.append((level, message)))
+            if value is not None:
+                self._store(key, value, nbytes, self.ttl_for(url))
+        finally:
+            flight.value = value
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+        return value
+
+    def _store(self, key, value, nbytes, ttl):
+        if ttl <= 0 or nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + ttl, nbytes, value)
+            self._bytes += nbytes
+            # حذف کم‌استفاده‌ترین پاسخ‌ها تا رسیدن به سقف حافظه
+            while self._bytes > self.max_bytes and self._entries:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key):
+        _, nbytes, _ = self._entries.pop(key)
+        self._bytes -= nbytes
+
+    def invalidate(self, url=None, params=None):
+        """حذف یک پاسخ یا کل کش"""
+        with self._lock:
+            if url is None:
+                self._entries.clear()
+                self._bytes = 0
+            elif self.make_key(url, params) in self._entries:
+                self._drop(self.make_key(url, params))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+            }
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """نمونه‌ی مشترک ResponseCache در سطح پروسه"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            max_mb = float(os.environ.get("RESPONSE_CACHE_MAX_MB", DEFAULT_MAX_BYTES / (1024 * 1024)))
+            _shared_cache = ResponseCache(max_bytes=int(max_mb * 1024 * 1024))
+        return _shared_cache
@@ -0,0 +1,142 @@
+"""اجرای دسته‌ای تحلیل برای لیستی از ارزها و نوشتن خروجی JSON یا CSV (بدون رابط کاربری)"""
+import argparse
+import csv
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from .alerts import AlertEngine, AlertRuleStore, sinks_from_env
+from .analysis import TechnicalAnalyzer
+from .coin_index import get_coin_index, unknown_coin_message
+from .fetcher import DataFetcher
+from .pipeline import WATCHLIST_MAX_WORKERS, WatchlistScanner
+from .precompute import DEFAULT_INTERVAL_SECONDS, PrecomputeScheduler
+
+# ==================== تنظیمات ====================
+OUTPUT_FIELDS = ["ارز", "سیگنال", "امتیاز", "اطمینان", "RSI", "قیمت", "SMA_20", "MACD", "دلایل", "خطا"]
+
+
+# ==================== تحلیل دسته‌ای ====================
+def analyze_coin(coin_id, vs_currency="usd", days=30, notify=None):
+    """دریافت و تحلیل کامل یک ارز؛ خطاها در کلید «خطا» برگردانده می‌شوند"""
+    fetcher = DataFetcher(notify=notify)
+    df = fetcher.get_coin_data(coin_id, vs_currency, days)
+    if df is None:
+        result = {"سیگنال": "خطای دریافت", "اطمینان": 0}
+    else:
+        result = TechnicalAnalyzer.analyze(df)
+
+    errors = [message for level, message in fetcher.messages if level == "error"]
+    row = {field: result.get(field) for field in OUTPUT_FIELDS}
+    row["ارز"] = coin_id
+    row["دلایل"] = result.get("دلایل", [])
+    row["خطا"] = result.get("خطا") or (errors[-1] if errors else "")
+    return row
+
+
+def unknown_coin_row(coin_id, suggestions=()):
+    """ردیف خطا برای شناسه‌ای که در نمایه‌ی محلی نیست (بدون هیچ درخواست API)"""
+    row = {field: None for field in OUTPUT_FIELDS}
+    row.update({"ارز": coin_id, "سیگنال": "شناسه نامعتبر", "اطمینان": 0, "دلایل": [],
+                "خطا": unknown_coin_message(coin_id, suggestions)})
+    return row
+
+
+def analyze_coins(coin_ids, vs_currency="usd", days=30, max_workers=WATCHLIST_MAX_WORKERS, notify=None):
+    """تحلیل هم‌زمان چند ارز؛ ترتیب خروجی همان ترتیب ورودی است"""
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(lambda coin_id: analyze_coin(coin_id, vs_currency, days, notify), coin_ids))
+
+
+def write_rows(rows, fh, fmt="json"):
+    """نوشتن ردیف‌ها در قالب json یا csv (دلایل در CSV با « | » به هم چسبانده می‌شوند)"""
+    if fmt == "csv":
+        writer = csv.DictWriter(fh, fieldnames=OUTPUT_FIELDS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({**row, "دلایل": " | ".join(row["دلایل"])})
+    else:
+        json.dump(rows, fh, ensure_ascii=False, indent=2)
+        fh.write("\n")
+
+
+# ==================== اجرای خط فرمان ====================
+def _stderr_notify(level, message):
+    print(f"[{level}] {message}", file=sys.stderr)
+
+
+def main(argv=None):
+    """python -m crypto_core bitcoin ethereum --format csv --output signals.csv
+
+    python -m crypto_core bitcoin ethereum --precompute --interval 300  # کارگر پیش‌محاسبه‌ی داشبورد
+    python -m crypto_core --alerts --interval 300  # کارگر هشدار با قواعد ALERT_RULES_PATH
+    """
+    parser = argparse.ArgumentParser(description="تحلیل دسته‌ای سیگنال ارزها")
+    parser.add_argument("coins", nargs="*", help="شناسه ارزها (جداشده با فاصله یا کاما)")
+    parser.add_argument("--coins-file", help="فایل متنی شناسه‌ها (هر خط یا جداشده با کاما)")
+    parser.add_argument("--vs-currency", default="usd")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--format", choices=["json", "csv"], default="json")
+    parser.add_argument("--output", help="مسیر فایل خروجی (پیش‌فرض: خروجی استاندارد)")
+    parser.add_argument("--workers", type=int, default=WATCHLIST_MAX_WORKERS)
+    parser.add_argument("--precompute", action="store_true",
+                        help="اجرای کارگر پیش‌محاسبه و نوشتن نتایج در مخزن مشترک داشبورد")
+    parser.add_argument("--alerts", action="store_true",
+                        help="اجرای کارگر هشدار با قواعد ذخیره‌شده و مقصدهای ALERT_SINKS")
+    parser.add_argument("--interval", type=int, default=DEFAULT_INTERVAL_SECONDS,
+                        help="فاصله‌ی دورهای پیش‌محاسبه بر حسب ثانیه (۰ یعنی فقط یک دور)")
+    args = parser.parse_args(argv)
+
+    if args.alerts:
+        # اولین دریافت هر سری فقط حالت را می‌سازد، پس اجرای تک‌دوره‌ای معنا ندارد
+        if args.interval <= 0:
+            parser.error("کارگر هشدار به --interval مثبت نیاز دارد.")
+        engine = AlertEngine(store=AlertRuleStore(), sinks=sinks_from_env(),
+                             interval=args.interval, max_workers=args.workers)
+        for error in engine.errors:
+            _stderr_notify("warning", error)
+        if not engine.rules():
+            _stderr_notify("error", "هیچ قاعده‌ی هشداری تعریف نشده است.")
+            return 1
+        engine.run_forever()
+        return 0
+
+    text = ",".join(args.coins)
+    if args.coins_file:
+        with open(args.coins_file, encoding="utf-8") as fh:
+            text += "," + fh.read()
+    coin_ids = WatchlistScanner.parse_coin_ids(text)
+    if not coin_ids:
+        parser.error("حداقل یک شناسه ارز لازم است.")
+
+    # نمادها و نام‌ها به شناسه تبدیل و شناسه‌های ناشناخته پیش از هر درخواست کنار گذاشته می‌شوند
+    unknown = {}
+    coin_index = get_coin_index()
+    if coin_index is not None:
+        coin_ids, unknown = coin_index.partition(coin_ids)
+        for text, suggestions in unknown.items():
+            _stderr_notify("error", unknown_coin_message(text, suggestions))
+
+    if args.precompute:
+        if not coin_ids:
+            return 1
+        scheduler = PrecomputeScheduler(coin_ids, args.vs_currency, [args.days], args.interval,
+                                        max_workers=args.workers, notify=_stderr_notify)
+        if args.interval <= 0:
+            return 0 if scheduler.run_once() else 1
+        scheduler.run_forever()
+        return 0
+
+    rows = analyze_coins(coin_ids, args.vs_currency, args.days, args.workers, notify=_stderr_notify)
+    rows += [unknown_coin_row(text, suggestions) for text, suggestions in unknown.items()]
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as fh:
+            write_rows(rows, fh, args.format)
+    else:
+        write_rows(rows, sys.stdout, args.format)
+    # کد خروج غیرصفر وقتی هیچ ارزی تحلیل نشد
+    return 0 if any(not row["خطا"] for row in rows) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,287 @@
+"""نمایه‌ی محلی شناسه‌های CoinGecko برای جست‌وجوی پیشوندی/تقریبی و رد شناسه‌های نامعتبر بدون درخواست شبکه"""
+import bisect
+import difflib
+import gzip
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+from .fetcher import DataFetcher
+from .metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# ==================== تنظیمات ====================
+DEFAULT_INDEX_PATH = os.path.join(".cache", "coin_list.json.gz")
+DEFAULT_REFRESH_SECONDS = 24 * 60 * 60  # لیست ارزها روزانه چند ده ورودی تغییر می‌کند
+RETRY_SECONDS = 5 * 60  # فاصله‌ی تلاش دوباره پس از شکست دریافت لیست
+RANKED_COINS = 250  # رتبه‌ی ارزش بازار برای ترجیح bitcoin بر توکن‌های هم‌نماد «btc»
+DEFAULT_SEARCH_LIMIT = 10
+FUZZY_CANDIDATES = 50  # تعداد نامزدهای سه‌حرفی که با difflib دوباره امتیازدهی می‌شوند
+FUZZY_MIN_RATIO = 0.7
+
+
+def _normalize(text):
+    return " ".join(str(text or "").lower().split())
+
+
+def _trigrams(text):
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def unknown_coin_message(text, suggestions=()):
+    """پیام خطای شناسه‌ی ناشناخته همراه با پیشنهادهای نزدیک"""
+    message = f"شناسه «{text}» در لیست ارزهای CoinGecko نیست."
+    if suggestions:
+        message += f" منظورتان {' یا '.join(suggestions)} است؟"
+    return message
+
+
+# ==================== ساختار جست‌وجو ====================
+class CoinIndex:
+    """نمایه‌ی درون‌حافظه‌ای id، symbol و name همه‌ی ارزها
+
+    - لیست مرتب کلیدها برای جست‌وجوی پیشوندی با bisect
+    - نگاشت نماد و نام به شناسه‌ها به ترتیب اولویت (رتبه‌ی بازار، سپس کوتاهی شناسه)
+    - نمایه‌ی سه‌حرفی‌ها برای یافتن نامزدهای غلط تایپی که با difflib مرتب می‌شوند
+    """
+
+    def __init__(self, coins, ranks=None):
+        ranks = ranks or {}
+        rows = {}
+        for coin in coins:
+            coin_id = _normalize(coin.get("id"))
+            if coin_id:
+                rows[coin_id] = (_normalize(coin.get("symbol")), str(coin.get("name") or coin_id))
+        # اولویت: ارزهای رتبه‌دار به ترتیب رتبه، سپس شناسه‌های کوتاه‌تر (معمولاً پروژه‌ی اصلی)
+        self.ids = sorted(rows, key=lambda coin_id: (ranks.get(coin_id, float("inf")), len(coin_id), coin_id))
+        self.symbols = [rows[coin_id][0] for coin_id in self.ids]
+        self.names = [rows[coin_id][1] for coin_id in self.ids]
+        self.ranks = {coin_id: ranks[coin_id] for coin_id in self.ids if coin_id in ranks}
+        self._position = {coin_id: i for i, coin_id in enumerate(self.ids)}
+
+        self._by_symbol, self._by_name = {}, {}
+        keys = []
+        trigrams = {}
+        for i, (coin_id, symbol, name) in enumerate(zip(self.ids, self.symbols, self.names)):
+            name = _normalize(name)
+            self._by_symbol.setdefault(symbol, []).append(i)
+            self._by_name.setdefault(name, []).append(i)
+            for key in {coin_id, symbol, name}:
+                if key:
+                    keys.append((key, i))
+            for gram in _trigrams(coin_id) | _trigrams(name):
+                trigrams.setdefault(gram, []).append(i)
+        keys.sort()
+        self._keys = [key for key, _ in keys]
+        self._key_positions = [i for _, i in keys]
+        self._trigrams = trigrams
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, coin_id):
+        return _normalize(coin_id) in self._position
+
+    def describe(self, coin_id):
+        """{"id", "symbol", "name", "rank"} یا None"""
+        i = self._position.get(_normalize(coin_id))
+        if i is None:
+            return None
+        return {"id": self.ids[i], "symbol": self.symbols[i].upper(), "name": self.names[i],
+                "rank": self.ranks.get(self.ids[i])}
+
+    def label(self, coin_id):
+        """برچسب نمایشی «Bitcoin (BTC) — bitcoin»"""
+        info = self.describe(coin_id)
+        if info is None:
+            return coin_id
+        return f"{info['name']} ({info['symbol']}) — {info['id']}"
+
+    def resolve(self, text):
+        """شناسه‌ی متناظر با شناسه، نماد یا نام دقیق (با بیشترین اولویت) یا None"""
+        query = _normalize(text)
+        if query in self._position:
+            return query
+        for table in (self._by_symbol, self._by_name):
+            matches = table.get(query)
+            if matches:
+                return self.ids[matches[0]]
+        return None
+
+    def _prefix(self, query, limit):
+        start = bisect.bisect_left(self._keys, query)
+        end = bisect.bisect_left(self._keys, query + "\uffff", lo=start)
+        return heapq.nsmallest(limit, set(self._key_positions[start:end]))
+
+    def _fuzzy(self, query, limit):
+        counts = Counter()
+        for gram in _trigrams(query):
+            counts.update(self._trigrams.get(gram, ()))
+        scored = []
+        for i, _ in counts.most_common(FUZZY_CANDIDATES):
+            ratio = max(difflib.SequenceMatcher(None, query, key).ratio()
+                        for key in (self.ids[i], _normalize(self.names[i])))
+            if ratio >= FUZZY_MIN_RATIO:
+                scored.append((-ratio, i))
+        return [i for _, i in sorted(scored)[:limit]]
+
+    def search(self, text, limit=DEFAULT_SEARCH_LIMIT):
+        """شناسه‌ها به ترتیب: تطابق دقیق، پیشوند شناسه/نماد/نام، سپس نزدیک‌ترین غلط‌های تایپی"""
+        query = _normalize(text)
+        if not query:
+            return self.ids[:limit]
+        with get_metrics().span("coin_index.search"):
+            found = []
+            exact = self.resolve(query)
+            if exact:
+                found.append(self._position[exact])
+            for i in self._prefix(query, limit):
+                if i not in found:
+                    found.append(i)
+            if len(found) < limit and len(query) >= 3:
+                for i in self._fuzzy(query, limit):
+                    if i not in found:
+                        found.append(i)
+            return [self.ids[i] for i in found[:limit]]
+
+    def partition(self, texts):
+        """(شناسه‌های معتبر، {ورودی ناشناخته: پیشنهادها}) برای لیست ورودی کاربر؛ نماد و نام هم پذیرفته می‌شوند"""
+        known, unknown = [], {}
+        for text in texts:
+            coin_id = self.resolve(text)
+            if coin_id is None:
+                unknown[text] = self.search(text, limit=3)
+            elif coin_id not in known:
+                known.append(coin_id)
+        return known, unknown
+
+
+# ==================== دریافت و نگهداری نمایه ====================
+class CoinDirectory:
+    """نمایه‌ی ذخیره‌شده روی دیسک که پس از کهنه شدن در پس‌زمینه از /coins/list تازه می‌شود
+
+    فقط اولین اجرای بدون فایل منتظر دریافت می‌ماند؛ اگر لیست در دسترس نباشد index() خروجی None دارد
+    و فراخواننده‌ها بدون بررسی محلی ادامه می‌دهند.
+    """
+
+    def __init__(self, path=None, refresh_seconds=None, fetcher_factory=DataFetcher):
+        self.path = path or os.environ.get("COIN_INDEX_PATH", DEFAULT_INDEX_PATH)
+        self.refresh_seconds = refresh_seconds or int(
+            os.environ.get("COIN_INDEX_REFRESH_SECONDS", DEFAULT_REFRESH_SECONDS))
+        self.fetcher_factory = fetcher_factory
+        self.fetched_at = None
+        self._index = None
+        self._failed_at = None
+        self._loaded = False
+        self._refreshing = None
+        self._lock = threading.Lock()
+
+    def _read(self):
+        """بارگذاری فایل ذخیره‌شده (یک بار در عمر پروسه)"""
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return
+        try:
+            with gzip.open(self.path, "rb") as fh:
+                payload = json.loads(fh.read())
+            coins = [{"id": c, "symbol": s, "name": n} for c, s, n in payload["coins"]]
+            self._index = CoinIndex(coins, payload.get("ranks"))
+            self.fetched_at = payload["fetched_at"]
+        except (OSError, ValueError, KeyError, TypeError):
+            logger.warning("فایل نمایه‌ی ارزها خوانا نیست؛ دوباره دریافت می‌شود", exc_info=True)
+
+    def _write(self, coins, ranks, fetched_at):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        payload = {
+            "fetched_at": fetched_at,
+            "coins": [[c.get("id"), c.get("symbol"), c.get("name")] for c in coins],
+            "ranks": ranks,
+        }
+        # نوشتن در فایل موقت و جایگزینی اتمی تا پروسه‌های دیگر فایل نیمه‌کاره نخوانند
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with gzip.open(temporary, "wb") as fh:
+            fh.write(json.dumps(payload, separators=(",", ":")).encode())
+        os.replace(temporary, self.path)
+
+    def refresh(self):
+        """دریافت /coins/list (و رتبه‌ی ارزهای برتر) و جایگزینی نمایه؛ خروجی True در صورت موفقیت"""
+        fetcher = self.fetcher_factory()
+        with get_metrics().span("coin_index.refresh"):
+            coins = fetcher.get_coin_list()
+            if not coins or not isinstance(coins, list):
+                with self._lock:
+                    self._failed_at = time.time()
+                return False
+            markets = fetcher.get_markets(top_n=RANKED_COINS) or []
+            ranks = {row["id"]: row["market_cap_rank"] for row in markets
+                     if row.get("id") and row.get("market_cap_rank")}
+            index = CoinIndex(coins, ranks)
+        fetched_at = time.time()
+        try:
+            self._write(coins, ranks, fetched_at)
+        except OSError:
+            logger.warning("ذخیره‌ی نمایه‌ی ارزها ممکن نشد", exc_info=True)
+        with self._lock:
+            self._index, self.fetched_at, self._failed_at = index, fetched_at, None
+        return True
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception("به‌روزرسانی نمایه‌ی ارزها ناموفق بود")
+            with self._lock:
+                self._failed_at = time.time()
+
+    def index(self, wait=True):
+        """نمایه‌ی فعلی یا None
+
+        نمایه‌ی کهنه فوراً برگردانده و در یک نخ پس‌زمینه تازه می‌شود. بدون نمایه و با wait=True
+        (فقط اولین بار در پروسه یا پس از پایان فاصله‌ی تلاش دوباره) منتظر دریافت می‌ماند.
+        """
+        with self._lock:
+            if not self._loaded:
+                self._read()
+            index, fetched_at, failed_at = self._index, self.fetched_at, self._failed_at
+            now = time.time()
+            stale = fetched_at is None or now - fetched_at > self.refresh_seconds
+            retry_due = failed_at is None or now - failed_at > RETRY_SECONDS
+            refreshing = self._refreshing is not None and self._refreshing.is_alive()
+            if not stale or not retry_due or refreshing:
+                return index
+            if index is not None or not wait:
+                self._refreshing = threading.Thread(target=self._refresh_in_background,
+                                                    name="coin-index", daemon=True)
+                self._refreshing.start()
+                return index
+            # بقیه‌ی نخ‌ها در این فاصله بدون نمایه ادامه می‌دهند
+            self._refreshing = threading.current_thread()
+        self._refresh_in_background()
+        with self._lock:
+            return self._index
+
+
+_shared_directory = None
+_shared_directory_lock = threading.Lock()
+
+
+def get_coin_directory():
+    """نمونه‌ی مشترک CoinDirectory در سطح پروسه"""
+    global _shared_directory
+    with _shared_directory_lock:
+        if _shared_directory is None:
+            _shared_directory = CoinDirectory()
+        return _shared_directory
+
+
+def get_coin_index(wait=True):
+    """نمایه‌ی مشترک ارزها یا None وقتی لیست در دسترس نیست (بررسی محلی نادیده گرفته می‌شود)"""
+    return get_coin_directory().index(wait)
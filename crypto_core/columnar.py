@@ -0,0 +1,130 @@
+"""تبدیل مستقیم پاسخ market_chart به آرایه‌های پیوسته‌ی NumPy (بدون ساخت تاپل برای هر نقطه)"""
+import json
+import re
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+_SECTION_RE = re.compile(rb'"(prices|total_volumes|market_caps)"\s*:\s*\[')
+_SECTION_END_RE = re.compile(rb"\]\s*\]")
+_WHITESPACE = b" \t\r\n"
+
+
+class MarketChart(NamedTuple):
+    """سری‌های هم‌تراز یک پاسخ market_chart؛ ts بر حسب میلی‌ثانیه و بقیه با NaN برای نقاط جاافتاده"""
+
+    ts: np.ndarray
+    price: np.ndarray
+    volume: np.ndarray
+    market_cap: np.ndarray
+
+    def __len__(self):
+        return len(self.ts)
+
+    @property
+    def nbytes(self):
+        return sum(column.nbytes for column in self)
+
+
+def _pairs_to_array(pairs):
+    """لیست [ts, value] به آرایه‌ی (n, 2) با یک تبدیل در C؛ مقدار null به NaN تبدیل می‌شود"""
+    if isinstance(pairs, np.ndarray):
+        return pairs
+    if not pairs:
+        return np.empty((0, 2), dtype="float64")
+    # timestampهای میلی‌ثانیه‌ای تا 2^53 در float64 دقیق می‌مانند
+    return np.array(pairs, dtype="float64").reshape(-1, 2)
+
+
+def _align(ts, pairs, dtype):
+    """مقادیر یک سری روی محور زمانی ts؛ نقاط بدون timestamp منطبق NaN می‌شوند"""
+    array = _pairs_to_array(pairs)
+    out = np.full(len(ts), np.nan, dtype=dtype)
+    if not len(array) or not len(ts):
+        return out
+    other_ts = array[:, 0].astype("int64")
+    order = np.argsort(other_ts, kind="stable")
+    other_ts = other_ts[order]
+    position = np.minimum(np.searchsorted(other_ts, ts), len(other_ts) - 1)
+    matched = other_ts[position] == ts
+    out[matched] = array[order[position[matched]], 1]
+    return out
+
+
+def from_pairs(prices, volumes=None, market_caps=None, dtype="float64"):
+    """ساخت MarketChart از لیست‌های [ts, value]؛ محور زمانی همان قیمت‌های معتبر است
+
+    نقاط بدون قیمت حذف، timestampهای تکراری (آخرین مقدار) یکتا و سری بر اساس زمان مرتب می‌شود.
+    """
+    array = _pairs_to_array(prices)
+    array = array[~np.isnan(array[:, 1])]
+    ts = array[:, 0].astype("int64")
+    price = array[:, 1]
+    if len(ts) > 1 and not (np.diff(ts) > 0).all():
+        # مرتب‌سازی پایدار و نگه داشتن آخرین مقدار هر timestamp
+        order = np.argsort(ts, kind="stable")
+        ts, price = ts[order], price[order]
+        last = np.append(ts[1:] != ts[:-1], True)
+        ts, price = ts[last], price[last]
+
+    return MarketChart(
+        ts=np.ascontiguousarray(ts),
+        price=np.ascontiguousarray(price, dtype=dtype),
+        volume=_align(ts, volumes, dtype),
+        market_cap=_align(ts, market_caps, dtype),
+    )
+
+
+def _decode_sections(raw):
+    """خواندن اعداد هر سری مستقیماً از بایت‌های پاسخ با np.fromstring (بدون شیء پایتونی برای هر عدد)
+
+    اگر ساختار غیرمنتظره باشد (مثلاً null در داده) None برمی‌گرداند تا مسیر json استفاده شود.
+    """
+    sections = {}
+    for match in _SECTION_RE.finditer(raw):
+        start = match.end()
+        while start < len(raw) and raw[start] in _WHITESPACE:
+            start += 1
+        if raw[start:start + 1] == b"]":
+            sections[match.group(1).decode()] = np.empty((0, 2), dtype="float64")
+            continue
+        end = _SECTION_END_RE.search(raw, start)
+        if end is None:
+            return None
+        body = raw[start:end.start() + 1].translate(None, b"[]" + _WHITESPACE)
+        if b"null" in body:
+            return None
+        try:
+            values = np.fromstring(body, dtype="float64", sep=",")
+        except (ValueError, DeprecationWarning):
+            # نسخه‌های قدیمی‌تر NumPy به جای خطا هشدار منسوخ‌شدن می‌دهند (که با -W error خطا می‌شود)
+            return None
+        if len(values) != body.count(b",") + 1 or len(values) % 2:
+            return None
+        sections[match.group(1).decode()] = values.reshape(-1, 2)
+    return sections if "prices" in sections else None
+
+
+def parse_market_chart(payload, dtype="float64"):
+    """تبدیل پاسخ market_chart (بایت، متن یا dict) به MarketChart با dtype دلخواه (float64 یا float32)"""
+    if isinstance(payload, str):
+        payload = payload.encode()
+    if isinstance(payload, (bytes, bytearray)):
+        payload = _decode_sections(bytes(payload)) or json.loads(payload)
+    payload = payload or {}
+    return from_pairs(payload.get("prices"), payload.get("total_volumes"), payload.get("market_caps"), dtype)
+
+
+def to_frame(chart, columns=("price", "volume", "market_cap")):
+    """DataFrame با ایندکس timestamp روی همان بافرهای آرایه‌ها (بدون کپی)
+
+    ستون‌هایی که همه‌ی مقادیرشان NaN است حذف می‌شوند.
+    """
+    index = pd.DatetimeIndex(chart.ts.view("datetime64[ms]"), copy=False, name="timestamp")
+    data = {}
+    for name in columns:
+        values = getattr(chart, name)
+        if name == "price" or not np.isnan(values).all():
+            data[name] = values
+    return pd.DataFrame(data, index=index, copy=False)
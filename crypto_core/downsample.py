@@ -0,0 +1,64 @@
+"""کاهش نقاط نمودار در سمت سرور با حفظ شکل منحنی (LTTB) و تجمیع سطلی حجم"""
+import numpy as np
+
+# ==================== تنظیمات ====================
+DEFAULT_TARGET_POINTS = 1200  # تقریباً عرض پیکسلی یک نمودار تمام‌عرض
+WEBGL_MIN_POINTS = 2000  # از این تعداد نقطه‌ی خام به بعد از Scattergl استفاده می‌شود
+
+
+def _as_float(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype("int64").astype("float64")
+    return x.astype("float64")
+
+
+def lttb_indices(y, threshold=DEFAULT_TARGET_POINTS, x=None):
+    """اندیس نقاط منتخب الگوریتم Largest-Triangle-Three-Buckets
+
+    اولین و آخرین نقطه همیشه حفظ می‌شوند؛ از هر سطل میانی نقطه‌ای انتخاب می‌شود
+    که بیشترین مساحت مثلث را با نقطه‌ی انتخابی قبلی و میانگین سطل بعدی بسازد.
+    """
+    y = np.asarray(y, dtype="float64")
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.arange(n, dtype="float64") if x is None else _as_float(x)
+    edges = np.linspace(1, n - 1, threshold - 1).astype("int64")
+    selected = np.empty(threshold, dtype="int64")
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x = x[edges[i + 1]:edges[i + 2]].mean()
+            next_y = np.nanmean(y[edges[i + 1]:edges[i + 2]])
+        else:
+            next_x, next_y = x[n - 1], y[n - 1]
+        area = np.abs(
+            (x[a] - next_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (next_y - y[a])
+        )
+        a = start + int(np.nanargmax(area)) if not np.isnan(area).all() else start
+        selected[i + 1] = a
+    return selected
+
+
+def bucket_aggregate(x, y, buckets=DEFAULT_TARGET_POINTS, how="max"):
+    """تجمیع سری در سطل‌های هم‌اندازه (max یا sum)؛ x هر سطل اولین x آن است"""
+    y = np.asarray(y, dtype="float64")
+    n = len(y)
+    if buckets >= n:
+        return np.asarray(x), y
+    starts = np.linspace(0, n, buckets, endpoint=False).astype("int64")
+    filled = np.nan_to_num(y, nan=0.0)
+    reducer = np.maximum if how == "max" else np.add
+    return np.asarray(x)[starts], reducer.reduceat(filled, starts)
+
+
+def downsample_frame(df, column, start=None, end=None, target_points=DEFAULT_TARGET_POINTS):
+    """برش بازه‌ی [start, end] و کاهش نقاط ستون با LTTB؛ خروجی زیرمجموعه‌ای از سطرهای df"""
+    window = df.loc[start:end] if start is not None or end is not None else df
+    indices = lttb_indices(window[column].to_numpy(), target_points, window.index.to_numpy())
+    return window.iloc[indices]
@@ -0,0 +1,241 @@
+"""دریافت داده‌های کوین‌گکو و شاخص ترس و طمع بدون وابستگی به رابط کاربری"""
+import os
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+from .cache import get_response_cache
+from .columnar import parse_market_chart
+from .history import GRANULARITY_STEPS_MS, MAX_TAIL_MS, get_history_store, granularity_for_days
+from .metrics import get_metrics
+from .transport import backoff_delay, get_rate_limiter, get_session
+
+# ==================== تنظیمات ====================
+MARKETS_PER_PAGE = 250  # بیشترین per_page مجاز در /coins/markets
+
+
+# ==================== ماژول دریافت داده ====================
+class DataFetcher:
+    """دریافت امن و مدیریت خطا برای داده‌های کوین‌گکو"""
+
+    def __init__(self, notify=None):
+        self.api_key = os.environ.get("COINGECKO_API_KEY", "CG-YOUR-DEMO-KEY")
+        # آدرس‌ها برای اجرا روی سرور آزمایشی محلی (بنچمارک) قابل تغییرند
+        self.base_url = os.environ.get("COINGECKO_BASE_URL", "https://api.coingecko.com/api/v3")
+        self.fear_greed_url = os.environ.get("FEAR_GREED_URL", "https://api.alternative.me/fng/")
+        self.headers = {"x-cg-demo-api-key": self.api_key} if self.api_key != "CG-YOUR-DEMO-KEY" else {}
+        self.history = get_history_store()
+        self.cache = get_response_cache()
+        self.metrics = get_metrics()
+        # اگر آخرین نقطه‌ی ذخیره‌شده تازه‌تر از این باشد، درخواستی ارسال نمی‌شود
+        self.min_refresh_seconds = 60
+        # بیشترین انتظار برای سهمیه‌ی نرخ پیش از صرف‌نظر از درخواست
+        self.max_wait_seconds = 15
+        # پیام‌ها همیشه جمع‌آوری می‌شوند؛ notify(level, message) در صورت وجود بلافاصله صدا زده می‌شود
+        self.notify = notify
+        self.messages = []
+
+    def _notify(self, level, message):
+        """ثبت پیام و ارسال آن به notify (مثلاً رابط کاربری یا stderr)"""
+        self.messages.append((level, message))
+        if self.notify:
+            self.notify(level, message)
+
+    def _make_request(self, url, params=None, max_retries=3, parse=None):
+        """تابع اصلی درخواست؛ پاسخ‌ها بین همه‌ی کاربران پروسه کش و درخواست‌های هم‌زمان ادغام می‌شوند
+
+        parse(بدنه‌ی خام) در صورت وجود به جای response.json() استفاده می‌شود.
+        """
+        return self.cache.get_or_fetch(url, params,
+                                       lambda report: self._fetch(url, params, max_retries, parse, report),
+                                       replay=self._notify)
+
+    def _fetch(self, url, params=None, max_retries=3, parse=None, report=None):
+        """ارسال درخواست با قابلیت تلاش مجدد؛ خروجی (داده، حجم داده در حافظه به بایت)
+
+        تأخیر کل، وضعیت نهایی، تعداد تلاش مجدد و زمان انتظار هر درخواست در metrics ثبت می‌شود.
+        پیام‌ها علاوه بر این نمونه به report هم داده می‌شوند تا به درخواست‌های ادغام‌شده برسند.
+        """
+        def notify(level, message):
+            self._notify(level, message)
+            if report is not None:
+                report(level, message)
+
+        host = urlsplit(url).netloc
+        session = get_session(host)
+        limiter = get_rate_limiter(host)
+        started = time.perf_counter()
+        attempts, slept, status, nbytes = 0, 0.0, None, 0
+
+        try:
+            for attempt in range(max_retries):
+                attempts = attempt + 1
+                # زمان‌بندی درخواست پیش از ارسال به جای واکنش به 429
+                wait_started = time.perf_counter()
+                acquired = limiter.acquire(max_wait=self.max_wait_seconds)
+                slept += time.perf_counter() - wait_started
+                if not acquired:
+                    status = "throttled"
+                    notify("warning", f"⏳ سهمیه درخواست‌های {host} موقتاً پر است. کمی بعد دوباره تلاش کنید.")
+                    break
+
+                try:
+                    response = session.get(url, headers=self.headers, params=params, timeout=20)
+                    status = response.status_code
+
+                    # بررسی خطای محدودیت نرخ (429)
+                    if response.status_code == 429:
+                        wait_time = backoff_delay(attempt, response.headers.get("Retry-After"), base=5)
+                        limiter.penalize(wait_time)  # توقف درخواست‌های بقیه‌ی کاربران به همین میزبان
+                        notify("warning", f"⏳ درخواست شما محدود شده است. {wait_time:.0f} ثانیه صبر کنید... (تلاش {attempt+1}/{max_retries})")
+                        continue
+
+                    response.raise_for_status()  # بررسی سایر خطاهای HTTP
+                    nbytes = len(response.content)
+                    if parse is None:
+                        return response.json(), nbytes
+                    with self.metrics.span("decode"):
+                        value = parse(response.content)
+                    return value, getattr(value, "nbytes", nbytes)
+
+                except requests.exceptions.Timeout:
+                    status = "timeout"
+                    notify("warning", f"⏱️ درخواست timeout شد. تلاش مجدد... ({attempt+1}/{max_retries})")
+                except requests.exceptions.ConnectionError:
+                    status = "connection_error"
+                    notify("warning", f"🔌 خطای اتصال. تلاش مجدد... ({attempt+1}/{max_retries})")
+                    delay = backoff_delay(attempt)
+                    time.sleep(delay)
+                    slept += delay
+                except requests.exceptions.RequestException as e:
+                    notify("error", f"🚫 خطای شبکه: {str(e)[:100]}")
+                    break
+
+            notify("error", "❌ پس از چندین تلاش، دریافت داده ممکن نشد.")
+            return None, 0
+        finally:
+            self.metrics.record_call(url, status or "error", time.perf_counter() - started,
+                                     retries=max(0, attempts - 1), sleep=slept, nbytes=nbytes)
+
+    def _load_price_history(self, coin_id, vs_currency, days):
+        """خواندن سری از ذخیره‌ی محلی و دریافت فقط بخش جاافتاده‌ی انتهای آن"""
+        granularity = granularity_for_days(days)
+        now_ms = int(time.time() * 1000)
+        window_start = now_ms - days * 24 * 60 * 60 * 1000
+        step = GRANULARITY_STEPS_MS[granularity]
+        max_tail = MAX_TAIL_MS[granularity]
+
+        coverage = self.history.coverage(coin_id, vs_currency, granularity)
+        covered = (
+            coverage is not None
+            and coverage[0] <= window_start + step
+            and (max_tail is None or now_ms - coverage[1] <= max_tail)
+        )
+
+        if covered:
+            last_ts = coverage[1]
+            if now_ms - last_ts >= self.min_refresh_seconds * 1000:
+                # دریافت فقط انتهای جدید سری
+                url = f"{self.base_url}/coins/{coin_id}/market_chart/range"
+                params = {"vs_currency": vs_currency, "from": last_ts // 1000, "to": now_ms // 1000}
+                chart = self._make_request(url, params, parse=parse_market_chart)
+                if chart is not None:
+                    with self.metrics.span("parse"):
+                        self.history.merge_tail(coin_id, vs_currency, granularity, chart)
+                else:
+                    self._notify("warning", "⚠️ آخرین داده‌های ذخیره‌شده نمایش داده می‌شود.")
+        else:
+            # دریافت کامل بازه در اولین درخواست یا وقتی داده‌ی محلی کافی نیست
+            url = f"{self.base_url}/coins/{coin_id}/market_chart"
+            params = {"vs_currency": vs_currency, "days": days}
+            chart = self._make_request(url, params, parse=parse_market_chart)
+            if chart is None:
+                return None
+
+            if not len(chart):
+                self._notify("error", "داده‌ای برای این ارز یافت نشد.")
+                return None
+            with self.metrics.span("parse"):
+                self.history.replace(coin_id, vs_currency, granularity, chart)
+
+        with self.metrics.span("load_frame"):
+            return self.history.load(coin_id, vs_currency, granularity, window_start)
+
+    def get_coin_data(self, coin_id, vs_currency="usd", days=30):
+        """دریافت داده‌های تاریخی قیمت و حجم"""
+        if not coin_id or not coin_id.strip():
+            self._notify("error", "لطفاً نام ارز را وارد کنید.")
+            return None
+
+        coin_id = coin_id.strip().lower()
+
+        try:
+            # پردازش داده‌های قیمت و حجم (از ذخیره‌ی محلی + انتهای جدید)
+            df = self._load_price_history(coin_id, vs_currency, days)
+            if df is None or df.empty:
+                return None
+            return df
+
+        except Exception as e:
+            self._notify("error", f"❌ خطا در پردازش داده‌ها: {str(e)[:200]}")
+            return None
+
+    def get_coin_info(self, coin_id, vs_currency="usd"):
+        """دریافت اطلاعات تکمیلی ارز (نام، نماد، ارزش و رتبه بازار)"""
+        if not coin_id or not coin_id.strip():
+            return None
+
+        coin_id = coin_id.strip().lower()
+        info_url = f"{self.base_url}/coins/{coin_id}"
+        info = self._make_request(info_url, params={"localization": "false"})
+        if not info:
+            return None
+        return {
+            "name": info.get("name", coin_id),
+            "symbol": info.get("symbol", "").upper(),
+            "market_cap": info.get("market_data", {}).get("market_cap", {}).get(vs_currency, 0),
+            "rank": info.get("market_cap_rank", "N/A")
+        }
+
+    def get_coin_list(self):
+        """لیست همه‌ی ارزهای CoinGecko (id، symbol، name) برای نمایه‌ی محلی شناسه‌ها"""
+        return self._make_request(f"{self.base_url}/coins/list")
+
+    def get_markets(self, vs_currency="usd", top_n=MARKETS_PER_PAGE):
+        """لیست top_n ارز اول بر اساس ارزش بازار از /coins/markets همراه با sparkline هفت‌روزه
+
+        هر صفحه تا ۲۵۰ ارز برمی‌گرداند، پس غربال ۲۵۰ ارز فقط یک درخواست است.
+        """
+        markets = []
+        per_page = min(MARKETS_PER_PAGE, top_n)
+        for page in range(1, -(-top_n // per_page) + 1):
+            rows = self._make_request(f"{self.base_url}/coins/markets", params={
+                "vs_currency": vs_currency,
+                "order": "market_cap_desc",
+                "per_page": per_page,
+                "page": page,
+                "sparkline": "true",
+                "price_change_percentage": "24h,7d",
+            })
+            if not rows:
+                break
+            markets.extend(rows)
+            if len(rows) < per_page:
+                break
+        return markets[:top_n] or None
+
+    def pop_messages(self):
+        """پیام‌های جمع‌آوری‌شده از آخرین فراخوانی و پاک کردن آن‌ها"""
+        messages, self.messages = self.messages, []
+        return messages
+
+    def get_fear_greed_index(self):
+        """دریافت شاخص ترس و طمع"""
+        try:
+            data = self._make_request(self.fear_greed_url)
+            if data and "data" in data and len(data["data"]) > 0:
+                return int(data["data"][0]["value"])
+        except:
+            pass
+        return None
@@ -0,0 +1,205 @@
+"""ذخیره‌سازی محلی تاریخچه‌ی قیمت و حجم با دریافت افزایشی انتهای سری"""
+import os
+import sqlite3
+import threading
+from contextlib import closing
+
+import numpy as np
+
+from .columnar import MarketChart, from_pairs, to_frame
+
+# ==================== تنظیمات ====================
+DEFAULT_DB_PATH = os.path.join(".cache", "price_history.sqlite3")
+
+# فاصله‌ی نقاط هر دسته بر حسب میلی‌ثانیه (مطابق رفتار خودکار CoinGecko)
+GRANULARITY_STEPS_MS = {
+    "5m": 5 * 60 * 1000,
+    "hourly": 60 * 60 * 1000,
+    "daily": 24 * 60 * 60 * 1000,
+}
+
+# بیشترین طول انتهای سری که market_chart/range هنوز با دقت کافی برمی‌گرداند
+MAX_TAIL_MS = {
+    "5m": 24 * 60 * 60 * 1000,
+    "hourly": 90 * 24 * 60 * 60 * 1000,
+    "daily": None,
+}
+
+# داده‌های قدیمی‌تر از این بازه هیچ‌وقت در داشبورد استفاده نمی‌شوند
+RETENTION_MS = 366 * 24 * 60 * 60 * 1000
+
+# نقاط انتهای سری اگر کمتر از این کسر از گام فاصله داشته باشند ادغام می‌شوند
+THINNING_TOLERANCE = 0.9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS price_history (
+    coin_id TEXT NOT NULL,
+    vs_currency TEXT NOT NULL,
+    granularity TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    price REAL NOT NULL,
+    volume REAL,
+    market_cap REAL,
+    PRIMARY KEY (coin_id, vs_currency, granularity, ts)
+) WITHOUT ROWID
+"""
+
+
+def granularity_for_days(days):
+    """دسته‌ی دقت داده‌ها برای بازه‌ی درخواستی (همان قاعده‌ی CoinGecko)"""
+    if days <= 1:
+        return "5m"
+    if days <= 90:
+        return "hourly"
+    return "daily"
+
+
+_INSERT = (
+    "INSERT OR REPLACE INTO price_history (coin_id, vs_currency, granularity, ts, price, volume, market_cap) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def _chart_rows(prices, volumes=None, market_caps=None):
+    """ردیف‌های (ts, price, volume, market_cap) از MarketChart یا لیست‌های خام [ts, value]
+
+    NaN هنگام درج در SQLite به NULL تبدیل می‌شود.
+    """
+    chart = prices if isinstance(prices, MarketChart) else from_pairs(prices, volumes, market_caps)
+    return list(zip(chart.ts.tolist(), chart.price.tolist(), chart.volume.tolist(), chart.market_cap.tolist()))
+
+
+# ==================== ماژول ذخیره‌سازی تاریخچه ====================
+class HistoryStore:
+    """ذخیره‌ی سری‌های prices/total_volumes به تفکیک ارز، واحد پول و دقت داده"""
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get("PRICE_HISTORY_DB", DEFAULT_DB_PATH)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._write_lock = threading.Lock()
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+            # پایگاه‌های ساخته‌شده پیش از افزودن ارزش بازار
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(price_history)")}
+            if "market_cap" not in columns:
+                conn.execute("ALTER TABLE price_history ADD COLUMN market_cap REAL")
+            conn.commit()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def coverage(self, coin_id, vs_currency, granularity):
+        """اولین و آخرین timestamp ذخیره‌شده یا None در صورت نبود داده"""
+        with closing(self._connect()) as conn:
+            first_ts, last_ts = conn.execute(
+                "SELECT MIN(ts), MAX(ts) FROM price_history WHERE coin_id=? AND vs_currency=? AND granularity=?",
+                (coin_id, vs_currency, granularity),
+            ).fetchone()
+        if first_ts is None:
+            return None
+        return first_ts, last_ts
+
+    def load_chart(self, coin_id, vs_currency, granularity, since_ms):
+        """خواندن سری از since_ms تا انتها به صورت MarketChart یا None"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT ts, price, volume, market_cap FROM price_history "
+                "WHERE coin_id=? AND vs_currency=? AND granularity=? AND ts>=? ORDER BY ts",
+                (coin_id, vs_currency, granularity, int(since_ms)),
+            ).fetchall()
+        if not rows:
+            return None
+
+        # یک تبدیل در C (NULL -> NaN) و یک ترانهاده‌ی پیوسته تا هر ستون یک بافر مستقل باشد
+        columns = np.array(rows, dtype="float64").T.copy()
+        return MarketChart(ts=columns[0].astype("int64"), price=columns[1], volume=columns[2],
+                           market_cap=columns[3])
+
+    def load(self, coin_id, vs_currency, granularity, since_ms):
+        """خواندن سری از since_ms تا انتها به صورت DataFrame با ستون‌های price/volume/market_cap"""
+        chart = self.load_chart(coin_id, vs_currency, granularity, since_ms)
+        return None if chart is None else to_frame(chart)
+
+    def replace(self, coin_id, vs_currency, granularity, prices, volumes=None, market_caps=None):
+        """جایگزینی کامل سری ذخیره‌شده با پاسخ market_chart (MarketChart یا لیست‌های خام)"""
+        rows = _chart_rows(prices, volumes, market_caps)
+        key = (coin_id, vs_currency, granularity)
+        with self._write_lock, closing(self._connect()) as conn, conn:
+            conn.execute(
+                "DELETE FROM price_history WHERE coin_id=? AND vs_currency=? AND granularity=?", key
+            )
+            conn.executemany(
+                _INSERT,
+                (key + row for row in rows),
+            )
+            self._prune(conn, key, rows)
+
+    def merge_tail(self, coin_id, vs_currency, granularity, prices, volumes=None, market_caps=None):
+        """ادغام انتهای جدید سری با رقیق‌سازی نقاط به دقت ذخیره‌شده"""
+        rows = _chart_rows(prices, volumes, market_caps)
+        if not rows:
+            return 0
+
+        key = (coin_id, vs_currency, granularity)
+        step = GRANULARITY_STEPS_MS[granularity]
+        with self._write_lock, closing(self._connect()) as conn, conn:
+            stored = conn.execute(
+                "SELECT ts, price, volume, market_cap FROM price_history "
+                "WHERE coin_id=? AND vs_currency=? AND granularity=? ORDER BY ts DESC LIMIT 2",
+                key,
+            ).fetchall()
+
+            # آخرین نقطه معمولاً قیمت لحظه‌ای است؛ نقطه‌ی قبلی لنگر رقیق‌سازی می‌شود
+            anchor_ts = stored[-1][0] if stored else None
+            candidates = {row[0]: row for row in stored[:1] if len(stored) > 1}
+            candidates.update({row[0]: row for row in rows if anchor_ts is None or row[0] > anchor_ts})
+            candidates = [candidates[ts] for ts in sorted(candidates)]
+            if not candidates:
+                return 0
+
+            kept = []
+            last_kept = anchor_ts
+            for row in candidates[:-1]:
+                if last_kept is None or row[0] - last_kept >= step * THINNING_TOLERANCE:
+                    kept.append(row)
+                    last_kept = row[0]
+            kept.append(candidates[-1])
+
+            if anchor_ts is not None:
+                conn.execute(
+                    "DELETE FROM price_history WHERE coin_id=? AND vs_currency=? AND granularity=? AND ts>?",
+                    key + (anchor_ts,),
+                )
+            conn.executemany(
+                _INSERT,
+                (key + row for row in kept),
+            )
+            self._prune(conn, key, kept)
+        return len(kept)
+
+    @staticmethod
+    def _prune(conn, key, rows):
+        """حذف نقاط خارج از بازه‌ی نگهداری"""
+        if not rows:
+            return
+        cutoff = max(row[0] for row in rows) - RETENTION_MS
+        conn.execute(
+            "DELETE FROM price_history WHERE coin_id=? AND vs_currency=? AND granularity=? AND ts<?",
+            key + (cutoff,),
+        )
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_history_store():
+    """نمونه‌ی مشترک HistoryStore در سطح پروسه"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = HistoryStore()
+        return _default_store
@@ -0,0 +1,272 @@
+"""موتور افزایشی اندیکاتورها: به‌روزرسانی RSI، SMA، EMA، MACD و بولینگر با هزینه‌ی O(1) برای هر نقطه"""
+import math
+import threading
+from collections import OrderedDict, deque
+
+import numpy as np
+
+from .signals import (
+    DEFAULT_INDICATOR_WINDOWS,
+    DEFAULT_SIGNAL_RULES,
+    score_conditions,
+    score_from_conditions,
+    summarize_latest,
+)
+
+# ==================== تنظیمات ====================
+# هر چند به‌روزرسانی، جمع‌های پنجره‌ی لغزان از روی بافر از نو محاسبه می‌شوند تا خطای اعشاری انباشته نشود
+RESYNC_INTERVAL = 1000
+MIN_ANALYSIS_BARS = 20  # همان حداقل TechnicalAnalyzer.analyze
+MAX_TRACKED_SERIES = 512
+
+INDICATOR_NAMES = ("price", "rsi", "sma_20", "sma_50", "ema_12", "macd", "macd_signal", "bb_high", "bb_low")
+
+
+# ==================== اجزای حالت ====================
+class _EWM:
+    """میانگین نمایی با adjust=False و min_periods (هم‌ارز ewm پانداس)"""
+
+    __slots__ = ("alpha", "min_periods", "value", "count")
+
+    def __init__(self, alpha, min_periods):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.value = math.nan
+        self.count = 0
+
+    def peek(self, x):
+        """حالت بعدی بدون تغییر وضعیت؛ خروجی (مقدار داخلی، تعداد مشاهدات)"""
+        if math.isnan(x):
+            return self.value, self.count
+        if self.count == 0 or self.value == x:
+            return x, self.count + 1
+        old_weight = 1.0 - self.alpha
+        return (old_weight * self.value + self.alpha * x) / (old_weight + self.alpha), self.count + 1
+
+    def step(self, x, commit=True):
+        """خروجی پس از افزودن x؛ با commit=False حالت تغییر نمی‌کند"""
+        value, count = self.peek(x)
+        if commit:
+            self.value, self.count = value, count
+        return value if count >= self.min_periods else math.nan
+
+
+class _Rolling:
+    """پنجره‌ی لغزان با بافر حلقوی و جمع و جمع مربعات (انتقال‌یافته برای پایداری عددی)"""
+
+    __slots__ = ("window", "buffer", "shift", "sum", "sum_sq", "updates")
+
+    def __init__(self, window):
+        self.window = window
+        self.buffer = deque(maxlen=window)
+        self.shift = None
+        self.sum = 0.0
+        self.sum_sq = 0.0
+        self.updates = 0
+
+    def _next_sums(self, x):
+        shift = x if self.shift is None else self.shift
+        total = self.sum + (x - shift)
+        total_sq = self.sum_sq + (x - shift) ** 2
+        n = len(self.buffer) + 1
+        if n > self.window:
+            evicted = self.buffer[0] - shift
+            total -= evicted
+            total_sq -= evicted ** 2
+            n = self.window
+        return shift, total, total_sq, n
+
+    def peek(self, x):
+        """(میانگین، انحراف معیار جامعه) پس از افزودن x بدون تغییر وضعیت"""
+        shift, total, total_sq, n = self._next_sums(x)
+        if n < self.window:
+            return math.nan, math.nan
+        mean = total / n
+        variance = max(0.0, total_sq / n - mean ** 2)
+        return shift + mean, math.sqrt(variance)
+
+    def step(self, x, commit=True):
+        """(میانگین، انحراف معیار) پس از افزودن x؛ با commit=False حالت تغییر نمی‌کند"""
+        result = self.peek(x)
+        if commit:
+            self.shift, self.sum, self.sum_sq, _ = self._next_sums(x)
+            self.buffer.append(x)
+            self.updates += 1
+            if self.updates % RESYNC_INTERVAL == 0:
+                self._resync()
+        return result
+
+    def _resync(self):
+        values = np.fromiter(self.buffer, dtype="float64")
+        self.shift = float(values.mean())
+        centered = values - self.shift
+        self.sum = float(centered.sum())
+        self.sum_sq = float((centered ** 2).sum())
+
+
+# ==================== موتور اندیکاتورها ====================
+class IncrementalIndicators:
+    """حالت کامل اندیکاتورهای یک سری که با هر قیمت جدید در زمان ثابت به‌روز می‌شود
+
+    خروجی‌ها با compute_indicators روی همان سری (از اولین نقطه‌ی داده‌شده) برابرند.
+    """
+
+    def __init__(self, windows=None):
+        w = {**DEFAULT_INDICATOR_WINDOWS, **(windows or {})}
+        self.windows = w
+        self.rsi_up = _EWM(1 / w["rsi_window"], w["rsi_window"])
+        self.rsi_down = _EWM(1 / w["rsi_window"], w["rsi_window"])
+        self.sma_fast = _Rolling(w["sma_fast"])
+        self.sma_slow = _Rolling(w["sma_slow"])
+        self.bb = self.sma_fast if w["bb_window"] == w["sma_fast"] else _Rolling(w["bb_window"])
+        self.ema_12 = _EWM(2 / 13, 12)
+        self.macd_fast = _EWM(2 / (w["macd_fast"] + 1), w["macd_fast"])
+        self.macd_slow = _EWM(2 / (w["macd_slow"] + 1), w["macd_slow"])
+        self.macd_signal = _EWM(2 / (w["macd_signal"] + 1), w["macd_signal"])
+        self.last_price = None
+        self.count = 0
+        self.current = None  # مقادیر آخرین کندل ثبت‌شده
+        self.previous = None  # مقادیر کندل قبل از آن (برای کراس طلایی)
+
+    @classmethod
+    def from_history(cls, prices, windows=None):
+        """بازسازی حالت از تاریخچه‌ی قیمت"""
+        engine = cls(windows)
+        for price in np.asarray(prices, dtype="float64"):
+            engine.update(price)
+        return engine
+
+    def _step(self, price, commit):
+        diff = 0.0 if self.last_price is None else price - self.last_price
+        up, down = max(diff, 0.0), max(-diff, 0.0)
+
+        emaup = self.rsi_up.step(up, commit)
+        emadn = self.rsi_down.step(down, commit)
+        sma_fast, fast_std = self.sma_fast.step(price, commit)
+        bb_mid, bb_std = (sma_fast, fast_std) if self.bb is self.sma_fast else self.bb.step(price, commit)
+        sma_slow, _ = self.sma_slow.step(price, commit)
+        ema_12 = self.ema_12.step(price, commit)
+        macd = self.macd_fast.step(price, commit) - self.macd_slow.step(price, commit)
+        macd_signal = self.macd_signal.step(macd, commit)
+
+        if math.isnan(emadn):
+            rsi = math.nan
+        elif emadn == 0:
+            rsi = 100.0
+        else:
+            rsi = 100 - 100 / (1 + emaup / emadn)
+
+        dev = self.windows["bb_dev"]
+        return {
+            "price": price,
+            "rsi": rsi,
+            "sma_20": sma_fast,
+            "sma_50": sma_slow,
+            "ema_12": ema_12,
+            "macd": macd,
+            "macd_signal": macd_signal,
+            "bb_high": bb_mid + dev * bb_std,
+            "bb_low": bb_mid - dev * bb_std,
+        }
+
+    def update(self, price):
+        """ثبت قیمت جدید و بازگرداندن مقادیر اندیکاتورها در این کندل"""
+        price = float(price)
+        values = self._step(price, commit=True)
+        self.last_price = price
+        self.count += 1
+        self.previous, self.current = self.current, values
+        return values
+
+    def peek(self, price):
+        """مقادیر اندیکاتورها اگر price کندل بعدی باشد، بدون تغییر حالت"""
+        return self._step(float(price), commit=False)
+
+    def evaluate(self, price=None, rules=None):
+        """تحلیل کندل آخر (یا کندل موقت price) با همان خروجی TechnicalAnalyzer.analyze"""
+        if price is None:
+            latest, previous, bars = self.current, self.previous, self.count
+        else:
+            latest, previous, bars = self.peek(price), self.current, self.count + 1
+        if latest is None or bars < MIN_ANALYSIS_BARS:
+            return {"سیگنال": "داده ناکافی", "اطمینان": 0, "جزئیات": {}}
+
+        rules = rules or DEFAULT_SIGNAL_RULES
+        rows = [previous or dict.fromkeys(INDICATOR_NAMES, math.nan), latest]
+        arrays = {name: np.array([row[name] for row in rows], dtype="float64") for name in INDICATOR_NAMES}
+        conditions = score_conditions(
+            arrays["price"], arrays["rsi"], arrays["sma_20"], arrays["sma_50"],
+            arrays["macd"], arrays["macd_signal"], arrays["bb_low"], rules, first_bar=bars - 2,
+        )
+        score = score_from_conditions(conditions, rules)[-1]
+        return summarize_latest(latest["price"], latest["rsi"], latest["sma_20"], latest["macd"],
+                                score, conditions, rules=rules)
+
+
+# ==================== حالت مشترک هر ارز ====================
+class IncrementalAnalyzer:
+    """نگهداری حالت افزایشی هر سری (ارز، واحد پول، دقت) و تغذیه‌ی فقط نقاط جدید
+
+    همه‌ی کندل‌ها به جز آخرین ثبت می‌شوند؛ آخرین کندل (قیمت لحظه‌ای که ممکن است
+    بعداً جایگزین شود) فقط با peek ارزیابی می‌شود.
+    """
+
+    def __init__(self, max_series=MAX_TRACKED_SERIES, windows=None):
+        self.max_series = max_series
+        self.windows = windows
+        self._states = OrderedDict()  # key -> (engine, last_committed_timestamp)
+        self._lock = threading.Lock()
+
+    def _engine_for(self, key, index):
+        """حالت موجود و موقعیت شروع نقاط جدید؛ در صورت ناسازگاری حالت از نو ساخته می‌شود"""
+        state = self._states.get(key)
+        if state is not None:
+            engine, last_ts = state
+            position = index.searchsorted(last_ts)
+            if position < len(index) and index[position] == last_ts:
+                self._states.move_to_end(key)
+                return engine, position + 1
+        return IncrementalIndicators(self.windows), 0
+
+    def analyze(self, key, df, rules=None):
+        """تحلیل آخرین کندل df با به‌روزرسانی افزایشی حالت key"""
+        if df is None or df.empty:
+            return {"سیگنال": "داده ناکافی", "اطمینان": 0, "جزئیات": {}}
+
+        with self._lock:
+            engine, start = self._engine_for(key, df.index)
+            prices = df["price"].to_numpy(dtype="float64")
+            if start >= len(prices):
+                # آخرین کندل df قبلاً ثبت شده است
+                result = engine.evaluate(rules=rules)
+                last_ts = df.index[-1]
+            else:
+                for price in prices[start:-1]:
+                    engine.update(price)
+                result = engine.evaluate(prices[-1], rules)
+                last_ts = df.index[-2] if len(prices) > 1 else None
+
+            if last_ts is not None:
+                self._states[key] = (engine, last_ts)
+                self._states.move_to_end(key)
+                while len(self._states) > self.max_series:
+                    self._states.popitem(last=False)
+            return result
+
+    def values(self, key):
+        """مقادیر آخرین کندل ثبت‌شده‌ی یک سری"""
+        state = self._states.get(key)
+        return None if state is None else state[0].current
+
+
+_shared_analyzer = None
+_shared_analyzer_lock = threading.Lock()
+
+
+def get_incremental_analyzer():
+    """نمونه‌ی مشترک IncrementalAnalyzer در سطح پروسه"""
+    global _shared_analyzer
+    with _shared_analyzer_lock:
+        if _shared_analyzer is None:
+            _shared_analyzer = IncrementalAnalyzer()
+        return _shared_analyzer
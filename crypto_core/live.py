@@ -0,0 +1,143 @@
+"""پایشگر پس‌زمینه برای حالت زنده: دریافت دوره‌ای نقاط جدید و به‌روزرسانی افزایشی تحلیل"""
+import threading
+import time
+
+from .fetcher import DataFetcher
+from .history import granularity_for_days
+from .incremental import get_incremental_analyzer
+
+# ==================== تنظیمات ====================
+TICK_SECONDS = 1.0
+# اشتراکی که این مدت (علاوه بر سه برابر فاصله‌ی خودش) درخواست نشود حذف می‌شود
+IDLE_GRACE_SECONDS = 30
+
+
+# ==================== ماژول پایش زنده ====================
+def fetch_series(coin_id, vs_currency, days, interval):
+    """دریافت پیش‌فرض سری برای پایشگر (هر نوبت با یک DataFetcher تازه)"""
+    fetcher = DataFetcher()
+    if interval:
+        fetcher.min_refresh_seconds = min(fetcher.min_refresh_seconds, interval)
+    return fetcher.get_coin_data(coin_id, vs_currency, days)
+
+
+class LivePoller:
+    """یک نخ پس‌زمینه برای کل پروسه که هر سری مشترک‌شده را در فاصله‌ی خودش به‌روز می‌کند
+
+    fetch(coin_id, vs_currency, days, interval) باید DataFrame قیمت یا None برگرداند.
+    چند جلسه‌ی هم‌زمان روی یک ارز فقط یک بار داده می‌گیرند.
+    """
+
+    def __init__(self, fetch=None, analyzer=None):
+        self.fetch = fetch or fetch_series
+        self.analyzer = analyzer or get_incremental_analyzer()
+        self._subscriptions = {}  # key -> {"interval", "seen", "due"}
+        self._snapshots = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def subscribe(self, coin_id, vs_currency, days, interval):
+        """ثبت یا تمدید اشتراک یک سری؛ خروجی کلید سری"""
+        key = (coin_id, vs_currency, days)
+        now = time.monotonic()
+        with self._lock:
+            subscription = self._subscriptions.get(key)
+            if subscription is None:
+                self._subscriptions[key] = {"interval": interval, "seen": now, "due": now + interval}
+            else:
+                subscription["interval"] = min(subscription["interval"], interval)
+                subscription["seen"] = now
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="live-poller", daemon=True)
+                self._thread.start()
+        return key
+
+    def snapshot(self, key):
+        """آخرین وضعیت سری: df، نتیجه‌ی تحلیل، زمان به‌روزرسانی و شماره‌ی نسخه"""
+        with self._lock:
+            return self._snapshots.get(key)
+
+    def refresh_now(self, key):
+        """به‌روزرسانی فوری یک سری (مثلاً برای اولین نمایش)"""
+        coin_id, vs_currency, days = key
+        with self._lock:
+            subscription = self._subscriptions.get(key)
+        interval = subscription["interval"] if subscription else None
+        df = self.fetch(coin_id, vs_currency, days, interval)
+
+        with self._lock:
+            previous = self._snapshots.get(key)
+            if df is None or df.empty:
+                if previous is not None:
+                    previous["error"] = True
+                return previous
+
+            changed = (
+                previous is None
+                or previous["df"].index[-1] != df.index[-1]
+                or previous["df"]["price"].iloc[-1] != df["price"].iloc[-1]
+            )
+            if not changed:
+                previous["checked_at"] = time.time()
+                previous["error"] = False
+                return previous
+
+        result = self.analyzer.analyze((coin_id, vs_currency, granularity_for_days(days)), df)
+        snapshot = {
+            "df": df,
+            "result": result,
+            "updated_at": time.time(),
+            "checked_at": time.time(),
+            "version": (previous["version"] + 1) if previous else 1,
+            "error": False,
+        }
+        with self._lock:
+            self._snapshots[key] = snapshot
+        return snapshot
+
+    def _due_keys(self):
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            for key, subscription in list(self._subscriptions.items()):
+                if now - subscription["seen"] > 3 * subscription["interval"] + IDLE_GRACE_SECONDS:
+                    del self._subscriptions[key]
+                    self._snapshots.pop(key, None)
+                elif now >= subscription["due"]:
+                    subscription["due"] = now + subscription["interval"]
+                    due.append(key)
+        return due
+
+    def _run(self):
+        while not self._stop.is_set():
+            for key in self._due_keys():
+                try:
+                    self.refresh_now(key)
+                except Exception:
+                    # خطای یک سری نباید پایش بقیه را متوقف کند
+                    with self._lock:
+                        if key in self._snapshots:
+                            self._snapshots[key]["error"] = True
+            with self._lock:
+                if not self._subscriptions:
+                    self._thread = None
+                    return
+            self._stop.wait(TICK_SECONDS)
+
+    def stop(self):
+        self._stop.set()
+
+
+_shared_poller = None
+_shared_poller_lock = threading.Lock()
+
+
+def get_live_poller(fetch=None):
+    """نمونه‌ی مشترک LivePoller در سطح پروسه (fetch فقط در اولین فراخوانی استفاده می‌شود)"""
+    global _shared_poller
+    with _shared_poller_lock:
+        if _shared_poller is None:
+            _shared_poller = LivePoller(fetch)
+        return _shared_poller
@@ -0,0 +1,281 @@
+"""ابزار اندازه‌گیری: زمان هر مرحله، مشخصات هر درخواست بیرونی و خروجی Prometheus یا JSON-lines"""
+import contextvars
+import functools
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+# ==================== تنظیمات ====================
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+RECENT_SAMPLES = 1000  # نمونه‌های اخیر هر سری برای محاسبه‌ی p50/p95
+RECENT_EVENTS = 2000
+MAX_RUNS = 50
+DEFAULT_METRICS_HOST = "127.0.0.1"  # /metrics احراز هویت ندارد؛ فقط با METRICS_HOST روی رابط‌های دیگر باز می‌شود
+
+# شناسه‌ی اجرای جاری؛ نخ‌های ThreadPool باید با contextvars.copy_context آن را به ارث ببرند
+_current_run = contextvars.ContextVar("metrics_run", default=None)
+
+_ENDPOINT_PATTERNS = [
+    (re.compile(r"/coins/[^/]+/market_chart/range$"), "/coins/{id}/market_chart/range"),
+    (re.compile(r"/coins/[^/]+/market_chart$"), "/coins/{id}/market_chart"),
+    (re.compile(r"/coins/[^/]+/ohlc$"), "/coins/{id}/ohlc"),
+    (re.compile(r"/coins/markets$"), "/coins/markets"),
+    (re.compile(r"/coins/list$"), "/coins/list"),
+    (re.compile(r"/coins/[^/]+$"), "/coins/{id}"),
+]
+
+
+def endpoint_label(url):
+    """(میزبان، مسیر بدون شناسه‌ی ارز) برای جلوگیری از انفجار تعداد برچسب‌ها"""
+    parts = urlsplit(url)
+    path = parts.path.rstrip("/") or "/"
+    for pattern, label in _ENDPOINT_PATTERNS:
+        if pattern.search(path):
+            return parts.netloc, label
+    return parts.netloc, path
+
+
+class _Histogram:
+    """هیستوگرام تجمعی Prometheus به همراه نمونه‌های اخیر برای صدک‌ها"""
+
+    __slots__ = ("counts", "sum", "count", "recent")
+
+    def __init__(self):
+        self.counts = [0] * len(DURATION_BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, value):
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+        self.recent.append(value)
+
+    def quantile(self, q):
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+# ==================== ماژول ثبت معیارها ====================
+class MetricsRecorder:
+    """ثبت span مراحل و درخواست‌های بیرونی در سطح پروسه (امن در برابر نخ‌ها)
+
+    اگر log_path داده شود هر رویداد به صورت یک خط JSON به انتهای فایل اضافه می‌شود.
+    """
+
+    def __init__(self, log_path=None):
+        self.log_path = log_path
+        self._stages = defaultdict(_Histogram)  # stage -> histogram
+        self._calls = defaultdict(_Histogram)  # (host, endpoint) -> histogram
+        self._call_counts = defaultdict(int)  # (host, endpoint, status) -> count
+        self._retries = defaultdict(int)  # (host, endpoint) -> retries
+        self._sleep = defaultdict(float)  # host -> seconds
+        self._bytes = defaultdict(int)  # (host, endpoint) -> bytes
+        self._events = deque(maxlen=RECENT_EVENTS)
+        self._runs = deque(maxlen=MAX_RUNS)
+        self._runs_by_id = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def run(self, name, **labels):
+        """یک اجرای کامل (مثلاً یک بار تحلیل داشبورد)؛ span و درخواست‌های داخل آن گروه‌بندی می‌شوند"""
+        run = {"run_id": uuid.uuid4().hex[:12], "name": name, "labels": labels,
+               "started_at": time.time(), "duration": None, "spans": [], "calls": []}
+        with self._lock:
+            if len(self._runs) == self._runs.maxlen:
+                self._runs_by_id.pop(self._runs[0]["run_id"], None)
+            self._runs.append(run)
+            self._runs_by_id[run["run_id"]] = run
+        token = _current_run.set(run["run_id"])
+        started = time.perf_counter()
+        try:
+            with self.span(name, **labels):
+                yield run
+        finally:
+            run["duration"] = time.perf_counter() - started
+            _current_run.reset(token)
+
+    @contextmanager
+    def span(self, stage, **labels):
+        """اندازه‌گیری زمان یک مرحله"""
+        started = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            event = {"type": "span", "stage": stage, "duration": duration, **labels}
+            if error:
+                event["error"] = error
+            with self._lock:
+                self._stages[stage].observe(duration)
+            self._emit(event, "spans")
+
+    def record_call(self, url, status, latency, retries=0, sleep=0.0, nbytes=0):
+        """ثبت یک درخواست بیرونی: تأخیر کل، وضعیت نهایی، تلاش‌های مجدد، زمان انتظار و حجم پاسخ"""
+        host, endpoint = endpoint_label(url)
+        with self._lock:
+            self._calls[(host, endpoint)].observe(latency)
+            self._call_counts[(host, endpoint, str(status))] += 1
+            self._retries[(host, endpoint)] += retries
+            self._sleep[host] += sleep
+            self._bytes[(host, endpoint)] += nbytes
+        self._emit({"type": "call", "host": host, "endpoint": endpoint, "status": status,
+                    "latency": latency, "retries": retries, "sleep": sleep, "bytes": nbytes}, "calls")
+
+    def _emit(self, event, kind):
+        event = {"ts": time.time(), "run_id": _current_run.get(), **event}
+        with self._lock:
+            self._events.append(event)
+            run = self._runs_by_id.get(event["run_id"])
+            if run is not None:
+                run[kind].append(event)
+            if self.log_path:
+                with open(self.log_path, "a", encoding="utf-8") as fh:
+                    fh.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    # ==================== خلاصه‌ها ====================
+    def runs(self):
+        """اجراهای اخیر (جدیدترین اول)"""
+        with self._lock:
+            return [dict(run, spans=list(run["spans"]), calls=list(run["calls"])) for run in reversed(self._runs)]
+
+    def stage_summary(self):
+        with self._lock:
+            return [
+                {"stage": stage, "count": h.count, "p50_ms": _ms(h.quantile(0.5)),
+                 "p95_ms": _ms(h.quantile(0.95)), "total_s": round(h.sum, 3)}
+                for stage, h in sorted(self._stages.items())
+            ]
+
+    def call_summary(self):
+        with self._lock:
+            return [
+                {"host": host, "endpoint": endpoint, "count": h.count,
+                 "p50_ms": _ms(h.quantile(0.5)), "p95_ms": _ms(h.quantile(0.95)),
+                 "retries": self._retries[(host, endpoint)], "bytes": self._bytes[(host, endpoint)]}
+                for (host, endpoint), h in sorted(self._calls.items())
+            ]
+
+    def events(self):
+        with self._lock:
+            return list(self._events)
+
+    # ==================== خروجی‌ها ====================
+    def to_jsonl(self):
+        """رویدادهای اخیر به صورت JSON-lines"""
+        return "".join(json.dumps(event, ensure_ascii=False) + "\n" for event in self.events())
+
+    def prometheus_text(self):
+        """همه‌ی معیارها در قالب متنی Prometheus (نسخه‌ی 0.0.4)"""
+        lines = []
+        with self._lock:
+            _histogram_lines(lines, "crypto_stage_duration_seconds", "مدت اجرای هر مرحله",
+                             {(("stage", stage),): h for stage, h in self._stages.items()})
+            _histogram_lines(lines, "crypto_upstream_request_duration_seconds",
+                             "تأخیر کل درخواست بیرونی با احتساب تلاش‌های مجدد",
+                             {(("host", host), ("endpoint", endpoint)): h
+                              for (host, endpoint), h in self._calls.items()})
+            _counter_lines(lines, "crypto_upstream_requests_total", "تعداد درخواست‌های بیرونی",
+                           {(("host", h), ("endpoint", e), ("status", s)): v
+                            for (h, e, s), v in self._call_counts.items()})
+            _counter_lines(lines, "crypto_upstream_retries_total", "تعداد تلاش‌های مجدد",
+                           {(("host", h), ("endpoint", e)): v for (h, e), v in self._retries.items()})
+            _counter_lines(lines, "crypto_upstream_sleep_seconds_total", "زمان انتظار برای سهمیه و backoff",
+                           {(("host", h),): v for h, v in self._sleep.items()})
+            _counter_lines(lines, "crypto_upstream_response_bytes_total", "حجم پاسخ‌های دریافتی",
+                           {(("host", h), ("endpoint", e)): v for (h, e), v in self._bytes.items()})
+        return "\n".join(lines) + "\n"
+
+
+def timed(stage):
+    """دکوراتور span برای یک تابع کامل"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with get_metrics().span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+def _format_labels(labels):
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels) + "}" if labels else ""
+
+
+def _histogram_lines(lines, name, help_text, series):
+    lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, h in sorted(series.items()):
+        for bound, count in zip(DURATION_BUCKETS, h.counts):
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound),))} {count}")
+        lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {h.count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {h.sum}")
+        lines.append(f"{name}_count{_format_labels(labels)} {h.count}")
+
+
+def _counter_lines(lines, name, help_text, series):
+    lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+    for labels, value in sorted(series.items()):
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+
+
+# ==================== سرور خروجی Prometheus ====================
+class _ExporterHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = get_metrics().prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+_shared_metrics = None
+_exporter = None
+_shared_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """نمونه‌ی مشترک MetricsRecorder در سطح پروسه
+
+    METRICS_LOG_PATH مسیر فایل JSON-lines و METRICS_PORT درگاه /metrics برای Prometheus است
+    (به طور پیش‌فرض فقط روی 127.0.0.1؛ METRICS_HOST نشانی دیگری تعیین می‌کند).
+    """
+    global _shared_metrics, _exporter
+    with _shared_metrics_lock:
+        if _shared_metrics is None:
+            _shared_metrics = MetricsRecorder(os.environ.get("METRICS_LOG_PATH"))
+            port = os.environ.get("METRICS_PORT")
+            if port:
+                _exporter = ThreadingHTTPServer((os.environ.get("METRICS_HOST", DEFAULT_METRICS_HOST), int(port)),
+                                                _ExporterHandler)
+                _exporter.daemon_threads = True
+                threading.Thread(target=_exporter.serve_forever, name="metrics-exporter", daemon=True).start()
+        return _shared_metrics
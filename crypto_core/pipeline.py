@@ -0,0 +1,132 @@
+"""خط لوله‌ی تحلیل تک‌ارز و اسکن هم‌زمان واچ‌لیست (قابل استفاده بدون رابط کاربری)"""
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from .analysis import TechnicalAnalyzer
+from .fetcher import DataFetcher
+from .history import granularity_for_days
+from .incremental import get_incremental_analyzer
+from .metrics import get_metrics
+from .timeframes import MultiTimeframeAnalyzer
+
+
+# ==================== ماژول خط لوله تحلیل ====================
+def _submit(pool, stage, fn, *args):
+    """ارسال کار به pool داخل span مرحله و همراه با contextvars فراخوان
+
+    با کپی context، span و درخواست‌های نخ کارگر به اجرای جاری داشبورد نسبت داده می‌شوند.
+    """
+    def timed():
+        with get_metrics().span(stage):
+            return fn(*args)
+    return pool.submit(contextvars.copy_context().run, timed)
+
+
+PIPELINE_STAGES = {
+    "prices": "دریافت داده‌های تاریخی",
+    "analysis": "تحلیل تکنیکال",
+    "timeframes": "تحلیل چند بازه‌ای",
+    "info": "اطلاعات ارز",
+    "sentiment": "تحلیل احساسات بازار",
+}
+
+
+class AnalysisPipeline:
+    """اجرای هم‌زمان درخواست‌های مستقل و شروع تحلیل به محض رسیدن داده‌های قیمت"""
+
+    @staticmethod
+    def run(fetcher, coin_id, vs_currency="usd", days=30, on_stage=None):
+        """خروجی: دیکشنری df، tech_result، timeframes، coin_info و fear_greed
+
+        timeframes خروجی MultiTimeframeAnalyzer.analyze روی همان سری قیمت است (بدون درخواست اضافه).
+
+        on_stage(stage) در نخ فراخوان و پس از پایان هر مرحله صدا زده می‌شود.
+        """
+        result = {"df": None, "tech_result": None, "timeframes": {}, "coin_info": None, "fear_greed": None}
+        pool = ThreadPoolExecutor(max_workers=3)
+        try:
+            futures = {
+                _submit(pool, "fetch.prices", fetcher.get_coin_data, coin_id, vs_currency, days): "prices",
+                _submit(pool, "fetch.info", fetcher.get_coin_info, coin_id, vs_currency): "info",
+                _submit(pool, "fetch.sentiment", fetcher.get_fear_greed_index): "sentiment",
+            }
+            for future in as_completed(futures):
+                stage = futures[future]
+                value = future.result()
+                if stage == "prices":
+                    result["df"] = value
+                elif stage == "info":
+                    result["coin_info"] = value
+                else:
+                    result["fear_greed"] = value
+                if on_stage:
+                    on_stage(stage)
+
+                if stage == "prices":
+                    if value is None or value.empty:
+                        # بقیه‌ی درخواست‌ها در پس‌زمینه تمام می‌شوند و نتیجه‌شان کش می‌شود
+                        return result
+                    # تحلیل هم‌زمان با درخواست‌های باقی‌مانده اجرا می‌شود
+                    result["tech_result"] = TechnicalAnalyzer.analyze(value)
+                    if on_stage:
+                        on_stage("analysis")
+                    result["timeframes"] = MultiTimeframeAnalyzer.analyze(value)
+                    if on_stage:
+                        on_stage("timeframes")
+        finally:
+            pool.shutdown(wait=False)
+        return result
+
+
+# ==================== ماژول اسکن واچ‌لیست ====================
+WATCHLIST_MAX_WORKERS = 4  # سقف نخ‌های هم‌زمان؛ سهمیه‌ی API توسط محدودکننده‌ی نرخ مشترک رعایت می‌شود
+
+
+class WatchlistScanner:
+    """تحلیل هم‌زمان چند ارز و تولید جدول رتبه‌بندی"""
+
+    @staticmethod
+    def parse_coin_ids(text):
+        """تبدیل متن ورودی (جداشده با کاما یا خط جدید) به لیست یکتای شناسه‌ها"""
+        coin_ids = []
+        for token in text.replace("\n", ",").split(","):
+            token = token.strip().lower()
+            if token and token not in coin_ids:
+                coin_ids.append(token)
+        return coin_ids
+
+    @staticmethod
+    def scan_coin(coin_id, vs_currency="usd", days=30):
+        """دریافت و تحلیل یک ارز در نخ پس‌زمینه و تولید یک ردیف جدول"""
+        fetcher = DataFetcher()
+        df = fetcher.get_coin_data(coin_id, vs_currency, days)
+        # فقط نقاط جدید به حالت افزایشی اندیکاتورهای این ارز اضافه می‌شوند
+        key = (coin_id, vs_currency, granularity_for_days(days))
+        result = get_incremental_analyzer().analyze(key, df) if df is not None else {}
+        errors = [message for level, message in fetcher.messages if level == "error"]
+        return {
+            "ارز": coin_id,
+            "سیگنال": result.get("سیگنال", "خطای دریافت"),
+            "امتیاز": result.get("امتیاز"),
+            "اطمینان": result.get("اطمینان", 0),
+            "RSI": result.get("RSI"),
+            "SMA_20": result.get("SMA_20"),
+            "قیمت": result.get("قیمت"),
+            "خطا": errors[-1] if errors else "",
+        }
+
+    @staticmethod
+    def scan(coin_ids, vs_currency="usd", days=30, max_workers=WATCHLIST_MAX_WORKERS):
+        """اجرای هم‌زمان تحلیل‌ها؛ هر ردیف به محض آماده شدن yield می‌شود"""
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = [_submit(pool, "scan_coin", WatchlistScanner.scan_coin, coin_id, vs_currency, days) for coin_id in coin_ids]
+            for future in as_completed(futures):
+                yield future.result()
+
+    @staticmethod
+    def to_table(rows):
+        """جدول مرتب‌شده بر اساس امتیاز سیگنال و درجه اطمینان"""
+        table = pd.DataFrame(rows, columns=["ارز", "سیگنال", "امتیاز", "اطمینان", "RSI", "SMA_20", "قیمت", "خطا"])
+        return table.sort_values(["امتیاز", "اطمینان"], ascending=False, na_position="last").reset_index(drop=True)
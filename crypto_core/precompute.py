@@ -0,0 +1,295 @@
+"""پیش‌محاسبه‌ی دوره‌ای تحلیل ارزهای پرتکرار و ذخیره‌ی نتایج در یک مخزن مشترک بین جلسه‌ها و پروسه‌ها"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+from .fetcher import DataFetcher
+from .metrics import get_metrics
+from .pipeline import WATCHLIST_MAX_WORKERS, AnalysisPipeline, WatchlistScanner
+
+logger = logging.getLogger(__name__)
+
+# ==================== تنظیمات ====================
+DEFAULT_RESULTS_DB_PATH = os.path.join(".cache", "precomputed.sqlite3")
+DEFAULT_INTERVAL_SECONDS = 300
+DEFAULT_MAX_AGE_SECONDS = 600  # نتیجه‌ی قدیمی‌تر از این به جای نمایش دوباره محاسبه می‌شود
+RESULT_RETENTION_SECONDS = 24 * 60 * 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    coin_id TEXT NOT NULL,
+    vs_currency TEXT NOT NULL,
+    days INTEGER NOT NULL,
+    computed_at REAL NOT NULL,
+    payload BLOB NOT NULL,
+    PRIMARY KEY (coin_id, vs_currency, days)
+)
+"""
+
+
+# ==================== سریال‌سازی نتایج ====================
+# فایل مخزن بین پروسه‌ها مشترک است؛ قالب فقط داده (JSON) است تا نوشتن در آن به اجرای کد
+# در پروسه‌ی خواننده منجر نشود (برخلاف pickle)
+_FRAME_KEY = "__frame__"
+
+
+def _encode(value):
+    """تبدیل DataFrame و اسکالرهای numpy به ساختار JSON (پارامتر default در json.dumps)"""
+    if isinstance(value, pd.DataFrame):
+        index = value.index
+        if not isinstance(index, pd.DatetimeIndex):
+            raise TypeError(f"نمایه‌ی {type(index).__name__} در مخزن نتایج پشتیبانی نمی‌شود")
+        return {_FRAME_KEY: {
+            "index": index.asi8.tolist(),
+            "unit": index.unit,
+            "tz": str(index.tz) if index.tz is not None else None,
+            "name": index.name,
+            "columns": [[str(name), str(column.dtype), column.tolist()] for name, column in value.items()],
+        }}
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"نوع {type(value).__name__} در مخزن نتایج پشتیبانی نمی‌شود")
+
+
+def _decode(obj):
+    """بازسازی DataFrame از خروجی _encode (پارامتر object_hook در json.loads)"""
+    frame = obj.get(_FRAME_KEY)
+    if frame is None or len(obj) != 1:
+        return obj
+    index = pd.to_datetime(np.asarray(frame["index"], dtype="int64"), unit=frame["unit"])
+    if frame["tz"]:
+        index = index.tz_localize("UTC").tz_convert(frame["tz"])
+    index.name = frame["name"]
+    return pd.DataFrame({name: pd.Series(values, index=index).astype(dtype)
+                         for name, dtype, values in frame["columns"]}, index=index)
+
+
+def dumps_result(result):
+    return json.dumps(result, default=_encode, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def loads_result(payload):
+    return json.loads(payload, object_hook=_decode)
+
+
+# ==================== مخزن نتایج ====================
+class ResultStore:
+    """آخرین خروجی AnalysisPipeline.run برای هر (ارز، واحد پول، بازه) در SQLite
+
+    نتیجه‌ی آخرین بار خوانده‌شده در حافظه نگه داشته می‌شود تا rerunها فقط زمان محاسبه را بپرسند.
+    خروجی get بین جلسه‌ها مشترک است و نباید تغییر داده شود.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get("PRECOMPUTE_DB", DEFAULT_RESULTS_DB_PATH)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._memo = {}  # key -> (computed_at, result)
+        self._lock = threading.Lock()
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+            conn.commit()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def put(self, coin_id, vs_currency, days, result, computed_at=None):
+        """ذخیره‌ی نتیجه‌ی خط لوله (فقط وقتی داده‌ی قیمت دریافت شده باشد)"""
+        if result.get("df") is None or result["df"].empty:
+            return False
+        computed_at = computed_at or time.time()
+        payload = dumps_result(result)
+        key = (coin_id, vs_currency, int(days))
+        with closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)", key + (computed_at, payload))
+            conn.execute("DELETE FROM results WHERE computed_at<?", (time.time() - RESULT_RETENTION_SECONDS,))
+        with self._lock:
+            self._memo[key] = (computed_at, result)
+        return True
+
+    def get(self, coin_id, vs_currency, days, max_age=DEFAULT_MAX_AGE_SECONDS):
+        """{"result", "computed_at", "age"} برای نتیجه‌ی تازه‌تر از max_age ثانیه، وگرنه None"""
+        key = (coin_id, vs_currency, int(days))
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT computed_at FROM results WHERE coin_id=? AND vs_currency=? AND days=?", key
+            ).fetchone()
+            if row is None or time.time() - row[0] > max_age:
+                return None
+            with self._lock:
+                memo = self._memo.get(key)
+            if memo is None or memo[0] != row[0]:
+                # نتیجه توسط پروسه‌ی دیگری (مثلاً کارگر جداگانه) نوشته شده است
+                payload = conn.execute(
+                    "SELECT computed_at, payload FROM results WHERE coin_id=? AND vs_currency=? AND days=?", key
+                ).fetchone()
+                if payload is None:
+                    return None
+                try:
+                    memo = (payload[0], loads_result(payload[1]))
+                except (ValueError, TypeError, KeyError):
+                    # ردیف خراب یا با قالب قدیمی؛ با اجرای بعدی خط لوله بازنویسی می‌شود
+                    logger.warning("نتیجه‌ی ذخیره‌شده‌ی %s خوانا نیست", key)
+                    return None
+                with self._lock:
+                    self._memo[key] = memo
+        return {"result": memo[1], "computed_at": memo[0], "age": time.time() - memo[0]}
+
+
+# ==================== زمان‌بند پیش‌محاسبه ====================
+class PrecomputeScheduler:
+    """اجرای دوره‌ای خط لوله‌ی کامل برای لیست ارزهای پرتکرار و نوشتن نتیجه در ResultStore"""
+
+    def __init__(self, coin_ids, vs_currency="usd", days=(30,), interval=DEFAULT_INTERVAL_SECONDS,
+                 store=None, max_workers=WATCHLIST_MAX_WORKERS, notify=None):
+        self.coin_ids = list(coin_ids)
+        self.vs_currency = vs_currency
+        self.days = [int(d) for d in days]
+        self.interval = interval
+        self.store = store or get_result_store()
+        self.max_workers = max_workers
+        self.notify = notify
+        self.last_run_at = None
+        self.last_errors = {}
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def refresh(self, coin_id, days):
+        """یک بار دریافت و تحلیل؛ خروجی True در صورت ذخیره‌ی نتیجه"""
+        fetcher = DataFetcher(notify=self.notify)
+        result = AnalysisPipeline.run(fetcher, coin_id, self.vs_currency, days)
+        stored = self.store.put(coin_id, self.vs_currency, days, result)
+        errors = [message for level, message in fetcher.messages if level == "error"]
+        with self._lock:
+            if stored:
+                self.last_errors.pop((coin_id, days), None)
+            else:
+                self.last_errors[(coin_id, days)] = errors[-1] if errors else "داده‌ای دریافت نشد"
+        return stored
+
+    def run_once(self):
+        """یک دور کامل روی همه‌ی ارزها و بازه‌ها؛ خروجی تعداد نتایج ذخیره‌شده"""
+        jobs = [(coin_id, days) for coin_id in self.coin_ids for days in self.days]
+        with get_metrics().run("precompute", coins=len(self.coin_ids)):
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                stored = sum(pool.map(lambda job: self.refresh(*job), jobs))
+        self.last_run_at = time.time()
+        return stored
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                # خطای یک دور نباید زمان‌بند را متوقف کند
+                logger.exception("پیش‌محاسبه ناموفق بود")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """اجرای زمان‌بند در یک نخ پس‌زمینه (اگر از قبل در حال اجرا نباشد)"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self.run_forever, name="precompute", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+def _hot_config():
+    """(شناسه‌ها، واحد پول، بازه‌ها) از HOT_COINS، HOT_VS_CURRENCY و HOT_DAYS"""
+    coin_ids = WatchlistScanner.parse_coin_ids(os.environ.get("HOT_COINS", ""))
+    days = [int(d) for d in os.environ.get("HOT_DAYS", "30").split(",") if d.strip()]
+    return coin_ids, os.environ.get("HOT_VS_CURRENCY", "usd"), days
+
+
+def hot_keys_from_env():
+    """کلیدهای (ارز، واحد پول، بازه) که زمان‌بند (داخل پروسه یا کارگر جداگانه) تازه نگه می‌دارد"""
+    coin_ids, vs_currency, days = _hot_config()
+    return {(coin_id, vs_currency, d) for coin_id in coin_ids for d in days}
+
+
+def scheduler_from_env(store=None):
+    """زمان‌بند بر اساس HOT_COINS، HOT_DAYS، HOT_VS_CURRENCY و PRECOMPUTE_INTERVAL یا None"""
+    coin_ids, vs_currency, days = _hot_config()
+    if not coin_ids:
+        return None
+    return PrecomputeScheduler(
+        coin_ids,
+        vs_currency=vs_currency,
+        days=days,
+        interval=int(os.environ.get("PRECOMPUTE_INTERVAL", DEFAULT_INTERVAL_SECONDS)),
+        store=store,
+    )
+
+
+def max_age_from_env():
+    return float(os.environ.get("PRECOMPUTE_MAX_AGE", DEFAULT_MAX_AGE_SECONDS))
+
+
+def load_or_run(fetcher, coin_id, vs_currency="usd", days=30, on_stage=None, store=None, max_age=None,
+                hot_keys=None):
+    """نتیجه‌ی تازه‌ی مخزن یا اجرای خط لوله؛ خروجی (نتیجه، سن نتیجه‌ی ذخیره‌شده یا None)
+
+    فقط ارزهای زمان‌بندشده (hot_keys، پیش‌فرض HOT_COINS) از مخزن خوانده و در آن نوشته می‌شوند؛
+    بقیه همیشه تازه تحلیل می‌شوند تا کاربر نتیجه‌ی چند دقیقه‌ای قدیمی نبیند.
+    همان مسیر تحلیل تک‌ارز داشبورد؛ ابزار بار (benchmarks.load) هم از آن استفاده می‌کند.
+    """
+    hot_keys = hot_keys_from_env() if hot_keys is None else hot_keys
+    if (coin_id, vs_currency, int(days)) not in hot_keys:
+        with get_metrics().span("pipeline"):
+            return AnalysisPipeline.run(fetcher, coin_id, vs_currency, days, on_stage), None
+
+    store = store or get_result_store()
+    with get_metrics().span("store.lookup"):
+        cached = store.get(coin_id, vs_currency, days, max_age_from_env() if max_age is None else max_age)
+    if cached:
+        return cached["result"], cached["age"]
+    with get_metrics().span("pipeline"):
+        result = AnalysisPipeline.run(fetcher, coin_id, vs_currency, days, on_stage)
+    store.put(coin_id, vs_currency, days, result)
+    return result, None
+
+
+_shared_store = None
+_shared_scheduler = None
+_shared_lock = threading.Lock()
+
+
+def get_result_store():
+    """نمونه‌ی مشترک ResultStore در سطح پروسه"""
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None:
+            _shared_store = ResultStore()
+        return _shared_store
+
+
+def get_precompute_scheduler():
+    """زمان‌بند مشترک داخل پروسه؛ اگر HOT_COINS خالی باشد یا PRECOMPUTE_IN_PROCESS=0 باشد None
+
+    با PRECOMPUTE_IN_PROCESS=0 نتایج توسط کارگر جداگانه (python -m crypto_core ... --precompute) نوشته می‌شوند.
+    """
+    global _shared_scheduler
+    if os.environ.get("PRECOMPUTE_IN_PROCESS", "1") == "0":
+        return None
+    store = get_result_store()
+    with _shared_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = scheduler_from_env(store)
+            if _shared_scheduler is not None:
+                _shared_scheduler.start()
+        return _shared_scheduler
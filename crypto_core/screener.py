@@ -0,0 +1,185 @@
+"""غربال هم‌زمان ده‌ها تا صدها ارز از /coins/markets با محاسبات برداری روی آرایه‌ی دوبعدی قیمت"""
+import numpy as np
+import pandas as pd
+
+from .metrics import get_metrics
+from .signals import DEFAULT_INDICATOR_WINDOWS, DEFAULT_SIGNAL_RULES
+
+# ==================== تنظیمات ====================
+HOURS_PER_YEAR = 24 * 365  # نقاط sparkline هفت‌روزه ساعتی هستند
+DEFAULT_TOP_N = 250
+DEFAULT_BENCHMARK = "bitcoin"
+ROLLING_CORRELATION_WINDOW = 24
+TABLE_COLUMNS = [
+    "ارز", "نماد", "رتبه", "قیمت", "بازده ۲۴ ساعته", "بازده ۷ روزه", "نوسان سالانه",
+    "بیشترین افت", "RSI", "همبستگی ۷ روزه", "همبستگی ۲۴ ساعته",
+]
+
+
+# ==================== محاسبات برداری ====================
+def price_matrix(markets):
+    """آرایه‌ی (ارز، زمان) از sparkline هر ارز؛ سری‌های کوتاه‌تر از سمت چپ با NaN پر می‌شوند"""
+    series = [(row.get("sparkline_in_7d") or {}).get("price") or [] for row in markets]
+    length = max(map(len, series), default=0)
+    if all(len(values) == length for values in series):
+        # حالت معمول: یک تبدیل در C (None به NaN تبدیل می‌شود)
+        return np.array(series, dtype="float64").reshape(len(series), length)
+    matrix = np.full((len(series), length), np.nan)
+    for row, values in zip(matrix, series):
+        if values:
+            row[length - len(values):] = np.array(values, dtype="float64")
+    return matrix
+
+
+def _first_last(prices):
+    """اولین و آخرین مقدار معتبر هر سطر"""
+    valid = ~np.isnan(prices)
+    rows = np.arange(len(prices))
+    first = prices[rows, np.argmax(valid, axis=1)]
+    last = prices[rows, prices.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)]
+    return first, last
+
+
+def return_stats(prices, window=ROLLING_CORRELATION_WINDOW):
+    """بازده window ساعته و کل بازه، نوسان سالانه و بیشترین افت هر ارز"""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        first, last = _first_last(prices)
+        log_returns = np.diff(np.log(prices), axis=1)
+        running_max = np.fmax.accumulate(prices, axis=1)
+        window_return = (prices[:, -1] / prices[:, -1 - window] - 1) if prices.shape[1] > window else np.nan
+        return {
+            "window_return": window_return,
+            "total_return": last / first - 1,
+            "volatility": np.nanstd(log_returns, axis=1) * np.sqrt(HOURS_PER_YEAR),
+            "max_drawdown": np.nanmin(prices / running_max - 1, axis=1),
+            "log_returns": log_returns,
+        }
+
+
+def rsi_matrix(prices, window=DEFAULT_INDICATOR_WINDOWS["rsi_window"]):
+    """RSI وایلدر برای همه‌ی ارزها در یک گذر زمانی (همان ewm(alpha=1/window, adjust=False) کتابخانه‌ی ta)
+
+    حلقه فقط روی زمان است و هر گام روی همه‌ی ارزها به صورت برداری اجرا می‌شود.
+    """
+    delta = np.diff(prices, axis=1)
+    gains, losses = np.clip(delta, 0, None), np.clip(-delta, 0, None)
+    alpha = 1.0 / window
+    n = len(prices)
+    # ta اولین تغییر (NaN) را صفر حساب می‌کند، پس میانگین‌ها از صفر شروع می‌شوند
+    avg_gain, avg_loss = np.zeros(n), np.zeros(n)
+    count = np.ones(n, dtype="int64")
+    for t in range(delta.shape[1]):
+        valid = ~np.isnan(delta[:, t])
+        avg_gain = np.where(valid, (1 - alpha) * avg_gain + alpha * gains[:, t], avg_gain)
+        avg_loss = np.where(valid, (1 - alpha) * avg_loss + alpha * losses[:, t], avg_loss)
+        count += valid
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rsi = np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + avg_gain / avg_loss))
+    return np.where(count >= window, rsi, np.nan)
+
+
+def correlation_matrix(returns):
+    """همبستگی پیرسون دوبه‌دو روی نقاط مشترک هر جفت (pairwise-complete) با چهار ضرب ماتریسی"""
+    valid = ~np.isnan(returns)
+    x = np.where(valid, returns, 0.0)
+    m = valid.astype("float64")
+    count = m @ m.T
+    sum_x = x @ m.T  # جمع مقادیر i روی نقاطی که j هم معتبر است
+    # عملیات درجا تا ماتریس‌های موقت n×n کمتری ساخته شوند
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_x = sum_x / count
+        cov = x @ x.T
+        cov -= sum_x * mean_x.T
+        var_x = (x * x) @ m.T
+        var_x -= sum_x * mean_x
+        corr = cov
+        corr /= np.sqrt(var_x * var_x.T)
+    flat = var_x.diagonal() <= 1e-18
+    corr[(count < 3) | flat[:, None] | flat[None, :]] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+def rolling_correlation(returns, reference, window=ROLLING_CORRELATION_WINDOW):
+    """همبستگی غلتان هر ارز با سری مرجع با جمع‌های تجمعی (بدون حلقه روی پنجره‌ها)؛ خروجی (ارز، زمان)"""
+    reference = np.broadcast_to(reference, returns.shape)
+    valid = ~np.isnan(returns) & ~np.isnan(reference)
+    x = np.where(valid, returns, 0.0)
+    y = np.where(valid, reference, 0.0)
+
+    def windowed(values):
+        total = np.cumsum(values, axis=1)
+        total = np.concatenate([np.zeros((len(values), 1)), total], axis=1)
+        return total[:, window:] - total[:, :-window]
+
+    count = windowed(valid.astype("float64"))
+    sum_x, sum_y = windowed(x), windowed(y)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = windowed(x * y) - sum_x * sum_y / count
+        var_x = windowed(x * x) - sum_x ** 2 / count
+        var_y = windowed(y * y) - sum_y ** 2 / count
+        corr = cov / np.sqrt(var_x * var_y)
+    # خطای گرد کردن جمع‌های تجمعی برای سری‌های تقریباً ثابت (استیبل‌کوین‌ها)
+    corr[(count < 3) | (var_x <= 1e-18) | (var_y <= 1e-18)] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+# ==================== ماژول غربال بازار ====================
+class MarketScreener:
+    """غربال ارزهای برتر بازار از چند درخواست تجمیعی"""
+
+    @staticmethod
+    def fetch(fetcher, vs_currency="usd", top_n=DEFAULT_TOP_N):
+        with get_metrics().span("fetch.markets"):
+            return fetcher.get_markets(vs_currency, top_n)
+
+    @staticmethod
+    def compute(markets, benchmark=DEFAULT_BENCHMARK, window=ROLLING_CORRELATION_WINDOW):
+        """خروجی: table (یک سطر برای هر ارز)، correlation (ماتریس ارز×ارز)، rolling (همبستگی غلتان با مرجع)
+
+        اگر ارز مرجع در لیست نباشد، اولین ارز (بیشترین ارزش بازار) مرجع است.
+        """
+        with get_metrics().span("screen"):
+            ids = [row.get("id") for row in markets]
+            prices = price_matrix(markets)
+            stats = return_stats(prices, window)
+            returns = stats["log_returns"]
+            rsi = rsi_matrix(prices)
+            corr = correlation_matrix(returns)
+            reference = ids.index(benchmark) if benchmark in ids else 0
+            rolling = rolling_correlation(returns, returns[reference], window) if len(ids) else returns
+
+            table = pd.DataFrame({
+                "ارز": ids,
+                "نماد": [str(row.get("symbol", "")).upper() for row in markets],
+                "رتبه": [row.get("market_cap_rank") for row in markets],
+                "قیمت": [row.get("current_price") for row in markets],
+                "بازده ۲۴ ساعته": stats["window_return"],
+                "بازده ۷ روزه": stats["total_return"],
+                "نوسان سالانه": stats["volatility"],
+                "بیشترین افت": stats["max_drawdown"],
+                "RSI": rsi,
+                "همبستگی ۷ روزه": corr[:, reference] if len(ids) else [],
+                "همبستگی ۲۴ ساعته": rolling[:, -1] if rolling.shape[1] else np.nan,
+            }, columns=TABLE_COLUMNS)
+
+            end = pd.Timestamp.now(tz="UTC").floor("h").tz_localize(None)
+            hours = pd.date_range(end=end, periods=rolling.shape[1], freq="h", name="timestamp")
+            return {
+                "table": table,
+                "correlation": pd.DataFrame(corr, index=ids, columns=ids),
+                "rolling": pd.DataFrame(rolling.T, index=hours, columns=ids),
+                "benchmark": ids[reference] if ids else None,
+            }
+
+    @staticmethod
+    def summary(table, rules=None):
+        """خلاصه‌ی بازار: میانه‌ی بازده‌ها و تعداد ارزهای اشباع خرید/فروش"""
+        rules = rules or DEFAULT_SIGNAL_RULES
+        return {
+            "تعداد ارز": len(table),
+            "میانه بازده ۲۴ ساعته": table["بازده ۲۴ ساعته"].median(),
+            "میانه بازده ۷ روزه": table["بازده ۷ روزه"].median(),
+            "اشباع خرید": int((table["RSI"] > rules["rsi_overbought"]).sum()),
+            "اشباع فروش": int((table["RSI"] < rules["rsi_oversold"]).sum()),
+            "میانه همبستگی": table["همبستگی ۷ روزه"].median(),
+        }
@@ -0,0 +1,181 @@
+"""موتور برداری امتیازدهی سیگنال برای همه‌ی کندل‌های یک سری قیمت"""
+import numpy as np
+import pandas as pd
+import ta
+
+# ==================== قواعد امتیازدهی ====================
+# وزن‌ها و آستانه‌های پیش‌فرض؛ همان قواعد TechnicalAnalyzer.analyze
+DEFAULT_SIGNAL_RULES = {
+    "rsi_oversold": 30,
+    "rsi_overbought": 70,
+    "rsi_oversold_weight": 25,
+    "rsi_overbought_weight": -20,
+    "above_sma_weight": 15,
+    "below_sma_weight": -10,
+    "golden_cross_weight": 20,
+    "macd_weight": 10,
+    "bb_low_weight": 15,
+    "strong_buy_threshold": 40,
+    "buy_threshold": 20,
+    "strong_sell_threshold": -20,
+    "sell_threshold": 0,
+}
+
+# ترتیب دلایل همان ترتیب بررسی قواعد است
+REASONS = [
+    ("rsi_oversold", "RSI در منطقه اشباع فروش 📉"),
+    ("rsi_overbought", "RSI در منطقه اشباع خرید 📈"),
+    ("above_sma", "قیمت بالای میانگین ۲۰ روزه 🟢"),
+    ("below_sma", "قیمت زیر میانگین ۲۰ روزه 🔴"),
+    ("golden_cross", "کراس طلایی صعودی ⭐"),
+    ("macd_bullish", "MACD مثبت ↗️"),
+    ("bb_low", "قیمت در کف باند بولینگر 📊"),
+]
+
+# پنجره‌های پیش‌فرض اندیکاتورها
+DEFAULT_INDICATOR_WINDOWS = {
+    "rsi_window": 14,
+    "sma_fast": 20,
+    "sma_slow": 50,
+    "macd_fast": 12,
+    "macd_slow": 26,
+    "macd_signal": 9,
+    "bb_window": 20,
+    "bb_dev": 2,
+}
+
+SIGNAL_LABELS = {
+    "strong_buy": "خرید قوی 🟢",
+    "buy": "خرید متوسط 🟡",
+    "strong_sell": "فروش قوی 🔴",
+    "sell": "فروش متوسط 🟠",
+    "neutral": "خنثی ⚪",
+}
+
+# تعداد کندل لازم پیش از بررسی کراس طلایی (len(df) > 50 در تحلیل تک‌کندلی)
+GOLDEN_CROSS_MIN_BARS = 51
+
+
+def compute_indicators(price, windows=None):
+    """محاسبه‌ی ستون‌های اندیکاتور با کتابخانه‌ی ta
+
+    نام ستون‌ها ثابت است (sma_20/sma_50) حتی اگر پنجره‌ها تغییر کنند.
+    """
+    windows = {**DEFAULT_INDICATOR_WINDOWS, **(windows or {})}
+    macd = ta.trend.MACD(price, window_slow=windows["macd_slow"], window_fast=windows["macd_fast"],
+                         window_sign=windows["macd_signal"])
+    bollinger = ta.volatility.BollingerBands(price, window=windows["bb_window"], window_dev=windows["bb_dev"])
+    return pd.DataFrame({
+        "rsi": ta.momentum.RSIIndicator(price, window=windows["rsi_window"]).rsi(),
+        "sma_20": ta.trend.SMAIndicator(price, window=windows["sma_fast"]).sma_indicator(),
+        "sma_50": ta.trend.SMAIndicator(price, window=windows["sma_slow"]).sma_indicator(),
+        "ema_12": ta.trend.EMAIndicator(price, window=12).ema_indicator(),
+        "macd": macd.macd(),
+        "macd_signal": macd.macd_signal(),
+        "bb_high": bollinger.bollinger_hband(),
+        "bb_low": bollinger.bollinger_lband(),
+    }, index=price.index)
+
+
+def score_conditions(price, rsi, sma_20, sma_50, macd, macd_signal, bb_low, rules=None, first_bar=0):
+    """ماسک‌های بولی هر قاعده برای همه‌ی کندل‌ها (آرایه‌های NumPy هم‌طول)
+
+    first_bar شماره‌ی اولین عنصر آرایه‌ها در کل سری است (برای برش‌های کوتاه).
+    """
+    rules = rules or DEFAULT_SIGNAL_RULES
+    with np.errstate(invalid="ignore"):
+        has_sma = ~np.isnan(sma_20) & ~np.isnan(price)
+        prev_sma_20 = np.concatenate(([np.nan], sma_20[:-1]))
+        prev_sma_50 = np.concatenate(([np.nan], sma_50[:-1]))
+        enough_bars = np.arange(first_bar, first_bar + len(price)) + 1 >= GOLDEN_CROSS_MIN_BARS
+        return {
+            "rsi_oversold": rsi < rules["rsi_oversold"],
+            "rsi_overbought": rsi > rules["rsi_overbought"],
+            "above_sma": has_sma & (price > sma_20),
+            "below_sma": has_sma & ~(price > sma_20),
+            "golden_cross": has_sma & enough_bars & ~np.isnan(sma_50)
+                            & (prev_sma_20 < prev_sma_50) & (sma_20 > sma_50),
+            "macd_bullish": macd > macd_signal,
+            "bb_low": ~np.isnan(bb_low) & (price < bb_low),
+        }
+
+
+def score_from_conditions(conditions, rules=None):
+    """جمع وزن‌دار ماسک‌ها به امتیاز عددی هر کندل"""
+    rules = rules or DEFAULT_SIGNAL_RULES
+    # rsi_oversold و rsi_overbought هم‌زمان درست نمی‌شوند، پس جمع مستقیم معادل if/elif است
+    return (
+        conditions["rsi_oversold"] * rules["rsi_oversold_weight"]
+        + conditions["rsi_overbought"] * rules["rsi_overbought_weight"]
+        + conditions["above_sma"] * rules["above_sma_weight"]
+        + conditions["below_sma"] * rules["below_sma_weight"]
+        + conditions["golden_cross"] * rules["golden_cross_weight"]
+        + conditions["macd_bullish"] * rules["macd_weight"]
+        + conditions["bb_low"] * rules["bb_low_weight"]
+    )
+
+
+def classify_scores(score, rules=None):
+    """برچسب و درجه اطمینان برای آرایه‌ی امتیازها"""
+    rules = rules or DEFAULT_SIGNAL_RULES
+    score = np.asarray(score)
+    bands = [
+        score >= rules["strong_buy_threshold"],
+        score >= rules["buy_threshold"],
+        score <= rules["strong_sell_threshold"],
+        score <= rules["sell_threshold"],
+    ]
+    keys = np.select(bands, ["strong_buy", "buy", "strong_sell", "sell"], default="neutral")
+    confidence = np.select(
+        bands,
+        [np.minimum(90, 60 + score), 50 + score, np.minimum(90, 60 - score), 50 - score],
+        default=50,
+    )
+    return keys, np.clip(confidence, 5, 95)
+
+
+def signal_series(df, rules=None):
+    """سری کامل امتیاز، سیگنال و اطمینان برای هر کندل در یک گذر برداری
+
+    ستون‌های اندیکاتور در صورت نبود روی df محاسبه می‌شوند.
+    """
+    if "rsi" not in df.columns:
+        indicators = compute_indicators(df["price"])
+        for name in indicators.columns:
+            df[name] = indicators[name]
+
+    def column(name):
+        return df[name].to_numpy(dtype="float64")
+
+    conditions = score_conditions(
+        column("price"), column("rsi"), column("sma_20"), column("sma_50"),
+        column("macd"), column("macd_signal"), column("bb_low"), rules,
+    )
+    score = score_from_conditions(conditions, rules)
+    keys, confidence = classify_scores(score, rules)
+    series = pd.DataFrame({
+        "score": score.astype("int64"),
+        "signal": pd.Series(keys).map(SIGNAL_LABELS).to_numpy(),
+        "confidence": confidence.astype("int64"),
+    }, index=df.index)
+    return series, conditions
+
+
+def reasons_at(conditions, position=-1):
+    """دلایل فعال در یک کندل مشخص"""
+    return [text for name, text in REASONS if conditions[name][position]]
+
+
+def summarize_latest(price, rsi, sma_20, macd, score, conditions, position=-1, rules=None):
+    """خروجی استاندارد تحلیل (همان کلیدهای TechnicalAnalyzer.analyze) برای یک کندل"""
+    keys, confidence = classify_scores(np.array([score]), rules)
+    return {
+        "سیگنال": SIGNAL_LABELS[str(keys[0])],
+        "اطمینان": int(confidence[0]),
+        "امتیاز": int(score),
+        "RSI": round(float(rsi), 2) if pd.notna(rsi) else None,
+        "قیمت": round(float(price), 4),
+        "SMA_20": round(float(sma_20), 4) if pd.notna(sma_20) else None,
+        "MACD": round(float(macd), 4) if pd.notna(macd) else None,
+        "دلایل": reasons_at(conditions, position)[:3],  # فقط ۳ دلیل اول
+    }
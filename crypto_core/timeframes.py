@@ -0,0 +1,172 @@
+"""ساخت کندل‌های OHLCV چند بازه‌ای از یک سری دریافت‌شده و تحلیل هم‌جهتی بازه‌ها"""
+import numpy as np
+import pandas as pd
+
+from .analysis import TechnicalAnalyzer
+from .metrics import get_metrics
+from .signals import DEFAULT_SIGNAL_RULES
+
+# ==================== تنظیمات ====================
+# کندل‌ها از نیمه‌شب UTC هم‌تراز می‌شوند؛ origin (ثانیه از epoch) نقطه‌ی شروع شبکه‌ی کندل‌هاست
+TIMEFRAMES = {
+    "1h": {"seconds": 60 * 60, "label": "۱ ساعته"},
+    "4h": {"seconds": 4 * 60 * 60, "label": "۴ ساعته"},
+    "1d": {"seconds": 24 * 60 * 60, "label": "روزانه"},
+    # هفته‌ها از دوشنبه شروع می‌شوند (1970-01-05 اولین دوشنبه پس از epoch است)
+    "1w": {"seconds": 7 * 24 * 60 * 60, "label": "هفتگی", "origin": 4 * 24 * 60 * 60},
+}
+DEFAULT_TIMEFRAMES = ("1h", "4h", "1d", "1w")
+SOURCE_INTERVAL_SLACK = 0.9  # فاصله‌ی نقاط CoinGecko دقیقاً منظم نیست
+
+
+def source_interval(index):
+    """میانه‌ی فاصله‌ی نقاط سری بر حسب ثانیه"""
+    if len(index) < 2:
+        return None
+    return float(np.median(np.diff(index.as_unit("ns").asi8))) / 1e9
+
+
+def _bucket_starts(ts_ns, timeframe):
+    """شروع کندل هر نقطه (نانوثانیه) و مرز اولین نقطه‌ی هر کندل در آرایه‌ی مرتب"""
+    step = TIMEFRAMES[timeframe]["seconds"] * 10 ** 9
+    origin = TIMEFRAMES[timeframe].get("origin", 0) * 10 ** 9
+    bucket = ts_ns - (ts_ns - origin) % step
+    firsts = np.flatnonzero(np.concatenate(([True], bucket[1:] != bucket[:-1])))
+    return bucket[firsts], firsts
+
+
+def _frame(bucket, columns):
+    index = pd.DatetimeIndex(bucket.view("datetime64[ns]"), name="timestamp")
+    return pd.DataFrame(columns, index=index)
+
+
+def _candles_from_points(df, timeframe):
+    """کندل پایه از نقاط خام؛ ستون price همان close است
+
+    حجم market_chart حجم ۲۴ ساعته‌ی غلتان است، پس حجم هر کندل با میانگین آن
+    ضرب در طول کندل نسبت به ۲۴ ساعت تخمین زده می‌شود.
+    """
+    price = df["price"].to_numpy(dtype="float64")
+    bucket, firsts = _bucket_starts(df.index.as_unit("ns").asi8, timeframe)
+    lasts = np.append(firsts[1:], len(price)) - 1
+    columns = {
+        "open": price[firsts],
+        "high": np.maximum.reduceat(price, firsts),
+        "low": np.minimum.reduceat(price, firsts),
+        "price": price[lasts],
+    }
+    if "volume" in df.columns:
+        volume = df["volume"].to_numpy(dtype="float64")
+        known = ~np.isnan(volume)
+        total = np.add.reduceat(np.where(known, volume, 0.0), firsts)
+        count = np.add.reduceat(known.astype("int64"), firsts)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            columns["volume"] = np.where(count > 0, total / count, np.nan) * (TIMEFRAMES[timeframe]["seconds"] / 86400)
+    return _frame(bucket, columns)
+
+
+def _candles_from_candles(candles, timeframe):
+    """تجمیع کندل‌های ریزتر به بازه‌ی درشت‌تر (بدون مراجعه دوباره به نقاط خام)"""
+    bucket, firsts = _bucket_starts(candles.index.asi8, timeframe)
+    lasts = np.append(firsts[1:], len(candles)) - 1
+    columns = {
+        "open": candles["open"].to_numpy()[firsts],
+        "high": np.maximum.reduceat(candles["high"].to_numpy(), firsts),
+        "low": np.minimum.reduceat(candles["low"].to_numpy(), firsts),
+        "price": candles["price"].to_numpy()[lasts],
+    }
+    if "volume" in candles.columns:
+        columns["volume"] = np.add.reduceat(np.nan_to_num(candles["volume"].to_numpy()), firsts)
+    return _frame(bucket, columns)
+
+
+def build_candles(df, timeframes=DEFAULT_TIMEFRAMES):
+    """کندل‌های OHLCV همه‌ی بازه‌های خواسته‌شده از یک سری قیمت
+
+    بازه‌های ریزتر از دقت داده‌ی منبع حذف می‌شوند. هر بازه در صورت امکان از کندل‌های
+    بازه‌ی ریزتر قبلی ساخته می‌شود (۱ ساعته ← ۴ ساعته ← روزانه ← هفتگی).
+    """
+    interval = source_interval(df.index)
+    if interval is None:
+        return {}
+    ordered = sorted(timeframes, key=lambda name: TIMEFRAMES[name]["seconds"])
+    candles, previous = {}, None
+    for name in ordered:
+        seconds = TIMEFRAMES[name]["seconds"]
+        if seconds < interval * SOURCE_INTERVAL_SLACK:
+            continue
+        if previous is not None and seconds % TIMEFRAMES[previous]["seconds"] == 0:
+            candles[name] = _candles_from_candles(candles[previous], name)
+        else:
+            candles[name] = _candles_from_points(df, name)
+        previous = name
+    return candles
+
+
+# ==================== تحلیل چند بازه‌ای ====================
+class MultiTimeframeAnalyzer:
+    """تحلیل تکنیکال همه‌ی بازه‌ها از یک بار دریافت داده"""
+
+    @staticmethod
+    def analyze(df, timeframes=DEFAULT_TIMEFRAMES):
+        """خروجی: {بازه: {"label", "candles", "result"}} به ترتیب بازه‌ها
+
+        ستون‌های اندیکاتور و سیگنال به DataFrame کندل‌های هر بازه اضافه می‌شوند.
+        """
+        with get_metrics().span("timeframes"):
+            with get_metrics().span("resample"):
+                candles = build_candles(df, timeframes)
+            return {
+                name: {"label": TIMEFRAMES[name]["label"], "candles": frame,
+                       "result": TechnicalAnalyzer.analyze(frame)}
+                for name, frame in candles.items()
+            }
+
+    @staticmethod
+    def confluence(results, rules=None):
+        """هم‌جهتی سیگنال بازه‌ها بر اساس همان آستانه‌های خرید و فروش"""
+        rules = rules or DEFAULT_SIGNAL_RULES
+        scores = [item["result"]["امتیاز"] for item in results.values() if item["result"].get("امتیاز") is not None]
+        bullish = sum(score >= rules["buy_threshold"] for score in scores)
+        bearish = sum(score <= rules["sell_threshold"] for score in scores)
+        if not scores:
+            label = "داده ناکافی"
+        elif not bullish and not bearish:
+            label = "خنثی ⚪"
+        elif bullish == len(scores):
+            label = "همه‌ی بازه‌ها صعودی 🟢"
+        elif bearish == len(scores):
+            label = "همه‌ی بازه‌ها نزولی 🔴"
+        elif bullish > bearish:
+            label = "غالباً صعودی 🟡"
+        elif bearish > bullish:
+            label = "غالباً نزولی 🟠"
+        else:
+            label = "متضاد ⚪"
+        return {
+            "هم‌جهتی": label,
+            "صعودی": bullish,
+            "نزولی": bearish,
+            "خنثی": len(scores) - bullish - bearish,
+            "میانگین امتیاز": round(sum(scores) / len(scores), 1) if scores else None,
+        }
+
+    @staticmethod
+    def to_table(results):
+        """جدول خلاصه‌ی هر بازه"""
+        rows = []
+        for item in results.values():
+            result, candles = item["result"], item["candles"]
+            trend = None
+            if result.get("SMA_20") is not None:
+                trend = "بالای SMA20 🟢" if result["قیمت"] > result["SMA_20"] else "زیر SMA20 🔴"
+            rows.append({
+                "بازه": item["label"],
+                "کندل‌ها": len(candles),
+                "سیگنال": result["سیگنال"],
+                "امتیاز": result.get("امتیاز"),
+                "اطمینان": result["اطمینان"],
+                "RSI": result.get("RSI"),
+                "روند": trend,
+            })
+        return pd.DataFrame(rows, columns=["بازه", "کندل‌ها", "سیگنال", "امتیاز", "اطمینان", "RSI", "روند"])
@@ -0,0 +1,124 @@
+"""نشست‌های HTTP مشترک برای هر میزبان و محدودکننده‌ی نرخ token-bucket"""
+import email.utils
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# ==================== تنظیمات ====================
+# سقف درخواست در دقیقه برای هر میزبان (پلن رایگان CoinGecko: ۳۰ درخواست)
+DEFAULT_CALLS_PER_MINUTE = {
+    "api.coingecko.com": int(os.environ.get("COINGECKO_CALLS_PER_MINUTE", 30)),
+    "api.alternative.me": 60,
+}
+FALLBACK_CALLS_PER_MINUTE = 60
+POOL_SIZE = 16
+
+
+# ==================== محدودکننده‌ی نرخ ====================
+class TokenBucket:
+    """token-bucket امن در برابر نخ‌ها که درخواست‌ها را پیش از ارسال زمان‌بندی می‌کند"""
+
+    def __init__(self, calls_per_minute, burst=None):
+        self.rate = calls_per_minute / 60.0
+        self.capacity = float(burst or max(1, calls_per_minute // 6))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self):
+        """برداشتن یک توکن بدون انتظار؛ خروجی ۰ یا زمان لازم تا توکن بعدی (ثانیه)"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, max_wait=None):
+        """انتظار تا آزاد شدن توکن؛ اگر زمان لازم از max_wait بیشتر باشد فوراً False برمی‌گرداند"""
+        deadline = None if max_wait is None else time.monotonic() + max_wait
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def penalize(self, seconds):
+        """توقف همه‌ی درخواست‌های این میزبان (مثلاً بر اساس Retry-After)"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+def parse_retry_after(value):
+    """تبدیل هدر Retry-After (ثانیه یا تاریخ HTTP) به ثانیه"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def backoff_delay(attempt, retry_after=None, base=1.0, cap=60.0):
+    """تاخیر تلاش مجدد: Retry-After در صورت وجود، وگرنه backoff نمایی با jitter"""
+    seconds = parse_retry_after(retry_after)
+    if seconds is not None:
+        return min(cap, seconds) + random.uniform(0, 1)
+    ceiling = min(cap, base * 2 ** attempt)
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+# ==================== نشست‌های مشترک ====================
+_sessions = {}
+_limiters = {}
+_registry_lock = threading.Lock()
+
+
+def get_session(host):
+    """نشست keep-alive مشترک برای یک میزبان"""
+    with _registry_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[host] = session
+        return session
+
+
+def set_rate_limit(host, calls_per_minute, burst=None):
+    """جایگزینی محدودکننده‌ی نرخ یک میزبان (مثلاً برای سرور آزمایشی محلی)"""
+    with _registry_lock:
+        _limiters[host] = TokenBucket(calls_per_minute, burst)
+        return _limiters[host]
+
+
+def get_rate_limiter(host):
+    """محدودکننده‌ی نرخ مشترک برای یک میزبان"""
+    with _registry_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = TokenBucket(DEFAULT_CALLS_PER_MINUTE.get(host, FALLBACK_CALLS_PER_MINUTE))
+            _limiters[host] = limiter
+        return limiter
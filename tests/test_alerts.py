@@ -0,0 +1,139 @@
+"""آزمون بارگذاری قواعد، ارزیابی افزایشی و ارسال هشدارها (python -m unittest discover tests)"""
+import json
+import math
+import os
+import tempfile
+import time
+import unittest
+
+import pandas as pd
+
+from crypto_core.alerts import AlertEngine, AlertRuleStore, series_key
+
+START = pd.Timestamp("2024-01-01")
+T0 = 1_700_000_000.0
+
+# ۴۱ کندل نوسانی حول ۱۰۰ (RSI بین ۴۰ و ۶۰)؛ سپس RSI به ترتیب زیر ۳۰، بالای ۳۰، زیر ۳۰ و بالای ۳۰ می‌رود
+BASE_PRICES = [100 + 0.5 * math.sin(i) for i in range(41)]
+CROSSING_PRICES = [97.0, 100.0, 93.0, 100.0]
+
+
+class ListSink:
+    def __init__(self):
+        self.alerts = []
+
+    def send(self, alert):
+        self.alerts.append(alert)
+
+
+def frame(prices):
+    index = pd.date_range(START, periods=len(prices), freq="h", name="timestamp")
+    return pd.DataFrame({"price": prices}, index=index)
+
+
+class AlertRuleStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "rules.json")
+
+    def write(self, text):
+        with open(self.path, "w", encoding="utf-8") as fh:
+            fh.write(text)
+
+    def test_invalid_entries_are_skipped_and_kept(self):
+        self.write(json.dumps([{"type": "rsi_cross", "coin_id": "bitcoin"}, {"type": "bogus"}, 5,
+                               {"type": "signal", "coin_id": "ethereum", "signal": "nope"}]))
+        engine = AlertEngine(store=AlertRuleStore(self.path), sinks=[])
+        self.assertEqual([rule["coin_id"] for rule in engine.rules()], ["bitcoin"])
+        self.assertEqual(len(engine.errors), 3)
+
+        # ورودی‌های نامعتبر با ذخیره‌ی بعدی از بین نمی‌روند تا بتوان آن‌ها را اصلاح کرد
+        engine.add_rule({"type": "golden_cross", "coin_id": "solana"})
+        with open(self.path, encoding="utf-8") as fh:
+            self.assertEqual(len(json.load(fh)), 5)
+
+    def test_unreadable_file_is_backed_up_before_overwrite(self):
+        self.write('[{"type": ')
+        engine = AlertEngine(store=AlertRuleStore(self.path), sinks=[])
+        self.assertEqual(engine.rules(), [])
+        self.assertEqual(len(engine.errors), 1)
+
+        engine.add_rule({"type": "fear_greed_below", "threshold": 20})
+        with open(f"{self.path}.bak", encoding="utf-8") as fh:
+            self.assertEqual(fh.read(), '[{"type": ')
+        self.assertEqual(len(AlertRuleStore(self.path).load()), 1)
+
+
+class AlertEvaluationTest(unittest.TestCase):
+    def engine(self, **rule):
+        rule = {"type": "rsi_cross", "coin_id": "bitcoin", "level": 30, "cooldown": 0, **rule}
+        engine = AlertEngine([rule], sinks=[])
+        return engine, series_key(engine.rules()[0])
+
+    def test_first_feed_does_not_fire_on_history(self):
+        engine, key = self.engine(direction="any")
+        df = frame(BASE_PRICES + CROSSING_PRICES)
+        self.assertEqual(engine.feed(key, df, now=T0), [])
+        # همان داده دوباره هم چیز جدیدی ندارد
+        self.assertEqual(engine.feed(key, df, now=T0 + 60), [])
+
+    def test_rsi_cross_direction(self):
+        prices = BASE_PRICES + CROSSING_PRICES + [101.0]
+        expected = {"up": [42, 44], "down": [41, 43], "any": [41, 42, 43, 44]}
+        for direction, bars in expected.items():
+            with self.subTest(direction=direction):
+                engine, key = self.engine(direction=direction)
+                engine.feed(key, frame(prices[:len(BASE_PRICES)]), now=T0)
+                fired = []
+                for end in range(len(BASE_PRICES) + 1, len(prices) + 1):
+                    fired += engine.feed(key, frame(prices[:end]), now=T0 + end * 3600)
+                candles = [pd.Timestamp(alert["candle"]) for alert in fired]
+                self.assertEqual(candles, [START + pd.Timedelta(hours=bar) for bar in bars])
+
+    def test_one_alert_per_candle(self):
+        engine, key = self.engine(direction="any")
+        engine.feed(key, frame(BASE_PRICES), now=T0)
+
+        # کندل لحظه‌ای ۴۱ چند بار از سطح عبور می‌کند ولی فقط یک هشدار می‌دهد
+        fired = []
+        for step, live in enumerate([97.0, 100.0, 97.0, 100.0]):
+            fired += engine.feed(key, frame(BASE_PRICES + [live]), now=T0 + step)
+        self.assertEqual(len(fired), 1)
+        self.assertEqual(pd.Timestamp(fired[0]["candle"]), START + pd.Timedelta(hours=41))
+        self.assertLess(fired[0]["value"], 30)
+
+        # کندل بعدی دوباره می‌تواند هشدار بدهد
+        fired = engine.feed(key, frame(BASE_PRICES + [97.0, 100.0]), now=T0 + 10)
+        self.assertEqual([pd.Timestamp(alert["candle"]) for alert in fired], [START + pd.Timedelta(hours=42)])
+
+    def test_cooldown_suppresses_repeat_alerts(self):
+        engine, key = self.engine(direction="any", cooldown=3600)
+        engine.feed(key, frame(BASE_PRICES), now=T0)
+
+        times = [T0, T0 + 60, T0 + 120, T0 + 3700]
+        fired = []
+        for end, now in zip(range(len(BASE_PRICES) + 1, len(BASE_PRICES) + len(CROSSING_PRICES) + 1), times):
+            fired += engine.feed(key, frame((BASE_PRICES + CROSSING_PRICES)[:end]), now=now)
+        self.assertEqual([alert["fired_at"] for alert in fired], [T0, T0 + 3700])
+
+
+class AlertDeliveryTest(unittest.TestCase):
+    def test_backlog_is_delivered_as_the_bucket_refills(self):
+        sink = ListSink()
+        # ۲۰ هشدار در ثانیه با burst برابر ۴۰۰
+        engine = AlertEngine([], sinks=[sink], interval=300, alerts_per_minute=1200)
+        alerts = [{"rule_id": str(i), "message": str(i)} for i in range(410)]
+        self.assertEqual(engine.dispatch(alerts), 400)
+
+        # باقی صف بدون انتظار برای دور بعد (۳۰۰ ثانیه) ارسال می‌شود
+        engine.start()
+        self.addCleanup(engine.stop)
+        deadline = time.monotonic() + 5
+        while len(sink.alerts) < len(alerts) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual([alert["rule_id"] for alert in sink.alerts], [alert["rule_id"] for alert in alerts])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""آزمون توکن جلسه و قفل پایدار احراز هویت (python -m unittest discover tests)"""
+import os
+import tempfile
+import time
+import unittest
+
+from crypto_core.auth import AuthService, LockoutStore
+
+# هش ساختگی؛ این آزمون‌ها bcrypt را اجرا نمی‌کنند
+PASSWORD_HASH = "$2b$12$" + "x" * 53
+
+
+class AuthTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.db_path = os.path.join(self.directory.name, "auth.sqlite3")
+
+    def service(self, **kwargs):
+        kwargs.setdefault("secret", "test-secret")
+        return AuthService(username="admin", password_hash=PASSWORD_HASH,
+                           lockout=LockoutStore(self.db_path), **kwargs)
+
+
+class TokenTest(AuthTestCase):
+    def test_round_trip(self):
+        service = self.service()
+        self.assertEqual(service.verify_token(service.issue_token("admin")), "admin")
+
+    def test_expired_token_is_rejected(self):
+        service = self.service(token_ttl=60)
+        token = service.issue_token("admin", now=time.time() - 120)
+        self.assertIsNone(service.verify_token(token))
+        self.assertEqual(service.verify_token(token, now=time.time() - 90), "admin")
+
+    def test_tampered_signature_is_rejected(self):
+        service = self.service()
+        body, signature = service.issue_token("admin").split(".")
+        forged = signature[:-1] + ("A" if signature[-1] != "A" else "B")
+        self.assertIsNone(service.verify_token(f"{body}.{forged}"))
+
+    def test_tampered_payload_is_rejected(self):
+        service = self.service()
+        other = self.service(secret="another-secret")
+        body, _ = other.issue_token("admin").split(".")
+        _, signature = service.issue_token("admin").split(".")
+        self.assertIsNone(service.verify_token(f"{body}.{signature}"))
+
+    def test_malformed_and_non_ascii_input_is_rejected(self):
+        service = self.service()
+        for token in ("abc.déf", "توکن.امضا", "", "abc", "a.b.c", None, 123, "....", "e30.e30"):
+            self.assertIsNone(service.verify_token(token), token)
+
+    def test_key_is_not_derived_from_password_hash(self):
+        # بدون APP_SESSION_SECRET هر پروسه کلید تصادفی خودش را دارد
+        first = self.service(secret="")
+        second = self.service(secret="")
+        self.assertIsNone(second.verify_token(first.issue_token("admin")))
+
+    def test_password_change_invalidates_tokens(self):
+        token = self.service().issue_token("admin")
+        changed = AuthService(username="admin", password_hash="$2b$12$" + "y" * 53, secret="test-secret",
+                              lockout=LockoutStore(self.db_path))
+        self.assertIsNone(changed.verify_token(token))
+
+
+class LockoutTest(AuthTestCase):
+    def test_lockout_persists_across_instances(self):
+        store = LockoutStore(self.db_path, max_attempts=3, lockout_seconds=60)
+        self.assertEqual(store.register_failure("admin"), 2)
+        self.assertEqual(LockoutStore(self.db_path, max_attempts=3).register_failure("admin"), 1)
+        self.assertEqual(store.register_failure("admin"), 0)
+
+        reopened = LockoutStore(self.db_path)
+        self.assertGreater(reopened.locked_for("admin"), 0)
+        self.assertEqual(reopened.locked_for("someone-else"), 0)
+
+        reopened.reset("admin")
+        self.assertEqual(store.locked_for("admin"), 0)
+
+    def test_counter_restarts_after_lockout_expires(self):
+        store = LockoutStore(self.db_path, max_attempts=2, lockout_seconds=0.05)
+        store.register_failure("admin")
+        store.register_failure("admin")
+        self.assertGreater(store.locked_for("admin"), 0)
+        time.sleep(0.1)
+        self.assertEqual(LockoutStore(self.db_path, max_attempts=2).register_failure("admin"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+"""آزمون ادغام درخواست‌های هم‌زمان در کش پاسخ (python -m unittest discover tests)"""
+import threading
+import unittest
+
+from crypto_core.cache import ResponseCache
+
+
+class CoalescingTest(unittest.TestCase):
+    def test_waiters_receive_leader_diagnostics(self):
+        cache = ResponseCache()
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def failing_fetch(report):
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            report("warning", "retrying")
+            report("error", "gave up")
+            return None, 0
+
+        results = {}
+
+        def caller(name):
+            messages = []
+            value = cache.get_or_fetch("https://example.test/x", {"a": 1}, failing_fetch,
+                                       replay=lambda level, message: messages.append((level, message)))
+            results[name] = (value, messages)
+
+        leader = threading.Thread(target=caller, args=("leader",))
+        leader.start()
+        started.wait(5)
+        waiters = [threading.Thread(target=caller, args=(f"waiter-{i}",)) for i in range(3)]
+        for thread in waiters:
+            thread.start()
+        # منتظرها پیش از پایان درخواست رهبر به پرواز ملحق می‌شوند
+        while cache.stats()["coalesced"] < len(waiters):
+            threading.Event().wait(0.01)
+        release.set()
+        for thread in [leader, *waiters]:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        # رهبر پیام‌ها را مستقیماً از fetch می‌گیرد، نه از replay
+        self.assertEqual(results["leader"], (None, []))
+        for i in range(3):
+            self.assertEqual(results[f"waiter-{i}"], (None, [("warning", "retrying"), ("error", "gave up")]))
+
+    def test_cached_value_is_served_without_fetch(self):
+        cache = ResponseCache()
+        self.assertEqual(cache.get_or_fetch("https://example.test/coins/list", None, lambda report: ([1], 8)), [1])
+        self.assertEqual(cache.get_or_fetch("https://example.test/coins/list", None, self.fail), [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
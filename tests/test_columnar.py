@@ -0,0 +1,107 @@
+"""آزمون تبدیل ستونی پاسخ market_chart و مسیر جایگزین json (python -m unittest discover tests)"""
+import json
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from crypto_core import columnar
+from crypto_core.columnar import from_pairs, parse_market_chart
+
+HOUR_MS = 60 * 60 * 1000
+START_MS = 1_700_000_000_000
+
+
+def sample_payload(points=48):
+    """پاسخ نمونه با اعداد اعشاری، نماد علمی و فاصله‌های نامنظم مانند پاسخ واقعی"""
+    ts = [START_MS + i * HOUR_MS for i in range(points)]
+    return {
+        "prices": [[t, 37000.5 + i * 1.25] for i, t in enumerate(ts)],
+        "market_caps": [[t, 7.2e11 + i * 1e8] for i, t in enumerate(ts)],
+        "total_volumes": [[t, 1.5e10 - i * 3.3e6] for i, t in enumerate(ts)],
+    }
+
+
+def assert_charts_equal(test, actual, expected):
+    for name in columnar.MarketChart._fields:
+        with test.subTest(column=name):
+            np.testing.assert_array_equal(getattr(actual, name), getattr(expected, name))
+            test.assertEqual(getattr(actual, name).dtype, getattr(expected, name).dtype)
+
+
+class AlignTest(unittest.TestCase):
+    def test_misaligned_volumes_are_matched_by_timestamp(self):
+        prices = [[START_MS + i * HOUR_MS, 100.0 + i] for i in range(5)]
+        # حجم‌ها نامرتب، یکی جاافتاده، یکی اضافه و یکی با timestamp کمی جابه‌جا
+        volumes = [
+            [START_MS + 3 * HOUR_MS, 13.0],
+            [START_MS, 10.0],
+            [START_MS + 9 * HOUR_MS, 99.0],
+            [START_MS + 2 * HOUR_MS + 1, 12.0],
+            [START_MS + HOUR_MS, 11.0],
+        ]
+        chart = from_pairs(prices, volumes)
+
+        np.testing.assert_array_equal(chart.volume, [10.0, 11.0, np.nan, 13.0, np.nan])
+        self.assertTrue(np.isnan(chart.market_cap).all())
+
+    def test_misaligned_volumes_survive_the_byte_parser(self):
+        payload = sample_payload(6)
+        payload["total_volumes"] = list(reversed(payload["total_volumes"][1:]))
+        chart = parse_market_chart(json.dumps(payload).encode())
+
+        self.assertTrue(np.isnan(chart.volume[0]))
+        np.testing.assert_array_equal(chart.volume[1:], [v for _, v in sample_payload(6)["total_volumes"][1:]])
+
+
+class EmptyPayloadTest(unittest.TestCase):
+    def test_empty_payloads_give_an_empty_chart(self):
+        for payload in (b"{}", b'{"prices": [], "total_volumes": [], "market_caps": []}',
+                        '{"prices": [ ]}', {}, None):
+            with self.subTest(payload=payload):
+                chart = parse_market_chart(payload)
+                self.assertEqual(len(chart), 0)
+                self.assertEqual(len(chart.volume), 0)
+                self.assertEqual(chart.ts.dtype, np.int64)
+
+
+class FallbackParityTest(unittest.TestCase):
+    def setUp(self):
+        self.payload = sample_payload()
+        self.raw = json.dumps(self.payload).encode()
+        self.expected = from_pairs(self.payload["prices"], self.payload["total_volumes"],
+                                   self.payload["market_caps"])
+
+    def test_fast_path_is_used_for_plain_payloads(self):
+        with mock.patch.object(columnar.json, "loads", side_effect=AssertionError("json fallback used")):
+            chart = parse_market_chart(self.raw)
+        assert_charts_equal(self, chart, self.expected)
+
+    def test_fallback_matches_fast_path(self):
+        for dtype in ("float64", "float32"):
+            with self.subTest(dtype=dtype):
+                fast = parse_market_chart(self.raw, dtype)
+                with mock.patch.object(columnar, "_decode_sections", return_value=None):
+                    slow = parse_market_chart(self.raw, dtype)
+                assert_charts_equal(self, fast, slow)
+
+    def test_fromstring_failure_falls_back_to_json(self):
+        for error in (ValueError("unmatched data"), DeprecationWarning("string or file could not be read")):
+            with self.subTest(error=type(error).__name__):
+                with mock.patch.object(columnar.np, "fromstring", side_effect=error):
+                    chart = parse_market_chart(self.raw)
+                assert_charts_equal(self, chart, self.expected)
+
+    def test_null_values_fall_back_to_json(self):
+        self.payload["total_volumes"][5][1] = None
+        self.payload["prices"][7][1] = None
+        chart = parse_market_chart(json.dumps(self.payload, indent=2))
+
+        self.assertEqual(len(chart), len(self.payload["prices"]) - 1)
+        self.assertNotIn(self.payload["prices"][7][0], chart.ts)
+        self.assertTrue(np.isnan(chart.volume[5]))
+        self.assertEqual(np.isnan(chart.volume).sum(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
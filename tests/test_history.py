@@ -0,0 +1,136 @@
+"""آزمون ذخیره‌ی تاریخچه: ادغام انتهای سری، رقیق‌سازی، نگهداری و تصمیم دریافت کامل (python -m unittest discover tests)"""
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from crypto_core import history
+from crypto_core.cache import ResponseCache
+from crypto_core.columnar import from_pairs
+from crypto_core.fetcher import DataFetcher
+from crypto_core.history import GRANULARITY_STEPS_MS, RETENTION_MS, THINNING_TOLERANCE, HistoryStore
+
+HOUR = GRANULARITY_STEPS_MS["hourly"]
+MINUTE = 60 * 1000
+KEY = ("bitcoin", "usd", "hourly")
+
+
+def _pairs(timestamps, offset=0.0):
+    return [[int(ts), 100.0 + i + offset] for i, ts in enumerate(timestamps)]
+
+
+class HistoryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.store = HistoryStore(os.path.join(self.directory.name, "history.sqlite3"))
+
+    def stored_ts(self):
+        chart = self.store.load_chart(*KEY, 0)
+        return [] if chart is None else chart.ts.tolist()
+
+
+class MergeTailTest(HistoryTestCase):
+    def test_overlapping_tail_replaces_live_point(self):
+        base = 1_700_000_000_000 // HOUR * HOUR
+        hourly = [base + i * HOUR for i in range(11)]
+        # پاسخ market_chart: نقاط ساعتی به‌علاوه‌ی قیمت لحظه‌ای ۲۰ دقیقه پس از آخرین ساعت
+        self.store.replace(*KEY, _pairs(hourly + [hourly[-1] + 20 * MINUTE]))
+
+        # انتهای جدید با همپوشانی دو نقطه‌ی قبلی و قیمت لحظه‌ای تازه
+        tail = [hourly[-2], hourly[-1], hourly[-1] + 20 * MINUTE, hourly[-1] + HOUR, hourly[-1] + HOUR + 5 * MINUTE]
+        kept = self.store.merge_tail(*KEY, _pairs(tail, offset=1000))
+
+        self.assertEqual(kept, 2)
+        self.assertEqual(self.stored_ts(), hourly + [hourly[-1] + HOUR, hourly[-1] + HOUR + 5 * MINUTE])
+        chart = self.store.load_chart(*KEY, 0)
+        # نقاط پیش از لنگر دست نمی‌خورند و نقاط جدید مقدار پاسخ تازه را دارند
+        self.assertEqual(chart.price[:11].tolist(), [100.0 + i for i in range(11)])
+        self.assertEqual(chart.price[-1], 100.0 + 4 + 1000)
+
+    def test_merging_the_same_tail_twice_is_idempotent(self):
+        base = 1_700_000_000_000 // HOUR * HOUR
+        self.store.replace(*KEY, _pairs([base + i * HOUR for i in range(5)]))
+        tail = _pairs([base + 4 * HOUR, base + 5 * HOUR, base + 5 * HOUR + MINUTE])
+        self.store.merge_tail(*KEY, tail)
+        first = self.stored_ts()
+        self.store.merge_tail(*KEY, tail)
+        self.assertEqual(self.stored_ts(), first)
+
+    def test_fine_tail_is_thinned_to_stored_granularity(self):
+        base = 1_700_000_000_000 // HOUR * HOUR
+        self.store.replace(*KEY, _pairs([base + i * HOUR for i in range(3)]))
+        # شش ساعت داده‌ی پنج‌دقیقه‌ای
+        fine = [base + 2 * HOUR + i * 5 * MINUTE for i in range(1, 6 * 12 + 1)]
+        self.store.merge_tail(*KEY, _pairs(fine))
+
+        stored = self.stored_ts()
+        self.assertEqual(stored[:3], [base + i * HOUR for i in range(3)])
+        # هر نقطه‌ی نگه‌داشته اولین نقطه‌ی پنج‌دقیقه‌ای پس از رسیدن به کسر مجاز گام است
+        gaps = np.diff(stored[2:-1])
+        self.assertTrue(((gaps >= HOUR * THINNING_TOLERANCE) & (gaps < HOUR * THINNING_TOLERANCE + 5 * MINUTE)).all(),
+                        gaps)
+        self.assertEqual(stored[-1], fine[-1])  # آخرین نقطه (قیمت لحظه‌ای) همیشه نگه داشته می‌شود
+        self.assertLessEqual(len(stored), 3 + int(6 / THINNING_TOLERANCE) + 1)  # به جای ۷۲ نقطه
+
+    def test_points_outside_retention_are_pruned(self):
+        base = 1_700_000_000_000 // HOUR * HOUR
+        self.store.replace(*KEY, _pairs([base - RETENTION_MS - HOUR, base - HOUR, base]))
+        self.assertEqual(self.store.coverage(*KEY), (base - HOUR, base))
+
+    def test_empty_tail_is_ignored(self):
+        self.store.replace(*KEY, _pairs([0, HOUR]))
+        self.assertEqual(self.store.merge_tail(*KEY, []), 0)
+        self.assertEqual(self.stored_ts(), [0, HOUR])
+
+
+class CoverageDecisionTest(HistoryTestCase):
+    """DataFetcher فقط وقتی انتهای سری را می‌گیرد که داده‌ی محلی کل پنجره را پوشش دهد"""
+
+    def fetch(self, days=30):
+        requests = []
+        now_ms = int(time.time() * 1000)
+
+        def make_request(url, params=None, max_retries=3, parse=None):
+            requests.append(url.rsplit("/", 1)[-1])
+            start = params["from"] * 1000 if "from" in params else now_ms - days * 24 * HOUR
+            return from_pairs(_pairs(range(int(start) // HOUR * HOUR + HOUR, now_ms, HOUR)))
+
+        with mock.patch.object(history, "_default_store", self.store):
+            fetcher = DataFetcher()
+        fetcher.cache = ResponseCache()
+        fetcher.min_refresh_seconds = 0
+        fetcher._make_request = make_request
+        df = fetcher.get_coin_data("bitcoin", "usd", days)
+        return requests, df
+
+    def test_full_fetch_then_tail(self):
+        requests, df = self.fetch()
+        self.assertEqual(requests, ["market_chart"])
+        self.assertGreater(len(df), 24 * 29)
+        requests, _ = self.fetch()
+        self.assertEqual(requests, ["range"])
+
+    def test_partial_window_forces_replace(self):
+        # فقط دو روز اخیر ذخیره شده است؛ پنجره‌ی ۳۰ روزه پوشش داده نمی‌شود
+        now_ms = int(time.time() * 1000)
+        self.store.replace(*KEY, _pairs(range(now_ms - 48 * HOUR, now_ms, HOUR)))
+        requests, df = self.fetch(days=30)
+        self.assertEqual(requests, ["market_chart"])
+        first_ts, _ = self.store.coverage(*KEY)
+        self.assertLessEqual(first_ts, now_ms - 29 * 24 * HOUR)
+
+    def test_stale_tail_forces_replace(self):
+        # داده‌ی کامل اما قدیمی‌تر از بیشینه‌ی طول انتهای قابل دریافت
+        now_ms = int(time.time() * 1000)
+        old_end = now_ms - history.MAX_TAIL_MS["hourly"] - HOUR
+        self.store.replace(*KEY, _pairs(range(old_end - 40 * 24 * HOUR, old_end, HOUR)))
+        requests, _ = self.fetch(days=30)
+        self.assertEqual(requests, ["market_chart"])
+
+
+if __name__ == "__main__":
+    unittest.main()
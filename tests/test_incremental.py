@@ -0,0 +1,74 @@
+"""آزمون برابری اندیکاتورهای افزایشی با محاسبه‌ی دسته‌ای (python -m unittest discover tests)"""
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from crypto_core.analysis import TechnicalAnalyzer
+from crypto_core.incremental import INDICATOR_NAMES, RESYNC_INTERVAL, IncrementalIndicators
+from crypto_core.signals import compute_indicators
+
+# EWMها دقیقاً برابرند؛ جمع‌های پنجره‌ی لغزان در حد خطای اعشاری (حدود 1e-10) فاصله دارند
+RTOL = 1e-9
+ATOL = 1e-8
+# روی پنجره‌ی ثابت واریانس دسته‌ای پانداس حدود 1e-13 است و ریشه‌ی آن باندها را تا حدود 1e-6 جابه‌جا می‌کند
+BAND_ATOL = 1e-5
+
+
+def random_walk(seed, bars):
+    rng = np.random.default_rng(seed)
+    price = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, bars)))
+    # چند گام بدون تغییر قیمت تا شاخه‌های diff=0 و emadn=0 هم اجرا شوند
+    price[100:120] = price[100]
+    return pd.Series(price, index=pd.date_range("2024-01-01", periods=bars, freq="h"))
+
+
+class IncrementalParityTest(unittest.TestCase):
+    def test_streamed_updates_match_batch_indicators(self):
+        for seed in (0, 1, 2):
+            # طول بیش از RESYNC_INTERVAL تا هم‌گام‌سازی دوباره‌ی جمع‌ها هم پوشش داده شود
+            price = random_walk(seed, RESYNC_INTERVAL + 500)
+            batch = compute_indicators(price)
+            engine = IncrementalIndicators()
+            streamed = {name: [] for name in INDICATOR_NAMES}
+            for value in price:
+                peeked = engine.peek(value)
+                updated = engine.update(value)
+                for name in INDICATOR_NAMES:
+                    # peek همان نتیجه‌ی update را بدون تغییر حالت می‌دهد
+                    np.testing.assert_equal(peeked[name], updated[name])
+                    streamed[name].append(updated[name])
+            for name in batch.columns:
+                with self.subTest(seed=seed, indicator=name):
+                    np.testing.assert_allclose(streamed[name], batch[name].to_numpy(), rtol=RTOL,
+                                               atol=BAND_ATOL if name.startswith("bb_") else ATOL,
+                                               equal_nan=True)
+
+    def test_peek_does_not_change_state(self):
+        price = random_walk(7, 200)
+        engine = IncrementalIndicators.from_history(price.iloc[:-1])
+        before = dict(engine.current)
+        for value in (1.0, 1e6, float(price.iloc[-1])):
+            engine.peek(value)
+        self.assertEqual(engine.current, before)
+        updated = engine.update(price.iloc[-1])
+        np.testing.assert_allclose(
+            [updated[name] for name in ("rsi", "sma_50", "macd_signal", "bb_low")],
+            compute_indicators(price)[["rsi", "sma_50", "macd_signal", "bb_low"]].iloc[-1].to_numpy(),
+            rtol=RTOL, atol=ATOL,
+        )
+
+    def test_evaluate_matches_technical_analyzer(self):
+        price = random_walk(3, 400)
+        engine = IncrementalIndicators.from_history(price.iloc[:-1])
+        for bars in (len(price) - 1, len(price)):
+            df = pd.DataFrame({"price": price.iloc[:bars]})
+            expected = TechnicalAnalyzer.analyze(df)
+            actual = engine.evaluate() if bars < len(price) else engine.evaluate(price.iloc[-1])
+            with self.subTest(bars=bars):
+                self.assertEqual((actual["سیگنال"], actual["امتیاز"], actual["دلایل"]),
+                                 (expected["سیگنال"], expected["امتیاز"], expected["دلایل"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""آزمون برابری امتیازدهی برداری با پیاده‌سازی اسکالر مرجع (python -m unittest discover tests)"""
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from crypto_core.analysis import TechnicalAnalyzer
+from crypto_core.signals import compute_indicators, signal_series
+
+SEEDS = (0, 1, 2, 3, 4)
+BARS = 300
+
+
+def random_walk(seed, bars=BARS):
+    """سری قیمت ساعتی با روند متغیر تا همه‌ی قواعد (از جمله کراس طلایی) فعال شوند"""
+    rng = np.random.default_rng(seed)
+    drift = np.repeat(rng.normal(0, 0.004, bars // 50 + 1), 50)[:bars]
+    price = 100 * np.exp(np.cumsum(drift + rng.normal(0, 0.02, bars)))
+    index = pd.date_range("2024-01-01", periods=bars, freq="h")
+    return pd.DataFrame({"price": price, "volume": rng.uniform(1e6, 2e6, bars)}, index=index)
+
+
+def reference_score(df, position):
+    """امتیازدهی اسکالر مرجع برای کندل position (همان شاخه‌های if/elif تحلیل تک‌کندلی قدیمی)"""
+    latest = df.iloc[position]
+    score, reasons = 0, []
+    if pd.notna(latest["rsi"]):
+        if latest["rsi"] < 30:
+            score += 25
+            reasons.append("RSI در منطقه اشباع فروش 📉")
+        elif latest["rsi"] > 70:
+            score -= 20
+            reasons.append("RSI در منطقه اشباع خرید 📈")
+    if pd.notna(latest["sma_20"]) and pd.notna(latest["price"]):
+        if latest["price"] > latest["sma_20"]:
+            score += 15
+            reasons.append("قیمت بالای میانگین ۲۰ روزه 🟢")
+        else:
+            score -= 10
+            reasons.append("قیمت زیر میانگین ۲۰ روزه 🔴")
+        if position + 1 > 50 and pd.notna(latest["sma_50"]):
+            previous = df.iloc[position - 1]
+            if previous["sma_20"] < previous["sma_50"] and latest["sma_20"] > latest["sma_50"]:
+                score += 20
+                reasons.append("کراس طلایی صعودی ⭐")
+    if pd.notna(latest["macd"]) and pd.notna(latest["macd_signal"]):
+        if latest["macd"] > latest["macd_signal"]:
+            score += 10
+            reasons.append("MACD مثبت ↗️")
+    if pd.notna(latest["bb_low"]) and pd.notna(latest["price"]):
+        if latest["price"] < latest["bb_low"]:
+            score += 15
+            reasons.append("قیمت در کف باند بولینگر 📊")
+
+    if score >= 40:
+        signal, confidence = "خرید قوی 🟢", min(90, 60 + score)
+    elif score >= 20:
+        signal, confidence = "خرید متوسط 🟡", 50 + score
+    elif score <= -20:
+        signal, confidence = "فروش قوی 🔴", min(90, 60 - score)
+    elif score <= 0:
+        signal, confidence = "فروش متوسط 🟠", 50 - score
+    else:
+        signal, confidence = "خنثی ⚪", 50
+    return score, signal, min(95, max(5, confidence)), reasons
+
+
+class SignalParityTest(unittest.TestCase):
+    def test_every_bar_matches_scalar_reference(self):
+        fired = set()
+        for seed in SEEDS:
+            df = random_walk(seed)
+            indicators = compute_indicators(df["price"])
+            for name in indicators.columns:
+                df[name] = indicators[name]
+            series, conditions = signal_series(df)
+            for position in range(len(df)):
+                score, signal, confidence, reasons = reference_score(df, position)
+                with self.subTest(seed=seed, bar=position):
+                    self.assertEqual(series["score"].iloc[position], score)
+                    self.assertEqual(series["signal"].iloc[position], signal)
+                    self.assertEqual(series["confidence"].iloc[position], confidence)
+                fired.update(reasons)
+        # مطمئن می‌شویم سری‌های آزمون همه‌ی شاخه‌ها را پوشش می‌دهند
+        self.assertEqual(len(fired), 7, fired)
+
+    def test_analyze_matches_reference_on_prefixes(self):
+        for seed in SEEDS:
+            full = random_walk(seed)
+            for bars in (20, 49, 51, 120, BARS):
+                df = full.iloc[:bars].copy()
+                result = TechnicalAnalyzer.analyze(df)
+                score, signal, confidence, reasons = reference_score(df, bars - 1)
+                with self.subTest(seed=seed, bars=bars):
+                    self.assertEqual((result["امتیاز"], result["سیگنال"], result["اطمینان"]),
+                                     (score, signal, confidence))
+                    self.assertEqual(result["دلایل"], reasons[:3])
+
+
+if __name__ == "__main__":
+    unittest.main()